@@ -3,6 +3,7 @@ from six import iteritems
 import time
 import struct
 import collections
+import functools
 
 from rig.machine_control.scp_connection import SCPConnection
 
@@ -14,6 +15,7 @@ from rig.machine_control.consts import SCPCommands, LEDAction, BMPInfoType, \
 from rig.machine_control.common import unpack_sver_response_version
 
 from rig.utils.contexts import ContextMixin, Required
+from rig.utils.parallel import run_concurrently
 
 
 class BMPController(ContextMixin):
@@ -152,8 +154,36 @@ class BMPController(ContextMixin):
         :py:meth:`~rig.machine_control.scp_connection.SCPConnection` for
         details.
         """
-        # Find the connection which best matches the specified coordinates,
-        # preferring direct connections to a board when available.
+        connection = self.get_connection(cabinet, frame, board)
+        return connection.send_scp(self._receive_length, 0, 0, board,
+                                   *args, **kwargs)
+
+    def send_scp_burst(self, connection, window_size, calls):
+        """Transmit a burst of pipelined SCP packets to the BMPs reached via
+        a single connection.
+
+        Parameters
+        ----------
+        connection : :py:class:`~.SCPConnection`
+            A connection (see :py:meth:`.get_connection`).
+        window_size : int
+            Number of packets which may await replies at once.
+        calls : iterable of \
+                :py:class:`~rig.machine_control.scp_connection.scpcall`
+            Packets to send. The board number of each packet's destination is
+            given as the packet's `p` (and `x` and `y` are 0).
+        """
+        connection.send_scp_burst(self._receive_length, window_size, calls)
+
+    def get_connection(self, cabinet, frame, board):
+        """Get the connection which best matches the specified coordinates,
+        preferring direct connections to a board when available.
+
+        Returns
+        -------
+        :py:class:`~rig.machine_control.scp_connection.SCPConnection`
+            One of the connections in :py:attr:`.connections`.
+        """
         connection = self.connections.get((cabinet, frame, board), None)
         if connection is None:
             connection = self.connections.get((cabinet, frame), None)
@@ -161,16 +191,18 @@ class BMPController(ContextMixin):
             "No connection available to ({}, {}, {})".format(cabinet,
                                                              frame,
                                                              board)
+        return connection
 
-        # Determine the size of packet we expect in return, this is usually the
-        # size that we are informed we should expect by SCAMP/SARK or else is
-        # the default.
+    @property
+    def _receive_length(self):
+        """The size of packet we expect in return, this is usually the size
+        that we are informed we should expect by SCAMP/SARK or else is the
+        default.
+        """
         if self._scp_data_length is None:
-            length = consts.SCP_SVER_RECEIVE_LENGTH_MAX
+            return consts.SCP_SVER_RECEIVE_LENGTH_MAX
         else:
-            length = self._scp_data_length
-
-        return connection.send_scp(length, 0, 0, board, *args, **kwargs)
+            return self._scp_data_length
 
     @ContextMixin.use_contextual_arguments()
     def get_software_version(self, cabinet, frame, board):
@@ -250,6 +282,65 @@ class BMPController(ContextMixin):
         if state:
             time.sleep(post_power_on_delay)
 
+    def set_power_many(self, state, boards=None, delay=0.0,
+                       post_power_on_delay=5.0):
+        """Control power to boards in many frames concurrently.
+
+        A power command is sent to every frame at once (via the BMP
+        connections in :py:attr:`.connections`) and, when powering on, the
+        post-power-on delay is waited only once for all frames.
+
+        Parameters
+        ----------
+        state : bool
+            True for power on, False for power off.
+        boards : iterable of (cabinet, frame, board) or None
+            The boards to control the power of. If None, all boards to which
+            a connection exists are controlled: every board in frames with a
+            (cabinet, frame) connection and otherwise just the boards with a
+            (cabinet, frame, board) connection.
+        delay : float
+            Number of seconds delay between power state changes of different
+            boards within a frame.
+        post_power_on_delay : float
+            Number of seconds for this command to block once the power on
+            commands have been carried out (see :py:meth:`.set_power`).
+
+        Returns
+        -------
+        {(cabinet, frame): float, ...}
+            The number of seconds taken for the power command to be carried
+            out by each frame (excluding the post-power-on delay).
+        """
+        # {(cabinet, frame): [board, ...], ...}
+        frames = collections.OrderedDict()
+        if boards is None:
+            for coord in sorted(self.connections):
+                frame_boards = frames.setdefault(coord[:2], [])
+                if len(coord) == 2:
+                    # NB: Each frame contains up to 24 boards
+                    frame_boards[:] = range(24)
+                elif coord[2] not in frame_boards:
+                    frame_boards.append(coord[2])
+        else:
+            for cabinet, frame, board in boards:
+                frames.setdefault((cabinet, frame), []).append(board)
+
+        def set_frame_power(cabinet, frame, frame_boards):
+            before = time.time()
+            self.set_power(state, cabinet, frame, frame_boards, delay=delay,
+                           post_power_on_delay=0.0)
+            return time.time() - before
+
+        durations = run_concurrently(
+            functools.partial(set_frame_power, cabinet, frame, frame_boards)
+            for (cabinet, frame), frame_boards in iteritems(frames))
+
+        if state:
+            time.sleep(post_power_on_delay)
+
+        return dict(zip(frames, durations))
+
     @ContextMixin.use_contextual_arguments()
     def set_led(self, led, action=None,
                 cabinet=Required, frame=Required, board=Required):
@@ -361,31 +452,46 @@ class BMPController(ContextMixin):
         """
         response = self._send_scp(cabinet, frame, board, SCPCommands.bmp_info,
                                   arg1=BMPInfoType.adc, expected_args=0)
-        data = struct.unpack("<"   # Little-endian
-                             "8H"  # uint16_t adc[8]
-                             "4h"  # int16_t t_int[4]
-                             "4h"  # int16_t t_ext[4]
-                             "4h"  # int16_t fan[4]
-                             "I"   # uint32_t warning
-                             "I",  # uint32_t shutdown
-                             response.data)
-
-        return ADCInfo(
-            voltage_1_2c=data[1] * BMP_V_SCALE_2_5,
-            voltage_1_2b=data[2] * BMP_V_SCALE_2_5,
-            voltage_1_2a=data[3] * BMP_V_SCALE_2_5,
-            voltage_1_8=data[4] * BMP_V_SCALE_2_5,
-            voltage_3_3=data[6] * BMP_V_SCALE_3_3,
-            voltage_supply=data[7] * BMP_V_SCALE_12,
-            temp_top=float(data[8]) * BMP_TEMP_SCALE,
-            temp_btm=float(data[9]) * BMP_TEMP_SCALE,
-            temp_ext_0=((float(data[12]) * BMP_TEMP_SCALE)
-                        if data[12] != BMP_MISSING_TEMP else None),
-            temp_ext_1=((float(data[13]) * BMP_TEMP_SCALE)
-                        if data[13] != BMP_MISSING_TEMP else None),
-            fan_0=float(data[16]) if data[16] != BMP_MISSING_FAN else None,
-            fan_1=float(data[17]) if data[17] != BMP_MISSING_FAN else None,
-        )
+        return unpack_adc_info(response.data)
+
+
+def unpack_adc_info(data):
+    """Unpack the response to an ADC :py:attr:`~.SCPCommands.bmp_info` request.
+
+    Parameters
+    ----------
+    data : bytes
+        The data field of the response packet.
+
+    Returns
+    -------
+    :py:class:`.ADCInfo`
+    """
+    data = struct.unpack("<"   # Little-endian
+                         "8H"  # uint16_t adc[8]
+                         "4h"  # int16_t t_int[4]
+                         "4h"  # int16_t t_ext[4]
+                         "4h"  # int16_t fan[4]
+                         "I"   # uint32_t warning
+                         "I",  # uint32_t shutdown
+                         data)
+
+    return ADCInfo(
+        voltage_1_2c=data[1] * BMP_V_SCALE_2_5,
+        voltage_1_2b=data[2] * BMP_V_SCALE_2_5,
+        voltage_1_2a=data[3] * BMP_V_SCALE_2_5,
+        voltage_1_8=data[4] * BMP_V_SCALE_2_5,
+        voltage_3_3=data[6] * BMP_V_SCALE_3_3,
+        voltage_supply=data[7] * BMP_V_SCALE_12,
+        temp_top=float(data[8]) * BMP_TEMP_SCALE,
+        temp_btm=float(data[9]) * BMP_TEMP_SCALE,
+        temp_ext_0=((float(data[12]) * BMP_TEMP_SCALE)
+                    if data[12] != BMP_MISSING_TEMP else None),
+        temp_ext_1=((float(data[13]) * BMP_TEMP_SCALE)
+                    if data[13] != BMP_MISSING_TEMP else None),
+        fan_0=float(data[16]) if data[16] != BMP_MISSING_FAN else None,
+        fan_1=float(data[17]) if data[17] != BMP_MISSING_FAN else None,
+    )
 
 
 class BMPInfo(collections.namedtuple(
@@ -0,0 +1,440 @@
+"""Sample BMP telemetry (voltages, temperatures, fans) from many boards.
+
+:py:meth:`~rig.machine_control.BMPController.read_adc` reads the sensors of a
+single board and waits for the reply before returning. When monitoring the
+boards in many frames, sampling each board in turn leaves long gaps between
+samples. :py:class:`.BMPTelemetrySampler` instead sends a pipelined burst of
+requests to the boards reached via each connection, bursting through every
+connection concurrently, and records the timestamped samples in a fixed-size
+:py:class:`.TelemetryBuffer`.
+"""
+
+import collections
+import functools
+import struct
+import threading
+import time
+
+import numpy as np
+
+from rig.machine_control.bmp_controller import ADCInfo, unpack_adc_info
+
+from rig.machine_control.consts import SCPCommands, BMPInfoType
+
+from rig.machine_control.packets import SCPPacket
+
+from rig.machine_control.scp_connection import scpcall
+
+from rig.utils.parallel import run_concurrently
+
+
+def telemetry_dtype(n_fpga_registers=0):
+    """Get the numpy dtype of the records produced by
+    :py:class:`.BMPTelemetrySampler`.
+
+    Each record has the fields:
+
+    ``time`` (float64)
+        The time (as given by :py:func:`time.time`) at which the sample was
+        taken.
+    ``cabinet``, ``frame``, ``board`` (uint8)
+        The board sampled.
+    ``voltage_1_2c``, ..., ``fan_1`` (float32)
+        The fields of :py:class:`~rig.machine_control.bmp_controller.ADCInfo`.
+        Values which are None (e.g. disconnected sensors) are recorded as
+        NaN.
+    ``fpga`` (uint32 array, only if ``n_fpga_registers`` > 0)
+        The values of the FPGA registers sampled.
+
+    Parameters
+    ----------
+    n_fpga_registers : int
+        The number of FPGA register values included in each record.
+    """
+    fields = [("time", np.float64),
+              ("cabinet", np.uint8),
+              ("frame", np.uint8),
+              ("board", np.uint8)]
+    fields.extend((field, np.float32) for field in ADCInfo._fields)
+    if n_fpga_registers:
+        fields.append(("fpga", np.uint32, (n_fpga_registers, )))
+    return np.dtype(fields)
+
+
+class TelemetryBuffer(object):
+    """A fixed-capacity ring buffer of telemetry records.
+
+    Records are stored in a single preallocated numpy structured array (see
+    :py:func:`.telemetry_dtype`). Once the buffer is full, the oldest records
+    are overwritten.
+    """
+
+    def __init__(self, capacity, n_fpga_registers=0):
+        """
+        Parameters
+        ----------
+        capacity : int
+            The maximum number of records to retain.
+        n_fpga_registers : int
+            The number of FPGA register values included in each record.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.capacity = capacity
+        self.dtype = telemetry_dtype(n_fpga_registers)
+
+        self._data = np.zeros(capacity, dtype=self.dtype)
+
+        # The index at which the next record will be written and the total
+        # number of records ever appended.
+        self._next = 0
+        self._n_appended = 0
+
+        # Appending and exporting may occur in different threads
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """The number of records currently held in the buffer."""
+        return min(self._n_appended, self.capacity)
+
+    @property
+    def n_overwritten(self):
+        """The number of records which have been discarded to make room for
+        newer records."""
+        return max(0, self._n_appended - self.capacity)
+
+    def append(self, records):
+        """Append records to the buffer.
+
+        Parameters
+        ----------
+        records : :py:class:`numpy.ndarray`
+            An array of records with this buffer's dtype.
+        """
+        records = np.asarray(records, dtype=self.dtype)
+
+        # If more records are given than fit, only the newest are kept
+        n_skipped = max(0, len(records) - self.capacity)
+        kept = records[n_skipped:]
+
+        with self._lock:
+            start = (self._next + n_skipped) % self.capacity
+            first = min(len(kept), self.capacity - start)
+            self._data[start:start + first] = kept[:first]
+            self._data[:len(kept) - first] = kept[first:]
+
+            self._next = (start + len(kept)) % self.capacity
+            self._n_appended += len(records)
+
+    def to_array(self):
+        """Get a copy of the records in the buffer, oldest first.
+
+        Returns
+        -------
+        :py:class:`numpy.ndarray`
+            A structured array (see :py:func:`.telemetry_dtype`).
+        """
+        with self._lock:
+            if self._n_appended < self.capacity:
+                return self._data[:self._next].copy()
+            else:
+                return np.concatenate((self._data[self._next:],
+                                       self._data[:self._next]))
+
+    def save(self, file):
+        """Save the records in the buffer (oldest first) in numpy's ``.npy``
+        format.
+
+        The records may be loaded again using :py:func:`numpy.load`.
+
+        Parameters
+        ----------
+        file : str or file
+            The filename or file-like object to write to.
+        """
+        np.save(file, self.to_array())
+
+
+class BMPTelemetrySampler(object):
+    """Periodically sample the ADCs (and optionally FPGA registers) of many
+    boards concurrently.
+
+    For example, to sample every board in every frame the BMPController is
+    connected to once per second::
+
+        >>> sampler = BMPTelemetrySampler(bc)  # doctest: +SKIP
+        >>> sampler.start(interval=1.0)  # doctest: +SKIP
+        >>> # ...
+        >>> sampler.stop()  # doctest: +SKIP
+        >>> samples = sampler.buffer.to_array()  # doctest: +SKIP
+        >>> hottest = np.argmax(samples["temp_top"])  # doctest: +SKIP
+
+    Boards are sampled concurrently when they are reached via different
+    connections (i.e. boards in different frames, or boards with their own
+    entry in :py:attr:`~rig.machine_control.BMPController.connections`).
+    The requests to boards sharing a connection are pipelined in a single
+    burst.
+
+    Boards which fail to respond when first sampled (e.g. empty slots in a
+    frame), or which fail to respond to `max_failures` consecutive samples
+    (e.g. boards which have been removed or powered down), are assumed to be
+    absent, are recorded in :py:attr:`.absent_boards` and are not sampled
+    again.
+    """
+
+    def __init__(self, bc, boards=None, fpga_registers=(), capacity=100000,
+                 window_size=4, max_failures=3):
+        """
+        Parameters
+        ----------
+        bc : :py:class:`~rig.machine_control.BMPController`
+            The controller to use to communicate with the BMPs.
+        boards : iterable of (cabinet, frame, board) or None
+            The boards to sample. If None, all 24 boards in every frame (and
+            any individual boards) to which the controller has a connection
+            are sampled.
+        fpga_registers : [(fpga_num, addr), ...]
+            FPGA registers (see
+            :py:meth:`~rig.machine_control.BMPController.read_fpga_reg`) to
+            read from each board along with its ADCs.
+        capacity : int
+            The number of records to retain in :py:attr:`.buffer`.
+        window_size : int
+            The number of requests sent via each connection which may await
+            replies at once.
+        max_failures : int
+            The number of consecutive samples a board which has previously
+            responded may fail before it is assumed to be absent.
+        """
+        self._bc = bc
+        self.fpga_registers = list(fpga_registers)
+        self.window_size = window_size
+        self.max_failures = max_failures
+
+        if boards is None:
+            boards = set()
+            for coord in bc.connections:
+                if len(coord) == 3:
+                    boards.add(coord)
+                else:
+                    # NB: Each frame contains up to 24 boards
+                    boards.update(coord + (board, ) for board in range(24))
+        self.boards = sorted(boards)
+
+        self.buffer = TelemetryBuffer(capacity, len(self.fpga_registers))
+
+        # The number of board samples which failed
+        self.n_errors = 0
+
+        # Boards which are assumed to be absent and those which have
+        # responded at least once (and have not since been found absent).
+        self.absent_boards = set()
+        self._present_boards = set()
+
+        # {(cabinet, frame, board): n, ...} The number of consecutive samples
+        # of each present board which have failed.
+        self._n_failures = collections.defaultdict(int)
+
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _group_boards(self):
+        """Group the (non-absent) boards to be sampled by the connection used
+        to reach them.
+
+        Returns
+        -------
+        [(connection, [(cabinet, frame, board), ...]), ...]
+        """
+        # {id(connection): (connection, [board, ...]), ...}
+        groups = collections.OrderedDict()
+        for cabinet, frame, board in self.boards:
+            if (cabinet, frame, board) in self.absent_boards:
+                continue
+            connection = self._bc.get_connection(cabinet, frame, board)
+            groups.setdefault(id(connection), (connection, []))[1].append(
+                (cabinet, frame, board))
+        return list(groups.values())
+
+    def _make_record(self, cabinet, frame, board, timestamp, adc, fpga):
+        """Build a record tuple from the values sampled from a board."""
+        record = (timestamp, cabinet, frame, board)
+        record += tuple(np.nan if value is None else value for value in adc)
+        if self.fpga_registers:
+            record += (fpga, )
+        return record
+
+    def _sample_board(self, cabinet, frame, board):
+        """Sample a single board, waiting for each reply in turn.
+
+        Returns
+        -------
+        record or None
+            A record tuple or None if the board could not be sampled.
+        """
+        try:
+            timestamp = time.time()
+            adc = self._bc.read_adc(cabinet, frame, board)
+            fpga = [self._bc.read_fpga_reg(fpga_num, addr,
+                                           cabinet, frame, board)
+                    for fpga_num, addr in self.fpga_registers]
+        except IOError:
+            # NB: Includes SCP and socket errors. A single unresponsive
+            # board should not prevent the others being monitored.
+            return None
+        return self._make_record(cabinet, frame, board, timestamp, adc, fpga)
+
+    def _sample_burst(self, connection, boards):
+        """Sample many boards reached via a single connection using a single
+        burst of pipelined requests.
+
+        Returns
+        -------
+        {(cabinet, frame, board): record, ...}
+
+        Raises
+        ------
+        IOError
+            If any board fails to respond.
+        """
+        timestamps = {}
+        adcs = {}
+        fpgas = {xyz: [None] * len(self.fpga_registers) for xyz in boards}
+
+        def adc_callback(xyz, ack):
+            timestamps[xyz] = time.time()
+            adcs[xyz] = unpack_adc_info(
+                SCPPacket.from_bytestring(ack, n_args=0).data)
+
+        def fpga_callback(xyz, i, ack):
+            fpgas[xyz][i] = struct.unpack(
+                "<I", SCPPacket.from_bytestring(ack, n_args=0).data)[0]
+
+        calls = []
+        for xyz in boards:
+            board = xyz[2]
+            calls.append(scpcall(
+                0, 0, board, SCPCommands.bmp_info, arg1=BMPInfoType.adc,
+                callback=functools.partial(adc_callback, xyz)))
+            # NB: As BMPController.read_fpga_reg
+            for i, (fpga_num, addr) in enumerate(self.fpga_registers):
+                calls.append(scpcall(
+                    0, 0, board, SCPCommands.link_read,
+                    arg1=addr & (~0x3), arg2=4, arg3=fpga_num,
+                    callback=functools.partial(fpga_callback, xyz, i)))
+        self._bc.send_scp_burst(connection, self.window_size, calls)
+
+        return {xyz: self._make_record(*xyz, timestamp=timestamps[xyz],
+                                       adc=adcs[xyz], fpga=fpgas[xyz])
+                for xyz in boards}
+
+    def _sample_boards(self, connection, boards):
+        """Sample a series of boards reached via a single connection.
+
+        Boards sampled for the first time are probed individually: those
+        which fail to respond are added to :py:attr:`.absent_boards`. The
+        remaining boards are sampled with a single burst of requests and are
+        added to :py:attr:`.absent_boards` if they fail to respond to
+        :py:attr:`.max_failures` consecutive samples.
+
+        Returns
+        -------
+        [record or None, ...]
+            A record tuple for each board or None if it could not be sampled.
+        """
+        records = {}
+        present_boards = []
+        for xyz in boards:
+            if xyz in self._present_boards:
+                present_boards.append(xyz)
+                continue
+            records[xyz] = self._sample_board(*xyz)
+            if records[xyz] is None:
+                self.absent_boards.add(xyz)
+            else:
+                self._present_boards.add(xyz)
+
+        if present_boards:
+            try:
+                records.update(self._sample_burst(connection, present_boards))
+            except IOError:
+                # A single unresponsive board aborts the whole burst so fall
+                # back on sampling each board individually.
+                for xyz in present_boards:
+                    records[xyz] = self._sample_board(*xyz)
+
+            for xyz in present_boards:
+                if records[xyz] is not None:
+                    self._n_failures.pop(xyz, None)
+                    continue
+                self._n_failures[xyz] += 1
+                if self._n_failures[xyz] >= self.max_failures:
+                    del self._n_failures[xyz]
+                    self._present_boards.discard(xyz)
+                    self.absent_boards.add(xyz)
+
+        return [records[xyz] for xyz in boards]
+
+    def sample(self):
+        """Sample every board once and append the records to
+        :py:attr:`.buffer`.
+
+        Boards which fail to respond are skipped and counted in
+        :py:attr:`.n_errors`. Boards in :py:attr:`.absent_boards` are not
+        sampled.
+
+        Returns
+        -------
+        :py:class:`numpy.ndarray`
+            The records sampled (see :py:func:`.telemetry_dtype`).
+        """
+        records = []
+        for group_records in run_concurrently(
+                functools.partial(self._sample_boards, connection, boards)
+                for connection, boards in self._group_boards()):
+            records.extend(group_records)
+
+        n_errors = sum(1 for record in records if record is None)
+        self.n_errors += n_errors
+
+        records = np.array([r for r in records if r is not None],
+                           dtype=self.buffer.dtype)
+        self.buffer.append(records)
+        return records
+
+    def start(self, interval=1.0):
+        """Start a background thread which calls :py:meth:`.sample`
+        periodically.
+
+        Parameters
+        ----------
+        interval : float
+            Number of seconds between the start of each round of sampling. If
+            sampling takes longer than this, the next round begins
+            immediately.
+        """
+        if self._thread is not None:
+            raise RuntimeError("Sampler already running.")
+
+        def run():
+            next_sample = time.time()
+            while True:
+                self.sample()
+                # NB: If sampling overran, the missed rounds are skipped
+                next_sample = max(next_sample + interval, time.time())
+                if self._stop.wait(next_sample - time.time()):
+                    break
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background sampling started by :py:meth:`.start`, if
+        running."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
@@ -62,7 +62,7 @@ spin5_boot_options = {
 def boot(hostname, boot_port=consts.BOOT_PORT,
          scamp_binary=None, sark_struct=None,
          boot_delay=0.05, post_boot_delay=2.0,
-         sv_overrides=dict(), **kwargs):
+         sv_overrides=dict(), fast=False, **kwargs):
     """Boot a SpiNNaker machine of the given size.
 
     Parameters
@@ -86,6 +86,13 @@ def boot(hostname, boot_port=consts.BOOT_PORT,
     sv_overrides : {name: value, ...}
         Values used to override the defaults in the 'sv' struct defined in the
         struct file.
+    fast : bool
+        If True, `post_boot_delay` is ignored: this function returns as soon
+        as the last boot packet has been sent (boot packets are still sent
+        `boot_delay` seconds apart). The caller is then responsible for
+        waiting for the machine to become ready, e.g. as
+        :py:meth:`~rig.machine_control.MachineController.boot` does when its
+        `fast` argument is True.
 
     Notes
     -----
@@ -159,7 +166,8 @@ def boot(hostname, boot_port=consts.BOOT_PORT,
 
     # Close the socket and give time to boot
     sock.close()
-    time.sleep(post_boot_delay)
+    if not fast:
+        time.sleep(post_boot_delay)
 
     return structs
 
@@ -184,12 +192,11 @@ def boot_packet(sock, cmd, arg1=0, arg2=0, arg3=0, data=b""):
     header = struct.pack("!H4I", PROTOCOL_VERSION, cmd, arg1, arg2, arg3)
 
     assert len(data) % 4 == 0  # Data should always be word-sized
-    fdata = b""
 
     # Format the data from little- to network-/big-endian
-    while len(data) > 0:
-        word, data = (data[:4], data[4:])
-        fdata += struct.pack("!I", struct.unpack("<I", word)[0])
+    n_words = len(data) // 4
+    fdata = struct.pack("!{}I".format(n_words),
+                        *struct.unpack("<{}I".format(n_words), data))
 
     # Transmit the packet
     sock.send(header + fdata)
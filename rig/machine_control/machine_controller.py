@@ -4,27 +4,35 @@ import collections
 import functools
 import os
 import six
-from six import iteritems
+from six import iteritems, itervalues
 import socket
 import struct
+import threading
 import time
 import pkg_resources
 import warnings
 
+import numpy as np
+
 from rig.machine_control.consts import \
     SCPCommands, NNCommands, NNConstants, AppFlags, LEDAction
 from rig.machine_control import boot, consts, regions, struct_file
-from rig.machine_control.scp_connection import SCPConnection, SCPError
+from rig.machine_control.scp_connection import \
+    SCPConnection, SCPError, scpcall, read_scpcalls, write_scpcalls
+from rig.machine_control.scp_connection import TimeoutError as SCPTimeoutError
 from rig.machine_control.common import unpack_sver_response_version
+from rig.machine_control.packets import SCPPacket
 
 from rig import routing_table
 
 from rig.links import Links
 
-from rig.geometry import spinn5_eth_coords, spinn5_local_eth_coord
+from rig.geometry import spinn5_eth_coords, spinn5_local_eth_coord, \
+    shortest_mesh_path_length, shortest_torus_path_length
 
 from rig.utils.contexts import ContextMixin, Required
 from rig.utils.docstrings import add_signature_to_docstring
+from rig.utils.parallel import run_concurrently
 
 
 class MachineController(ContextMixin):
@@ -114,6 +122,7 @@ class MachineController(ContextMixin):
         self._scp_data_length = None
         self._window_size = None
         self._root_chip = None
+        self._packet_limit = None
 
         # Load default structs if none provided
         self.structs = structs
@@ -132,11 +141,28 @@ class MachineController(ContextMixin):
         }
 
         # The dimensions of the system. This is set by discover_connections()
-        # and is used by _get_connection to determine which of the above
+        # and is used by get_connection to determine which of the above
         # connections to use.
         self._width = None
         self._height = None
 
+        # A cache of the nearest connections to each chip for use when a
+        # chip's local Ethernet connection is not available (see
+        # _get_nearest_connections). The cache is invalidated whenever
+        # _connections_version is incremented (see _connections_changed).
+        self._connections_version = 0
+        self._nearest_connections_cache_key = None
+        self._nearest_connections_cache = {}
+
+        # The number of consecutive health checks each connection has failed
+        # (see check_connections).
+        self._degraded_connections = frozenset()
+        self._connection_failures = collections.defaultdict(int)
+
+        # Background health-checking thread (see start_health_checks())
+        self._health_check_thread = None
+        self._stop_health_checks = threading.Event()
+
     def __call__(self, **context_args):
         """For use with `with`: set default argument values.
 
@@ -147,6 +173,11 @@ class MachineController(ContextMixin):
         """
         return self.get_new_context(**context_args)
 
+    def close(self):
+        """Close all connections to the machine."""
+        for connection in set(itervalues(self.connections)):
+            connection.close()
+
     @property
     def scp_data_length(self):
         """The maximum SCP data field length supported by the machine
@@ -169,6 +200,24 @@ class MachineController(ContextMixin):
             return 1
         return self._window_size
 
+    @property
+    def packet_limit(self):
+        """An optional limit on the number of SCP packets awaiting
+        acknowledgement, or None.
+
+        A :py:class:`~rig.machine_control.scp_connection.PacketLimit` may be
+        shared between many controllers to bound the total number of packets
+        in flight to many machines. Setting this property applies the limit
+        to all current (and future) connections to the machine.
+        """
+        return self._packet_limit
+
+    @packet_limit.setter
+    def packet_limit(self, packet_limit):
+        self._packet_limit = packet_limit
+        for connection in itervalues(self.connections):
+            connection.packet_limit = packet_limit
+
     @property
     def root_chip(self):
         """The coordinates (x, y) of the chip used to boot the machine."""
@@ -177,6 +226,38 @@ class MachineController(ContextMixin):
             self._root_chip = self.get_software_version(255, 255, 0).position
         return self._root_chip
 
+    @property
+    def degraded_connections(self):
+        """The keys (into :py:attr:`.connections`) of connections which have
+        been marked as degraded by :py:meth:`.check_connections` and which
+        are avoided where possible.
+        """
+        return self._degraded_connections
+
+    @degraded_connections.setter
+    def degraded_connections(self, degraded_connections):
+        # NB: The set is replaced (rather than modified) so that it may be
+        # safely read from other threads at any time.
+        self._degraded_connections = frozenset(degraded_connections)
+        self._connections_changed()
+
+    def _connections_changed(self):
+        """Invalidate the cache of nearest connections.
+
+        Must be called whenever :py:attr:`.connections` is modified.
+        """
+        self._connections_version += 1
+
+    @property
+    def connections_version(self):
+        """A number which changes whenever :py:attr:`.connections` or
+        :py:attr:`.degraded_connections` are changed.
+
+        This may be used to determine when information derived from the
+        connections must be recomputed.
+        """
+        return self._connections_version
+
     @ContextMixin.use_contextual_arguments(
         x=Required, y=Required, p=Required)
     def send_scp(self, *args, **kwargs):
@@ -204,24 +285,104 @@ class MachineController(ContextMixin):
         p = kwargs.pop("p")
         return self._send_scp(x, y, p, *args, **kwargs)
 
-    def _get_connection(self, x, y):
-        """Get the appropriate connection for a chip."""
+    def get_local_ethernet_chip(self, x, y):
+        """Get the coordinates of the Ethernet connected chip on the same
+        board as a chip.
+
+        Returns
+        -------
+        (x, y) or None
+            The Ethernet connected chip or None if the machine's dimensions
+            are not yet known (see :py:meth:`.discover_connections`).
+        """
         if (self._width is None or self._height is None or
                 self._root_chip is None):
-            return self.connections[None]
+            return None
         else:
+            return spinn5_local_eth_coord(x, y, self._width, self._height,
+                                          *self._root_chip)
+
+    def get_connection(self, x, y):
+        """Get the connection used to communicate with a chip.
+
+        The connection to the Ethernet chip on the same board as the chip is
+        used where available. Otherwise, the nearest (in hops) available
+        connection is chosen, with ties broken in favour of the connection
+        with the fewest outstanding packets.
+
+        Returns
+        -------
+        :py:class:`~rig.machine_control.scp_connection.SCPConnection`
+            One of the connections in :py:attr:`.connections`.
+        """
+        eth_chip = self.get_local_ethernet_chip(x, y)
+        if eth_chip is not None and eth_chip not in self.degraded_connections:
             # If possible, use the local Ethernet connected chip
-            eth_chip = spinn5_local_eth_coord(x, y, self._width, self._height,
-                                              *self._root_chip)
             conn = self.connections.get(eth_chip)
             if conn is not None:
                 return conn
+
+        candidates = self._get_nearest_connections(x, y)
+        if len(candidates) == 1:
+            return self.connections[candidates[0]]
+        else:
+            # NB: Connections which do not report their load (e.g. those
+            # substituted in tests) are assumed to be idle.
+            return min(
+                (self.connections[key] for key in candidates),
+                key=lambda conn: getattr(conn, "n_outstanding", 0))
+
+    def _get_nearest_connections(self, x, y):
+        """Get the keys of the nearest non-degraded connections to a chip.
+
+        The results are cached until the machine dimensions change or
+        :py:meth:`._connections_changed` is called.
+
+        Returns
+        -------
+        [key, ...]
+            The keys (into :py:attr:`.connections`) of the equally nearest
+            connections to the chip. If no connection's location is known
+            (or all are degraded), the initial connection (key None) is
+            returned.
+        """
+        # Invalidate the cache if anything it depends on has changed
+        cache_key = (self._width, self._height, self._root_chip,
+                     self._connections_version)
+        if cache_key != self._nearest_connections_cache_key:
+            self._nearest_connections_cache_key = cache_key
+            self._nearest_connections_cache = {}
+
+        candidates = self._nearest_connections_cache.get((x, y))
+        if candidates is None:
+            live = [key for key in self.connections
+                    if key is not None and
+                    key not in self.degraded_connections]
+            if self._width is None or not live:
+                # No connections with known locations: use the initial
+                # connection unless degraded in which case any will do.
+                if None not in self.degraded_connections or not live:
+                    candidates = [None]
+                else:
+                    candidates = live
             else:
-                # If no connection was available to the local board, choose
-                # another arbitrarily.
-                # XXX: This choice will cause lots of contention in systems
-                # with many missing Ethernet connections.
-                return self.connections[None]
+                # The wrap-around links of SpiNN-5 machines are only present
+                # in systems built from multiples of three boards.
+                if self._width % 12 == 0 and self._height % 12 == 0:
+                    def distance(key):
+                        return shortest_torus_path_length(
+                            (x, y, 0), key + (0, ), self._width, self._height)
+                else:
+                    def distance(key):
+                        return shortest_mesh_path_length(
+                            (x, y, 0), key + (0, ))
+                distances = dict((key, distance(key)) for key in live)
+                nearest = min(itervalues(distances))
+                candidates = [key for key in live
+                              if distances[key] == nearest]
+            self._nearest_connections_cache[(x, y)] = candidates
+
+        return candidates
 
     def _send_scp(self, x, y, p, *args, **kwargs):
         """Determine the best connection to use to send an SCP packet and use
@@ -242,11 +403,41 @@ class MachineController(ContextMixin):
         else:
             length = self._scp_data_length
 
-        connection = self._get_connection(x, y)
+        connection = self.get_connection(x, y)
         return connection.send_scp(length, x, y, p, *args, **kwargs)
 
+    def _send_scp_bursts(self, calls):
+        """Transmit many SCP packets, each via the connection best suited to
+        its destination, bursting through every connection concurrently.
+
+        Parameters
+        ----------
+        calls : iterable of \
+                :py:class:`~rig.machine_control.scp_connection.scpcall`
+            Packets to send. The callback of each packet is called (from an
+            arbitrary thread) with its acknowledgement.
+        """
+        # Determine the size of packet we expect in return (see _send_scp)
+        if self._scp_data_length is None:
+            length = consts.SCP_SVER_RECEIVE_LENGTH_MAX
+        else:
+            length = self._scp_data_length
+        window_size = self.scp_window_size
+
+        # Group the packets by the connection they will be sent through
+        bursts = collections.OrderedDict()
+        for call in calls:
+            connection = self.get_connection(call.x, call.y)
+            bursts.setdefault(connection, []).append(call)
+
+        run_concurrently(
+            functools.partial(connection.send_scp_burst,
+                              length, window_size, connection_calls)
+            for connection, connection_calls in iteritems(bursts))
+
     def boot(self, width=None, height=None,
-             only_if_needed=True, check_booted=True, **boot_kwargs):
+             only_if_needed=True, check_booted=True, fast=False,
+             boot_timeout=10.0, **boot_kwargs):
         """Boot a SpiNNaker machine.
 
         The system will be booted from the Ethernet connected chip whose
@@ -302,6 +493,22 @@ class MachineController(ContextMixin):
             fully booted before returning. If False, this check is skipped and
             the function returns as soon as the machine's Ethernet interface is
             likely to be up (but not necessarily before booting has completed).
+        fast : bool
+            If False (the default), boot packets are sent with fixed delays
+            between them and a fixed delay is allowed for the machine's
+            Ethernet interface to come up (see ``boot_delay`` and
+            ``post_boot_delay``).
+
+            If True, rather than waiting a fixed time after sending the boot
+            packets (``post_boot_delay`` is ignored), the machine is polled
+            until it reports (via the ``p2p_up`` and ``p2p_active`` fields of
+            the ``sv`` struct) that its P2P network has been configured.
+            Boot packets are still sent ``boot_delay`` seconds apart. Since
+            this waits for the machine to be booted, ``check_booted`` must be
+            True.
+        boot_timeout : float
+            When ``fast`` is True, the maximum number of seconds to wait for
+            the machine to become ready after sending the boot packets.
         sv_overrides : {name: value, ...}
             Additional arguments used to override the default values in the
             'sv' struct defined in the struct file.
@@ -318,6 +525,8 @@ class MachineController(ContextMixin):
             Raised when ``check_booted`` is True and the boot process was
             unable to boot the machine. Also raised when ``only_if_needed`` is
             True and the remote host is a BMP.
+        ValueError
+            If ``fast`` is True and ``check_booted`` is False.
 
         Notes
         -----
@@ -335,6 +544,10 @@ class MachineController(ContextMixin):
             warnings.warn("Machine width and height are no longer needed when "
                           "booting a machine.", DeprecationWarning)
 
+        if fast and not check_booted:
+            raise ValueError("fast boot always checks the machine has booted: "
+                             "check_booted must be True")
+
         # Check to see if the machine is already booted first
         if only_if_needed:
             # We create a new MachineController which fails quickly if it
@@ -356,11 +569,15 @@ class MachineController(ContextMixin):
 
         # Actually boot the machine
         boot_kwargs.setdefault("boot_port", self.boot_port)
+        if fast:
+            boot_kwargs["fast"] = True
         self.structs = boot.boot(self.initial_host, **boot_kwargs)
         assert len(self.structs) > 0
 
         # Wait for the machine to completely boot
-        if check_booted:
+        if fast:
+            self._wait_for_p2p_network(boot_timeout)
+        elif check_booted:
             try:
                 p2p_address = (255, 255)
                 while p2p_address == (255, 255):
@@ -375,8 +592,49 @@ class MachineController(ContextMixin):
         # The machine was sent boot commands
         return True
 
+    def _wait_for_p2p_network(self, timeout, poll_interval=0.05):
+        """Poll a freshly booted machine until its P2P network is configured.
+
+        The machine is considered ready once the root chip's ``sv`` struct
+        reports that P2P addressing is up and the number of active P2P
+        addresses has stopped changing between polls.
+
+        Raises
+        ------
+        SpiNNakerBootError
+            If the machine does not become ready before the timeout.
+        """
+        deadline = time.time() + timeout
+
+        # The machine won't respond at all until the Ethernet interface comes
+        # up so a separate controller which fails quickly is used.
+        quick_fail_mc = MachineController(self.initial_host, self.scp_port,
+                                          n_tries=1, timeout=poll_interval,
+                                          structs=self.structs)
+        try:
+            last_p2p_active = None
+            while True:
+                try:
+                    if quick_fail_mc.read_struct_field("sv", "p2p_up",
+                                                       255, 255):
+                        p2p_active = quick_fail_mc.read_struct_field(
+                            "sv", "p2p_active", 255, 255)
+                        if p2p_active > 0 and p2p_active == last_p2p_active:
+                            return
+                        last_p2p_active = p2p_active
+                except SCPError:
+                    # Not yet responding
+                    pass
+
+                if time.time() >= deadline:
+                    raise SpiNNakerBootError(
+                        "The remote machine could not be booted.")
+                time.sleep(poll_interval)
+        finally:
+            quick_fail_mc.connections[None].close()
+
     @ContextMixin.use_contextual_arguments()
-    def discover_connections(self, x=255, y=255):
+    def discover_connections(self, x=255, y=255, timeout=None):
         """Attempt to discover all available Ethernet connections to a machine.
 
         After calling this method, :py:class:`.MachineController` will attempt
@@ -386,6 +644,9 @@ class MachineController(ContextMixin):
         If called multiple times, existing connections will be retained in
         preference to new ones.
 
+        All boards are probed concurrently so that unresponsive boards delay
+        discovery by (at most) a single timeout.
+
         .. note::
             The system must be booted for this command to succeed.
 
@@ -399,6 +660,11 @@ class MachineController(ContextMixin):
         y : int
             (Optional) The coordinates of the chip to initially use to query
             the system for the set of live chips.
+        timeout : float or None
+            (Optional) The maximum number of seconds to spend probing boards.
+            Boards whose connections have not been established before this
+            deadline are skipped. If None, every board is given the usual
+            number of attempts to respond.
 
         Returns
         -------
@@ -412,32 +678,161 @@ class MachineController(ContextMixin):
         self._width = max(x for x, y in working_chips) + 1
         self._height = max(y for x, y in working_chips) + 1
 
-        num_new_connections = 0
+        candidates = [
+            (x, y) for x, y in spinn5_eth_coords(self._width, self._height,
+                                                 *self.root_chip)
+            if (x, y) in working_chips and (x, y) not in self.connections]
 
-        for x, y in spinn5_eth_coords(self._width, self._height,
-                                      *self.root_chip):
-            if (x, y) in working_chips and (x, y) not in self.connections:
-                # Discover the chip's IP address
-                try:
-                    ip = self.get_ip_address(x, y)
-                except SCPError:
-                    continue
+        # Connections established before the deadline are recorded in
+        # `established`. Connections established after the deadline are
+        # closed. The lock ensures every connection is one or the other.
+        lock = threading.Lock()
+        established = {}
+        abandoned = [False]
+
+        def probe(x, y):
+            # Discover the chip's IP address
+            try:
+                ip = self.get_ip_address(x, y)
+            except SCPError:
+                return
+            if ip is None:
+                return
+
+            # Create a connection to the IP and attempt to use it (discarding
+            # it if it doesn't work)
+            connection = SCPConnection(ip, self.scp_port,
+                                       self.n_tries, self.timeout)
+            connection.packet_limit = self._packet_limit
+            try:
+                self._ping_connection(connection, x, y)
+            except SCPError:
+                connection.close()
+                return
+            with lock:
+                if not abandoned[0]:
+                    established[(x, y)] = connection
+                    return
+            connection.close()
+
+        run_concurrently(
+            (functools.partial(probe, x, y) for x, y in candidates),
+            timeout=timeout)
+        with lock:
+            abandoned[0] = True
+
+        # NB: Added in the order the boards were probed
+        for xy in candidates:
+            if xy in established:
+                self.connections[xy] = established[xy]
+        self._connections_changed()
+
+        return len(established)
+
+    def _ping_connection(self, connection, x=255, y=255):
+        """Check that a chip responds to an SCP packet sent via a specific
+        connection.
+
+        Raises
+        ------
+        :py:class:`~rig.machine_control.scp_connection.SCPError`
+            If the chip does not respond correctly.
+        """
+        connection.send_scp(consts.SCP_SVER_RECEIVE_LENGTH_MAX,
+                            x, y, 0, SCPCommands.sver)
+
+    def check_connections(self, max_failures=3):
+        """Check the health of every connection to the machine.
+
+        Every connection (see :py:meth:`.discover_connections`) is checked
+        concurrently. Connections which fail to respond in `max_failures`
+        consecutive checks are marked as degraded and are avoided when
+        choosing a connection through which to communicate with a chip. A
+        degraded connection is restored as soon as it passes a check.
+
+        See also :py:meth:`.start_health_checks` which calls this method
+        periodically.
+
+        Parameters
+        ----------
+        max_failures : int
+            The number of consecutive failed checks after which a connection
+            is considered degraded.
+
+        Returns
+        -------
+        frozenset
+            The set of degraded connections, identified by the coordinates of
+            the Ethernet chip they are connected to (or None for the
+            connection to the initial host). This is also available as
+            :py:attr:`.degraded_connections`.
+        """
+        connections = list(iteritems(self.connections))
+
+        def check(xy, connection):
+            try:
+                if xy is None:
+                    self._ping_connection(connection)
+                else:
+                    self._ping_connection(connection, *xy)
+                return True
+            except SCPTimeoutError:
+                return False
+            except SCPError:
+                # The chip responded (albeit with an error) so the connection
+                # is working.
+                return True
+            except socket.error:
+                return False
 
-                if ip is not None:
-                    # Create a connection to the IP
-                    self.connections[(x, y)] = \
-                        SCPConnection(ip, self.scp_port,
-                                      self.n_tries, self.timeout)
+        results = run_concurrently(
+            functools.partial(check, xy, connection)
+            for xy, connection in connections)
 
-                    # Attempt to use the connection (and remove it if it
-                    # doesn't work)
-                    try:
-                        self.get_software_version(x, y, 0)
-                        num_new_connections += 1
-                    except SCPError:
-                        self.connections.pop((x, y)).close()
+        degraded_connections = set(self.degraded_connections)
+        for (xy, _), ok in zip(connections, results):
+            if ok:
+                self._connection_failures.pop(xy, None)
+                degraded_connections.discard(xy)
+            else:
+                self._connection_failures[xy] += 1
+                if self._connection_failures[xy] >= max_failures:
+                    degraded_connections.add(xy)
 
-        return num_new_connections
+        if degraded_connections != self.degraded_connections:
+            self.degraded_connections = degraded_connections
+        return self.degraded_connections
+
+    def start_health_checks(self, interval=10.0, max_failures=3):
+        """Start a background thread which periodically calls
+        :py:meth:`.check_connections`.
+
+        Parameters
+        ----------
+        interval : float
+            Number of seconds between checks.
+        max_failures : int
+            See :py:meth:`.check_connections`.
+        """
+        if self._health_check_thread is not None:
+            raise RuntimeError("Health checks already running.")
+
+        def run():
+            while not self._stop_health_checks.wait(interval):
+                self.check_connections(max_failures)
+
+        self._stop_health_checks.clear()
+        self._health_check_thread = threading.Thread(target=run)
+        self._health_check_thread.daemon = True
+        self._health_check_thread.start()
+
+    def stop_health_checks(self):
+        """Stop the background health checks started by
+        :py:meth:`.start_health_checks`, if running."""
+        if self._health_check_thread is not None:
+            self._stop_health_checks.set()
+            self._health_check_thread.join()
+            self._health_check_thread = None
 
     @ContextMixin.use_contextual_arguments()
     def application(self, app_id):
@@ -519,7 +914,7 @@ class MachineController(ContextMixin):
             sequence of SCP write commands.
         """
         # Call the SCPConnection to perform the write on our behalf
-        connection = self._get_connection(x, y)
+        connection = self.get_connection(x, y)
         return connection.write(self.scp_data_length, self.scp_window_size,
                                 x, y, p, address, data)
 
@@ -541,10 +936,66 @@ class MachineController(ContextMixin):
             The data is read back from memory as a bytestring.
         """
         # Call the SCPConnection to perform the read on our behalf
-        connection = self._get_connection(x, y)
+        connection = self.get_connection(x, y)
         return connection.read(self.scp_data_length, self.scp_window_size,
                                x, y, p, address, length_bytes)
 
+    def read_many(self, reads):
+        """Read many blocks of memory, potentially from many chips, at once.
+
+        Unlike making repeated calls to :py:meth:`.read`, the reads are
+        performed as a single burst of SCP packets through each connection
+        to the machine. When several connections are available (see
+        :py:meth:`.discover_connections`), reads via different connections
+        are performed concurrently.
+
+        For example, to read the first 8 bytes of SDRAM on two chips::
+
+            >>> data_0, data_1 = mc.read_many([  # doctest: +SKIP
+            ...     (0, 0, 0, 0x60000000, 8),
+            ...     (4, 8, 0, 0x60000000, 8),
+            ... ])
+
+        Parameters
+        ----------
+        reads : [(x, y, p, address, length_bytes), ...]
+            The blocks of memory to read.
+
+        Returns
+        -------
+        [:py:class:`bytes`, ...]
+            The data read from each block, in the order the blocks were given.
+        """
+        buffer_size = self.scp_data_length
+        reads = list(reads)
+        buffers = [bytearray(length) for (_, _, _, _, length) in reads]
+
+        self._send_scp_bursts(
+            call
+            for (x, y, p, address, _), buf in zip(reads, buffers)
+            for call in read_scpcalls(buffer_size, x, y, p, address,
+                                      memoryview(buf)))
+
+        return [bytes(buf) for buf in buffers]
+
+    def write_many(self, writes):
+        """Write many bytestrings, potentially to many chips, at once.
+
+        This is the writing counterpart of :py:meth:`.read_many`: all writes
+        are performed as a single burst of SCP packets through each connection
+        and writes via different connections are performed concurrently.
+
+        Parameters
+        ----------
+        writes : [(x, y, p, address, data), ...]
+            The address to write each bytestring to.
+        """
+        buffer_size = self.scp_data_length
+        self._send_scp_bursts(
+            call
+            for (x, y, p, address, data) in writes
+            for call in write_scpcalls(buffer_size, x, y, p, address, data))
+
     @ContextMixin.use_contextual_arguments()
     def write_across_link(self, address, data, x, y, link):
         """Write a bytestring to an address in memory on a neigbouring chip.
@@ -1042,6 +1493,63 @@ class MachineController(ContextMixin):
             # We can perform a fill, this will call `sark_word_set` internally.
             self._send_scp(x, y, p, SCPCommands.fill, address, data, size)
 
+    def fill_many(self, fills):
+        """Fill many regions of memory, potentially on many chips, at once.
+
+        Adjacent and overlapping regions on the same chip which are to be
+        filled with the same value are merged and filled with a single
+        command. The fills are then sent as a single burst of SCP packets
+        through each connection to the machine, with bursts via different
+        connections performed concurrently (see :py:meth:`.write_many`).
+
+        For example, to clear the SDRAM allocated to many cores::
+
+            >>> mc.fill_many([  # doctest: +SKIP
+            ...     (0, 0, 0, 0x60000000, 0, 1024),
+            ...     (0, 0, 0, 0x60000400, 0, 512),
+            ...     (4, 8, 0, 0x60000000, 0, 100),
+            ... ])
+
+        Parameters
+        ----------
+        fills : [(x, y, p, address, data, size), ...]
+            The regions of memory to fill. Unlike :py:meth:`.fill`, `data` is
+            always a byte. Regions need not be word aligned: any unaligned
+            bytes at the start or end of a region are written using
+            :py:attr:`~.consts.SCPCommands.write` packets in the same burst.
+
+        Notes
+        -----
+        Overlapping regions on the same chip which are to be filled with
+        different values are filled in an arbitrary order.
+        """
+        buffer_size = self.scp_data_length
+        calls = []
+        for x, y, p, address, data, size in _coalesce_fills(fills):
+            end = address + size
+
+            # Write any bytes before the first word boundary
+            aligned_start = min(end, (address + 3) & ~3)
+            if aligned_start > address:
+                calls.extend(write_scpcalls(
+                    buffer_size, x, y, p, address,
+                    struct.pack("<B", data) * (aligned_start - address)))
+
+            # Fill whole words in one command (using `sark_word_set`)
+            aligned_end = max(aligned_start, end & ~3)
+            if aligned_end > aligned_start:
+                calls.append(scpcall(x, y, p, SCPCommands.fill,
+                                     aligned_start, data * 0x01010101,
+                                     aligned_end - aligned_start))
+
+            # Write any bytes after the last word boundary
+            if end > aligned_end:
+                calls.extend(write_scpcalls(
+                    buffer_size, x, y, p, aligned_end,
+                    struct.pack("<B", data) * (end - aligned_end)))
+
+        self._send_scp_bursts(calls)
+
     @ContextMixin.use_contextual_arguments()
     def sdram_alloc(self, size, tag=0, x=Required, y=Required,
                     app_id=Required, clear=False):
@@ -1306,6 +1814,12 @@ class MachineController(ContextMixin):
         wait : bool (Default: True)
             Should the application await the AppSignal.start signal after it
             has been loaded?
+        optimise_regions : bool (Default: False)
+            If True, spend extra (host) time minimising the number of
+            flood-fill core select packets which must be sent (see
+            :py:func:`~rig.machine_control.regions.compress_flood_fill_regions`).
+            This is most effective when many applications' cores are
+            interleaved on the same chips.
         """
         # Coerce the arguments into a single form.  If there are two arguments
         # then assume that we have filename and a map of chips and cores;
@@ -1330,6 +1844,7 @@ class MachineController(ContextMixin):
         flags = 0x0000
         if kwargs.pop("wait"):
             flags |= AppFlags.wait
+        optimise_regions = kwargs.pop("optimise_regions", False)
 
         # The forward and retry parameters
         fr = NNConstants.forward << 8 | NNConstants.retry
@@ -1340,7 +1855,8 @@ class MachineController(ContextMixin):
             # load the APLX. The regions and cores should be sorted into
             # ascending order, `compress_flood_fill_regions` ensures this is
             # done.
-            fills = regions.compress_flood_fill_regions(targets)
+            fills = regions.compress_flood_fill_regions(
+                targets, optimise=optimise_regions)
 
             # Load the APLX data
             with open(aplx, "rb") as f:
@@ -1403,6 +1919,10 @@ class MachineController(ContextMixin):
             to represent _all_ the cores that will be loaded and a faster
             method to determine whether all applications have been loaded
             correctly will be used. If False a fallback method will be used.
+        optimise_regions : bool
+            If True, minimise the number of flood-fill core select packets
+            sent when loading (see :py:meth:`.flood_fill_aplx`). Defaults to
+            False.
 
         Raises
         ------
@@ -1416,6 +1936,7 @@ class MachineController(ContextMixin):
         n_tries = kwargs.pop("n_tries")
         app_start_delay = kwargs.pop("app_start_delay")
         use_count = kwargs.pop("use_count", True)
+        optimise_regions = kwargs.pop("optimise_regions", False)
 
         # Coerce the arguments into a single form.  If there are two arguments
         # then assume that we have filename and a map of chips and cores;
@@ -1449,7 +1970,8 @@ class MachineController(ContextMixin):
 
             # Load all unloaded applications, then pause to ensure they reach
             # the wait state
-            self.flood_fill_aplx(unloaded, app_id=app_id, wait=True)
+            self.flood_fill_aplx(unloaded, app_id=app_id, wait=True,
+                                 optimise_regions=optimise_regions)
             time.sleep(app_start_delay)
 
             # If running in "fast" mode then check that the correct number of
@@ -1660,7 +2182,8 @@ class MachineController(ContextMixin):
             Map of chip co-ordinates to routing table entries, as produced, for
             example by
             :py:func:`~rig.routing_table.routing_tree_to_tables` and
-            :py:func:`~rig.routing_table.minimise_tables`.
+            :py:func:`~rig.routing_table.minimise_tables`. Tables may also be
+            given as :py:class:`~rig.routing_table.RoutingTable`\ s.
 
         Raises
         ------
@@ -1683,7 +2206,8 @@ class MachineController(ContextMixin):
         Parameters
         ----------
         entries : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
-            List of :py:class:`rig.routing_table.RoutingTableEntry`\ s.
+            List of :py:class:`rig.routing_table.RoutingTableEntry`\ s (or a
+            :py:class:`rig.routing_table.RoutingTable`).
 
         Raises
         ------
@@ -1706,15 +2230,7 @@ class MachineController(ContextMixin):
         buf = self.read_struct_field("sv", "sdram_sys", x, y)
 
         # Build the data to write in, then perform the write
-        data = bytearray(16 * len(entries))
-        for i, entry in enumerate(entries):
-            # Build the route as a 32-bit value
-            route = 0x00000000
-            for r in entry.route:
-                route |= 1 << r
-
-            struct.pack_into(consts.RTE_PACK_STRING, data, i*16,
-                             i, 0, route, entry.key, entry.mask)
+        data = pack_routing_table_entries(entries)
         self.write(buf, data, x, y)
 
         # Perform the load of the data into the router
@@ -1724,6 +2240,177 @@ class MachineController(ContextMixin):
             buf, rtr_base
         )
 
+    @ContextMixin.use_contextual_arguments()
+    def update_routing_tables(self, routing_tables, app_id,
+                              loaded_tables=None):
+        """Load multicast routing tables, reprogramming only those chips whose
+        tables differ from the tables already loaded.
+
+        For each chip whose table has changed, the entries previously loaded
+        for the application are removed and the new table loaded. The tables
+        of all changed chips are loaded together in a small number of bursts
+        of SCP packets rather than one chip at a time, with chips reached via
+        different connections being programmed concurrently.
+
+        For example, after tweaking part of a network, only the chips whose
+        tables were affected are reprogrammed::
+
+            >>> mc.load_routing_tables(tables, app_id=66)  # doctest: +SKIP
+            >>> # ... modify the network, producing new_tables ...
+            >>> mc.update_routing_tables(  # doctest: +SKIP
+            ...     new_tables, app_id=66, loaded_tables=tables)
+
+        Parameters
+        ----------
+        routing_tables : {(x, y): \
+                          [:py:class:`~rig.routing_table.RoutingTableEntry`\
+                           (...), ...], ...}
+            Map of chip co-ordinates to the routing table entries which should
+            be loaded, as accepted by :py:meth:`.load_routing_tables`.
+        loaded_tables : {(x, y): \
+                         [:py:class:`~rig.routing_table.RoutingTableEntry`\
+                          (...), ...], ...} or None
+            The routing tables currently loaded for the application, e.g. the
+            tables most recently passed to :py:meth:`.load_routing_tables`.
+            Chips in this map but not in ``routing_tables`` have their entries
+            removed. If None, the tables of the chips in ``routing_tables``
+            are read back from the machine (see
+            :py:meth:`.get_many_routing_table_entries`) and compared against
+            the entries loaded for the application (other chips are left
+            unchanged).
+
+        Returns
+        -------
+        set([(x, y), ...])
+            The chips which were reprogrammed.
+
+        Raises
+        ------
+        rig.machine_control.machine_controller.SpiNNakerRouterError
+            If it is not possible to allocate sufficient routing table
+            entries. In this case, the application's entries have been
+            removed from *all* of the chips being reprogrammed (including
+            those whose new tables would have fitted) and no new tables have
+            been loaded: the tables previously loaded must be loaded again to
+            restore them.
+        """
+        # Routing table entries are compared by their route, key and mask (the
+        # only fields loaded into the machine).
+        if loaded_tables is None:
+            # NB: Entries read back from the machine need not be in the order
+            # they were loaded (e.g. if they were loaded in several
+            # allocations) so tables are compared as multisets of entries.
+            def comparable(entries):
+                return collections.Counter(
+                    (frozenset(e.route), e.key, e.mask) for e in entries)
+
+            # {(x, y): Counter({(route, key, mask): n, ...}), ...}
+            current = {
+                chip: comparable(entry
+                                 for entry, entry_app_id, _
+                                 in filter(None, entries)
+                                 if entry_app_id == app_id)
+                for chip, entries in iteritems(
+                    self.get_many_routing_table_entries(routing_tables))
+            }
+        else:
+            def comparable(entries):
+                return [(frozenset(e.route), e.key, e.mask) for e in entries]
+
+            # {(x, y): [(route, key, mask), ...], ...}
+            current = {chip: comparable(entries)
+                       for chip, entries in iteritems(loaded_tables)}
+
+        # Determine the chips whose tables must change
+        changed = {chip: table for chip, table in iteritems(routing_tables)
+                   if comparable(table) != current.get(chip, comparable([]))}
+        changed.update((chip, []) for chip, entries in iteritems(current)
+                       if entries and chip not in routing_tables)
+
+        self._load_many_routing_tables(changed, app_id)
+
+        return set(changed)
+
+    def _load_many_routing_tables(self, routing_tables, app_id):
+        """Replace the routing table entries of an application on many chips
+        using bursts of SCP packets.
+
+        Parameters
+        ----------
+        routing_tables : {(x, y): [RoutingTableEntry, ...], ...}
+            The tables to load. Any entries previously loaded for the
+            application on these chips are removed first. Empty tables just
+            remove the existing entries.
+
+        Raises
+        ------
+        SpiNNakerRouterError
+            If the entries of any table cannot be allocated. Any entries which
+            were allocated on other chips are freed again before this is
+            raised so that, on every chip, the application is left with no
+            entries (rather than some chips having allocated but unloaded
+            entries).
+        """
+        # Remove existing entries (as clear_routing_table_entries)
+        def free_entries(chips):
+            self._send_scp_bursts(
+                scpcall(x, y, 0, SCPCommands.alloc_free,
+                        (app_id << 8) |
+                        consts.AllocOperations.free_rtr_by_app,
+                        0x1)
+                for x, y in chips)
+        free_entries(routing_tables)
+
+        routing_tables = {chip: table
+                          for chip, table in iteritems(routing_tables)
+                          if table}
+        if not routing_tables:
+            return
+
+        # Allocate space for each table in the router and determine where the
+        # table is to be written in memory (as load_routing_table_entries).
+        # {(x, y): index of first allocated entry or 0 if failed, ...}
+        rtr_bases = {}
+        # {(x, y): bytearray containing sdram_sys, ...}
+        bufs = {}
+
+        def alloc_callback(chip, packet):
+            rtr_bases[chip] = \
+                SCPPacket.from_bytestring(packet, n_args=1).arg1
+
+        field, sdram_sys_addr, pack_chars = \
+            self._get_struct_field_and_address("sv", "sdram_sys")
+        calls = []
+        for (x, y), table in iteritems(routing_tables):
+            calls.append(scpcall(
+                x, y, 0, SCPCommands.alloc_free,
+                (app_id << 8) | consts.AllocOperations.alloc_rtr, len(table),
+                callback=functools.partial(alloc_callback, (x, y))))
+            buf = bufs[(x, y)] = bytearray(struct.calcsize(pack_chars))
+            calls.extend(read_scpcalls(self.scp_data_length, x, y, 0,
+                                       sdram_sys_addr, memoryview(buf)))
+        self._send_scp_bursts(calls)
+
+        for (x, y), table in iteritems(routing_tables):
+            if rtr_bases[(x, y)] == 0:
+                free_entries(routing_tables)
+                raise SpiNNakerRouterError(len(table), x, y)
+        bufs = {chip: struct.unpack(pack_chars, bytes(buf))[0]
+                for chip, buf in iteritems(bufs)}
+
+        # Write the tables into memory
+        self.write_many((x, y, 0, bufs[(x, y)],
+                         pack_routing_table_entries(table))
+                        for (x, y), table in iteritems(routing_tables))
+
+        # Load the tables into the routers
+        self._send_scp_bursts(
+            scpcall(x, y, 0, SCPCommands.router,
+                    (len(table) << 16) | (app_id << 8) |
+                    consts.RouterOperations.load,
+                    bufs[(x, y)], rtr_bases[(x, y)])
+            for (x, y), table in iteritems(routing_tables))
+
     @ContextMixin.use_contextual_arguments()
     def get_routing_table_entries(self, x, y):
         """Dump the multicast routing table of a given chip.
@@ -1740,12 +2427,50 @@ class MachineController(ContextMixin):
         read_size = struct.calcsize(consts.RTE_PACK_STRING)
         rtr_data = self.read(rtr_addr, consts.RTR_ENTRIES * read_size, x, y)
 
-        # Read each routing table entry in turn
-        table = list()
-        while len(rtr_data) > 0:
-            entry, rtr_data = rtr_data[:read_size], rtr_data[read_size:]
-            table.append(unpack_routing_table_entry(entry))
-        return table
+        return unpack_routing_table_entries(rtr_data)
+
+    def get_many_routing_table_entries(self, chips):
+        """Dump the multicast routing tables of many chips at once.
+
+        The tables are read using :py:meth:`.read_many` and so are read from
+        chips reached via different connections concurrently.
+
+        For example, to dump the routing tables of every working chip in the
+        machine::
+
+            >>> tables = mc.get_many_routing_table_entries(  # doctest: +SKIP
+            ...     mc.get_system_info())
+
+        Parameters
+        ----------
+        chips : iterable of (x, y)
+            The chips whose routing tables should be dumped.
+
+        Returns
+        -------
+        {(x, y): [(:py:class:`~rig.routing_table.RoutingTableEntry`, app_id, \
+                   core) or None, ...], ...}
+            For each chip, the ordered list of routing table entries as
+            returned by :py:meth:`.get_routing_table_entries`.
+        """
+        chips = list(chips)
+
+        # Determine where to read from on each chip
+        field, address, pack_chars = \
+            self._get_struct_field_and_address("sv", "rtr_copy")
+        rtr_addrs = [
+            struct.unpack(pack_chars, data)[0] for data in self.read_many(
+                (x, y, 0, address, struct.calcsize(pack_chars))
+                for x, y in chips)]
+
+        # Read every table
+        read_size = struct.calcsize(consts.RTE_PACK_STRING)
+        rtr_datas = self.read_many(
+            (x, y, 0, rtr_addr, consts.RTR_ENTRIES * read_size)
+            for (x, y), rtr_addr in zip(chips, rtr_addrs))
+
+        return {chip: unpack_routing_table_entries(rtr_data)
+                for chip, rtr_data in zip(chips, rtr_datas)}
 
     @ContextMixin.use_contextual_arguments()
     def clear_routing_table_entries(self, x, y, app_id):
@@ -2702,6 +3427,24 @@ class SlicedMemoryIO(object):
         """
         return self._offset + self._start_address
 
+    @property
+    def x(self):
+        """The x co-ordinate of the chip whose memory is accessed."""
+        return self._parent._x
+
+    @property
+    def y(self):
+        """The y co-ordinate of the chip whose memory is accessed."""
+        return self._parent._y
+
+    @property
+    def start_address(self):
+        """The hardware memory address of the start of the region of memory
+        accessed (unlike :py:attr:`.address`, this does not change when
+        seeking).
+        """
+        return self._start_address
+
     @_if_not_closed
     def seek(self, n_bytes, from_what=os.SEEK_SET):
         """Seek to a new position in the memory region.
@@ -2835,6 +3578,79 @@ class TruncationWarning(RuntimeWarning):
     """
 
 
+def _coalesce_fills(fills):
+    """For internal use. Merge adjacent and overlapping regions of memory on
+    the same chip which are to be filled with the same value.
+
+    Parameters
+    ----------
+    fills : [(x, y, p, address, data, size), ...]
+
+    Returns
+    -------
+    [(x, y, p, address, data, size), ...]
+        The merged regions, sorted by chip, value and address. Empty regions
+        are removed. Each merged region is filled via the processor given for
+        the first of the regions it was formed from.
+    """
+    merged = []
+    for x, y, p, address, data, size in sorted(
+            (fill for fill in fills if fill[5] > 0),
+            key=lambda f: (f[0], f[1], f[4], f[3])):
+        if merged:
+            last_x, last_y, last_p, last_address, last_data, last_size = \
+                merged[-1]
+            last_end = last_address + last_size
+            if ((x, y, data) == (last_x, last_y, last_data) and
+                    address <= last_end):
+                merged[-1] = (last_x, last_y, last_p, last_address, data,
+                              max(last_end, address + size) - last_address)
+                continue
+        merged.append((x, y, p, address, data, size))
+    return merged
+
+
+_RTE_DTYPE = np.dtype([("next", "<u2"), ("free", "<u2"), ("route", "<u4"),
+                       ("key", "<u4"), ("mask", "<u4")])
+"""NumPy equivalent of :py:data:`~rig.machine_control.consts.RTE_PACK_STRING`.
+"""
+
+
+def pack_routing_table_entries(entries):
+    """Pack routing table entries into the form loaded into a SpiNNaker
+    machine's router.
+
+    Parameters
+    ----------
+    entries : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...] or \
+            :py:class:`~rig.routing_table.RoutingTable`
+
+    Returns
+    -------
+    :py:class:`bytearray`
+        The packed entries.
+    """
+    if isinstance(entries, routing_table.RoutingTable):
+        # Pack all entries at once
+        packed = np.zeros(len(entries), dtype=_RTE_DTYPE)
+        packed["next"] = np.arange(len(entries))
+        packed["route"] = entries.routes
+        packed["key"] = entries.keys
+        packed["mask"] = entries.masks
+        return bytearray(packed.tobytes())
+
+    data = bytearray(16 * len(entries))
+    for i, entry in enumerate(entries):
+        # Build the route as a 32-bit value
+        route = 0x00000000
+        for r in entry.route:
+            route |= 1 << r
+
+        struct.pack_into(consts.RTE_PACK_STRING, data, i*16,
+                         i, 0, route, entry.key, entry.mask)
+    return data
+
+
 def unpack_routing_table_entry(packed):
     """Unpack a routing table entry read from a SpiNNaker machine.
 
@@ -2848,7 +3664,9 @@ def unpack_routing_table_entry(packed):
     (:py:class:`~rig.routing_table.RoutingTableEntry`, app_id, core) or None
         Tuple containing the routing entry, the app_id associated with the
         entry and the core number associated with the entry; or None if the
-        routing table entry is flagged as unused.
+        routing table entry is flagged as unused. As with any
+        :py:class:`~rig.routing_table.RoutingTableEntry`, the entry's route
+        is a :py:class:`frozenset`.
     """
     # Unpack the routing table entry
     _, free, route, key, mask = struct.unpack(consts.RTE_PACK_STRING, packed)
@@ -2867,3 +3685,65 @@ def unpack_routing_table_entry(packed):
     core = (free >> 8) & 0x0f
 
     return (rte, app_id, core)
+
+
+# The Routes represented by each possible value of each of the (lower) three
+# bytes of a route bit-field.
+# [(Routes, ...) * 256] * 3
+_routes_by_byte = [
+    [tuple(r for r in routing_table.Routes if (value << (8 * byte)) >> r & 1)
+     for value in range(256)]
+    for byte in range(3)
+]
+
+
+def unpack_routing_table_entries(packed):
+    """Unpack many consecutive routing table entries read from a SpiNNaker
+    machine.
+
+    This is equivalent to (but much faster than) calling
+    :py:func:`.unpack_routing_table_entry` on each entry in turn.
+
+    Parameters
+    ----------
+    packed : :py:class:`bytes`
+        Bytes containing packed routing table entries.
+
+    Returns
+    -------
+    [(:py:class:`~rig.routing_table.RoutingTableEntry`, app_id, core) or None,\
+     ...]
+        For each entry, as returned by :py:func:`.unpack_routing_table_entry`.
+        Entries with the same route share a single (immutable)
+        :py:class:`frozenset` of routes.
+    """
+    entries = np.frombuffer(packed, dtype=_RTE_DTYPE)
+    table = [None] * len(entries)
+
+    # If the top 8 bits of the route are set then an entry is not in use.
+    in_use = np.flatnonzero((entries["route"] & 0xff000000) != 0xff000000)
+    entries = entries[in_use]
+
+    # Many entries typically share the same route: convert each distinct
+    # route into a set of Routes only once.
+    # {route: frozenset([Routes, ...]), ...}
+    route_sets = {}
+    routes_0, routes_1, routes_2 = _routes_by_byte
+
+    for i, route, key, mask, app_id, core in zip(
+            in_use.tolist(),
+            entries["route"].tolist(),
+            entries["key"].tolist(),
+            entries["mask"].tolist(),
+            (entries["free"] & 0xff).tolist(),
+            ((entries["free"] >> 8) & 0x0f).tolist()):
+        routes = route_sets.get(route)
+        if routes is None:
+            routes = route_sets[route] = frozenset(
+                routes_0[route & 0xff] +
+                routes_1[(route >> 8) & 0xff] +
+                routes_2[(route >> 16) & 0xff])
+        table[i] = (routing_table.RoutingTableEntry(routes, key, mask),
+                    app_id, core)
+
+    return table
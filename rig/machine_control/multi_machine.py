@@ -0,0 +1,246 @@
+"""Utilities for controlling many independent SpiNNaker machines at once.
+
+Operations such as booting a machine spend most of their time waiting for the
+hardware. When many separate machines must be brought up (e.g. a cabinet of
+single-board test machines), performing these operations on every machine
+concurrently takes little longer than doing so for a single machine.
+
+:py:class:`.MachineSession` goes further, running operations on many machines
+using a shared, bounded, pool of threads and limiting the total number of
+packets in flight to all machines.
+"""
+
+import collections
+import functools
+import time
+
+from six import itervalues
+
+from rig.machine_control.machine_controller import \
+    MachineController, SpiNNakerBootError
+from rig.machine_control.scp_connection import PacketLimit
+
+from rig.utils.parallel import run_concurrently, ThreadPool
+
+
+class BootResult(collections.namedtuple("BootResult",
+                                        "booted, duration, error")):
+    """The outcome of booting a single machine with :py:func:`.boot_machines`.
+
+    Parameters
+    ----------
+    booted : bool
+        True if the machine was sent boot commands, False if it was already
+        booted (or failed to boot).
+    duration : float
+        The number of seconds taken to boot the machine (or to determine that
+        it was already booted, or to fail).
+    error : :py:exc:`IOError` or :py:exc:`.SpiNNakerBootError` or None
+        If booting the machine failed, the exception raised, otherwise None.
+    """
+
+
+def boot_machines(hostnames, **boot_kwargs):
+    """Boot many SpiNNaker machines concurrently.
+
+    For example::
+
+        >>> results = boot_machines(["board1", "board2"],  # doctest: +SKIP
+        ...                         **spin5_boot_options)
+        >>> for hostname, result in results.items():  # doctest: +SKIP
+        ...     print("{}: {:.1f}s".format(hostname, result.duration))
+
+    Failures to boot one machine do not prevent the others from being booted.
+    Controllers created for machines given by hostname are closed once the
+    machine has been booted.
+
+    Parameters
+    ----------
+    hostnames : iterable of str or \
+            :py:class:`~rig.machine_control.MachineController`
+        The machines to boot, given either as hostnames or as controllers.
+    **boot_kwargs
+        Arguments to pass to
+        :py:meth:`~rig.machine_control.MachineController.boot` for each
+        machine.
+
+    Returns
+    -------
+    {hostname: :py:class:`.BootResult`, ...}
+        The outcome of booting each machine, keyed by hostname (or by
+        controller, if controllers were given).
+    """
+    hostnames = list(hostnames)
+
+    def boot_machine(hostname):
+        before = time.time()
+        try:
+            if isinstance(hostname, MachineController):
+                booted = hostname.boot(**boot_kwargs)
+            else:
+                mc = MachineController(hostname)
+                try:
+                    booted = mc.boot(**boot_kwargs)
+                finally:
+                    mc.close()
+            return BootResult(booted, time.time() - before, None)
+        except (IOError, SpiNNakerBootError) as e:
+            # Reported in the result (rather than raised) so that failures do
+            # not hide the outcome of booting the other machines. NB: IOError
+            # includes SCP and socket errors.
+            return BootResult(False, time.time() - before, e)
+
+    return collections.OrderedDict(zip(hostnames, run_concurrently(
+        functools.partial(boot_machine, hostname) for hostname in hostnames)))
+
+
+class MachineSession(object):
+    """Run blocking operations on many machines using a shared pool of
+    threads.
+
+    Each machine is controlled by its own
+    :py:class:`~rig.machine_control.MachineController` whose methods are
+    called by a fixed number of worker threads shared by all machines.
+    Methods are called via a proxy returned by indexing the session by
+    machine name, which returns a :py:class:`~rig.utils.parallel.Future` for
+    the result::
+
+        >>> with MachineSession(max_workers=4) as session:  # doctest: +SKIP
+        ...     for hostname in ["job1-board", "job2-board"]:
+        ...         session.add_machine(hostname)
+        ...     infos = {name: session[name].get_system_info()
+        ...              for name in session.machines}
+        ...     for name, info in infos.items():
+        ...         print(name, len(info.result()))
+
+    .. warning::
+        Operations submitted for the same machine may run concurrently.
+        Contexts (e.g. ``with mc(app_id=...)``) should not be changed while
+        operations are in progress; supply all arguments explicitly instead.
+    """
+
+    def __init__(self, max_workers=8, max_outstanding_packets=None):
+        """
+        Parameters
+        ----------
+        max_workers : int
+            The number of threads used to run operations on all machines.
+        max_outstanding_packets : int or None
+            If not None, the maximum number of SCP packets which may be
+            awaiting acknowledgement from all machines at once (see
+            :py:class:`~rig.machine_control.scp_connection.PacketLimit`).
+        """
+        # {name: MachineController, ...}
+        self.machines = collections.OrderedDict()
+
+        if max_outstanding_packets is None:
+            self.packet_limit = None
+        else:
+            self.packet_limit = PacketLimit(max_outstanding_packets)
+
+        self._pool = ThreadPool(max_workers)
+
+    def add_machine(self, name, controller=None, **kwargs):
+        """Add a machine to the session.
+
+        Parameters
+        ----------
+        name : str
+            The name of the machine. If no controller is given, this is the
+            hostname of the machine.
+        controller : :py:class:`~rig.machine_control.MachineController` \
+                or None
+            The controller to use. If None, a new controller is created.
+        **kwargs
+            Arguments for the
+            :py:class:`~rig.machine_control.MachineController` constructor
+            (if no controller is given).
+
+        Returns
+        -------
+        :py:class:`~rig.machine_control.MachineController`
+            The controller for the machine.
+        """
+        if name in self.machines:
+            raise ValueError("A machine named {!r} already exists.".format(
+                name))
+        if controller is None:
+            controller = MachineController(name, **kwargs)
+        if self.packet_limit is not None:
+            controller.packet_limit = self.packet_limit
+        self.machines[name] = controller
+        return controller
+
+    def submit(self, name, method, *args, **kwargs):
+        """Call a method of a machine's controller using the shared pool of
+        threads.
+
+        Parameters
+        ----------
+        name : str
+            The name of the machine.
+        method : str or callable
+            The name of the
+            :py:class:`~rig.machine_control.MachineController` method to
+            call, or a function which will be called with the controller as
+            its first argument.
+        *args, **kwargs
+            Arguments for the method.
+
+        Returns
+        -------
+        :py:class:`~rig.utils.parallel.Future`
+            The eventual result of the call.
+        """
+        controller = self.machines[name]
+        if callable(method):
+            return self._pool.submit(method, controller, *args, **kwargs)
+        else:
+            return self._pool.submit(getattr(controller, method),
+                                     *args, **kwargs)
+
+    def __getitem__(self, name):
+        """Get a proxy for a machine's controller whose methods submit calls
+        to the pool and return futures.
+
+        For example, ``session["board1"].read(0x60000000, 4, 0, 0)`` returns
+        a future whose result is the data read.
+        """
+        if name not in self.machines:
+            raise KeyError(name)
+        return _MachineProxy(self, name)
+
+    def shutdown(self, wait=True, close=True):
+        """Stop the pool of threads once all submitted operations have been
+        performed.
+
+        Parameters
+        ----------
+        wait : bool
+            If True, block until all submitted operations have finished.
+        close : bool
+            If True (and wait is True), close the connections of all machines
+            in the session.
+        """
+        self._pool.shutdown(wait)
+        if wait and close:
+            for controller in itervalues(self.machines):
+                controller.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.shutdown()
+
+
+class _MachineProxy(object):
+    """For internal use. A proxy for a controller in a
+    :py:class:`.MachineSession` whose methods return futures."""
+
+    def __init__(self, session, name):
+        self._session = session
+        self._name = name
+
+    def __getattr__(self, method):
+        return functools.partial(self._session.submit, self._name, method)
@@ -0,0 +1,217 @@
+"""Stream data recorded by running applications out of SDRAM ring buffers.
+
+Applications which record more data than fits in SDRAM (or which simply wish to
+make data available to the host as soon as possible) may write their recordings
+into a ring buffer in SDRAM which the host drains while the application runs.
+:py:func:`.stream_recordings` polls many such buffers, potentially on many
+chips, fetching only newly recorded data and yielding it as it arrives.
+
+Recording buffer layout
+-----------------------
+
+Each recording buffer occupies a block of SDRAM, for example one allocated by
+:py:func:`~rig.machine_control.utils.sdram_alloc_for_vertices`. The block
+starts with a two-word header which is followed by the ring buffer itself::
+
+    Offset  Type      Field
+    ------  --------  ------------------------------------------------------
+    0       uint32_t  head: offset into the ring of the next byte to be
+                      written by the application.
+    4       uint32_t  tail: offset into the ring of the next byte to be read
+                      by the host.
+    8       uint8_t   ring[N - 8]: recorded data.
+
+The following conventions must be respected by applications:
+
+* The ``head`` pointer is only ever written by the application and the
+  ``tail`` pointer is only ever written by the host.
+* Both pointers are byte offsets into the ring and wrap around to zero at the
+  end of the ring.
+* The buffer is empty when ``head == tail``. To distinguish a full buffer from
+  an empty one, the application must never advance ``head`` such that it
+  becomes equal to ``tail``; at most ``N - 9`` bytes may be awaiting collection
+  by the host.
+* The application must finish writing recorded data into the ring before
+  advancing ``head`` past it.
+* Bytes between ``tail`` and ``head`` belong to the host and must not be
+  overwritten by the application. An application which finds its ring full
+  must either drop or delay its data.
+
+Both pointers must be zeroed before the application starts recording, e.g.
+using :py:func:`.init_recording_buffers`.
+
+For example, on the SpiNNaker side a single word may be recorded like so:
+
+.. code-block:: c
+
+    typedef struct {
+        volatile uint32_t head;
+        volatile uint32_t tail;
+        uint8_t ring[];
+    } recording_t;
+
+    bool record_word(recording_t *rec, uint32_t ring_size, uint32_t word)
+    {
+        uint32_t head = rec->head;
+        uint32_t next_head = (head + sizeof(uint32_t)) % ring_size;
+        if (next_head == rec->tail)
+            return false;  // Full!
+
+        // NB: Assumes ring_size is a multiple of 4
+        *((uint32_t *)&rec->ring[head]) = word;
+        rec->head = next_head;
+        return true;
+    }
+"""
+
+import struct
+import time
+
+import numpy as np
+
+from six import iteritems
+
+RECORDING_HEADER_LENGTH = 8
+"""The number of bytes at the start of a recording buffer occupied by the head
+and tail pointers."""
+
+
+def _get_buffer_locations(buffers):
+    """Get the location of each recording buffer.
+
+    Returns
+    -------
+    [(vertex, x, y, address, ring_size), ...]
+    """
+    locations = []
+    for vertex, mem in iteritems(buffers):
+        ring_size = len(mem) - RECORDING_HEADER_LENGTH
+        if ring_size <= 0:
+            raise ValueError(
+                "Recording buffers must be larger than {} bytes.".format(
+                    RECORDING_HEADER_LENGTH))
+        locations.append((vertex, mem.x, mem.y, mem.start_address, ring_size))
+    return locations
+
+
+def init_recording_buffers(controller, buffers):
+    """Reset the head and tail pointers of a set of recording buffers.
+
+    This should be called before the application which records into the
+    buffers is started.
+
+    Parameters
+    ----------
+    controller : :py:class:`~rig.machine_control.MachineController`
+        Controller to use to write to the buffers.
+    buffers : {vertex: :py:class:`~rig.machine_control.machine_controller.\
+MemoryIO`, ...}
+        The recording buffers, e.g. as produced by
+        :py:func:`~rig.machine_control.utils.sdram_alloc_for_vertices`.
+    """
+    controller.write_many(
+        (x, y, 0, address, struct.pack("<2I", 0, 0))
+        for _, x, y, address, _ in _get_buffer_locations(buffers))
+
+
+def stream_recordings(controller, buffers, stop=None, poll_interval=0.1,
+                      dtype=np.uint8):
+    """Continuously collect newly recorded data from a set of recording
+    buffers while an application runs.
+
+    Each time the buffers are polled, the head and tail pointers of every
+    buffer are read, any newly recorded data is fetched and the tail pointers
+    are advanced to free space for the application. Each of these three steps
+    is performed as a single burst of reads or writes (via
+    :py:meth:`~rig.machine_control.MachineController.read_many` and
+    :py:meth:`~rig.machine_control.MachineController.write_many`) across all
+    buffers, making use of all available connections to the machine.
+
+    For example::
+
+        >>> buffers = sdram_alloc_for_vertices(  # doctest: +SKIP
+        ...     mc, placements, allocations)
+        >>> init_recording_buffers(mc, buffers)  # doctest: +SKIP
+        >>> # ...load and start the application...
+        >>> for vertex, data in stream_recordings(  # doctest: +SKIP
+        ...         mc, buffers, stop=lambda: mc.count_cores_in_state(
+        ...             "exit") == n_cores):
+        ...     recordings[vertex].append(data)
+
+    Parameters
+    ----------
+    controller : :py:class:`~rig.machine_control.MachineController`
+        Controller to use to read from and write to the buffers.
+    buffers : {vertex: :py:class:`~rig.machine_control.machine_controller.\
+MemoryIO`, ...}
+        The recording buffers, laid out as described in
+        :py:mod:`~rig.machine_control.recording`.
+    stop : callable or None
+        A function which is called before each poll and returns True when
+        streaming should finish. Once it has returned True, the buffers are
+        drained one final time before the generator terminates. If None, the
+        generator never terminates (the caller may stop iterating at any
+        point).
+    poll_interval : float
+        Number of seconds to wait before polling again when no new data was
+        found in any buffer.
+    dtype : :py:class:`numpy.dtype`
+        The type of the recorded data. Data is only collected in whole
+        elements: any trailing partial element is left in the buffer until it
+        is completed.
+
+    Yields
+    ------
+    (vertex, :py:class:`numpy.ndarray`)
+        A chunk of newly recorded data from the buffer associated with a
+        vertex. Chunks for each vertex are yielded in the order they were
+        recorded.
+    """
+    item_size = np.dtype(dtype).itemsize
+    locations = _get_buffer_locations(buffers)
+
+    stopping = False
+    while not stopping:
+        stopping = stop is not None and stop()
+
+        # Read all head/tail pointers
+        headers = controller.read_many(
+            (x, y, 0, address, RECORDING_HEADER_LENGTH)
+            for _, x, y, address, _ in locations)
+
+        # Determine what new data is available
+        reads = []
+        segments = []  # [(vertex, x, y, address, n_reads, new_tail), ...]
+        for location, header in zip(locations, headers):
+            vertex, x, y, address, ring_size = location
+            head, tail = struct.unpack("<2I", header)
+            available = (head - tail) % ring_size
+            available -= available % item_size
+            if available == 0:
+                continue
+
+            # The data may wrap around the end of the ring
+            data_address = address + RECORDING_HEADER_LENGTH
+            first = min(available, ring_size - tail)
+            reads.append((x, y, 0, data_address + tail, first))
+            if first < available:
+                reads.append((x, y, 0, data_address, available - first))
+
+            segments.append((vertex, x, y, address,
+                             1 if first == available else 2,
+                             (tail + available) % ring_size))
+
+        if not segments:
+            if not stopping:
+                time.sleep(poll_interval)
+            continue
+
+        # Fetch the data and then free the space it occupied
+        data = iter(controller.read_many(reads))
+        controller.write_many(
+            (x, y, 0, address + 4, struct.pack("<I", new_tail))
+            for _, x, y, address, _, new_tail in segments)
+
+        for vertex, _, _, _, n_reads, _ in segments:
+            chunk = b"".join(next(data) for _ in range(n_reads))
+            yield vertex, np.frombuffer(chunk, dtype=dtype)
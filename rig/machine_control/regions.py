@@ -17,6 +17,15 @@ import collections
 from six import iteritems
 
 
+DEFAULT_EXACT_LIMIT = 32
+"""The default maximum number of candidate pairs for which
+:py:func:`.minimise_coremasks` searches for an exact minimum covering."""
+
+_MAX_SEARCH_STEPS = 300
+"""The maximum number of steps taken searching for an exact minimum covering
+of the cores selected in a single region."""
+
+
 def get_region_for_chip(x, y, level=3):
     """Get the region word for the given chip co-ordinates.
 
@@ -52,7 +61,8 @@ def get_region_for_chip(x, y, level=3):
     return region
 
 
-def compress_flood_fill_regions(targets):
+def compress_flood_fill_regions(targets, optimise=False,
+                                exact_limit=DEFAULT_EXACT_LIMIT):
     """Generate a reduced set of flood fill parameters.
 
     Parameters
@@ -62,6 +72,18 @@ def compress_flood_fill_regions(targets):
         should be loaded.  E.g., the output of
         :py:func:`~rig.place_and_route.util.build_application_map` when indexed
         by an application.
+    optimise : bool
+        If False (the default), the cores selected in each region are grouped
+        by the set of subregions they are selected in, as described in
+        :py:class:`.RegionCoreTree`. If True, the number of (region, core
+        mask) pairs is minimised further by finding a minimal covering of
+        the cores selected in each region (see :py:func:`.minimise_coremasks`).
+        Fewer pairs mean fewer flood-fill core select packets must be sent
+        when loading an application.
+    exact_limit : int
+        When `optimise` is True, the maximum number of candidate (subregion,
+        core mask) pairs for which an exact minimum covering is searched for
+        in each region. Larger problems use a greedy heuristic.
 
     Yields
     ------
@@ -80,7 +102,7 @@ def compress_flood_fill_regions(targets):
         for p in cores:
             t.add_core(x, y, p)
 
-    return sorted(t.get_regions_and_coremasks())
+    return sorted(t.get_regions_and_coremasks(optimise, exact_limit))
 
 
 class RegionCoreTree(object):
@@ -126,7 +148,8 @@ class RegionCoreTree(object):
         if level < 3:
             self.subregions = [None] * 16
 
-    def get_regions_and_coremasks(self):
+    def get_regions_and_coremasks(self, optimise=False,
+                                  exact_limit=DEFAULT_EXACT_LIMIT):
         """Generate a set of ordered paired region and core mask representations.
 
         .. note::
@@ -135,6 +158,15 @@ class RegionCoreTree(object):
             core masks generated by this method can be used with SCAMP's
             Flood-Fill Core Select (FFSC) method.
 
+        Parameters
+        ----------
+        optimise : bool
+            If True, use :py:func:`.minimise_coremasks` to minimise the number
+            of pairs generated for each region, otherwise cores are simply
+            grouped by the subregions they are selected in.
+        exact_limit : int
+            See :py:func:`.minimise_coremasks`.
+
         Yields
         ------
         (region, core mask)
@@ -145,14 +177,13 @@ class RegionCoreTree(object):
                        (self.level << 16))
 
         # Generate core masks for any regions which are selected at this level
-        # Create a mapping from subregion mask to core numbers
-        subregions_cores = collections.defaultdict(lambda: 0x0)
-        for core, subregions in enumerate(self.locally_selected):
-            if subregions:  # If any subregions are selected on this level
-                subregions_cores[subregions] |= 1 << core
+        if optimise:
+            pairs = minimise_coremasks(self.locally_selected, exact_limit)
+        else:
+            pairs = _group_by_subregions(self.locally_selected)
 
         # Order the locally selected items and then yield them
-        for (subregions, coremask) in sorted(subregions_cores.items()):
+        for (subregions, coremask) in sorted(pairs):
             yield (region_code | subregions), coremask
 
         if self.level < 3:
@@ -163,7 +194,8 @@ class RegionCoreTree(object):
                 subregion = self.subregions[i]
                 if subregion is not None:
                     for (region, coremask) in \
-                            subregion.get_regions_and_coremasks():
+                            subregion.get_regions_and_coremasks(
+                                optimise, exact_limit):
                         yield (region, coremask)
 
     def add_core(self, x, y, p):
@@ -215,3 +247,218 @@ class RegionCoreTree(object):
             return True
         else:
             return False
+
+
+def minimise_coremasks(subregions_by_core, exact_limit=DEFAULT_EXACT_LIMIT):
+    """Find a minimal set of (subregions, core mask) pairs which select
+    exactly the given cores in each subregion of a region.
+
+    Each pair selects every core in its core mask in every subregion in its
+    subregion mask; pairs may overlap. Finding the fewest pairs is a minimum
+    biclique cover problem. Only maximal pairs (those to which no further
+    subregion or core could be added) need be considered and, for a single
+    region, there are usually few of these. When there are no more than
+    `exact_limit` of them, an exact branch-and-bound search is used.
+    Otherwise the pair selecting the most uncovered cores is chosen greedily
+    until every core is selected. The result never contains more pairs than
+    grouping cores by their subregions or grouping subregions by their cores.
+
+    Parameters
+    ----------
+    subregions_by_core : [int, ...]
+        For each core number, a 16-bit mask of the subregions in which that
+        core must be selected (e.g.
+        :py:attr:`.RegionCoreTree.locally_selected`).
+    exact_limit : int
+        The maximum number of maximal pairs for which an exact solution is
+        searched for.
+
+    Returns
+    -------
+    [(subregions, core mask), ...]
+    """
+    columns = [(core, subregions)
+               for core, subregions in enumerate(subregions_by_core)
+               if subregions]
+    if not columns:
+        return []
+
+    # Simple solutions to improve upon
+    best = min(_group_by_subregions(subregions_by_core),
+               _group_by_cores(subregions_by_core), key=len)
+    if len(best) <= 1:
+        return best
+
+    # Enumerate the subregion masks of all maximal pairs: these are the
+    # (non-empty) intersections of any set of the cores' subregion masks.
+    # Give up enumerating them all if there are many: those found so far
+    # include every core's mask and so still cover everything.
+    extents = set()
+    for _, subregions in columns:
+        new = set([subregions])
+        if len(extents) <= exact_limit:
+            new.update(subregions & e for e in extents)
+        new.discard(0)
+        extents.update(new)
+    exact = len(extents) <= exact_limit
+
+    # Represent each selected (subregion, core) as a bit in a (16 * 18)-bit
+    # integer and determine the selection made by each maximal pair.
+    candidates = []
+    for extent in extents:
+        coremask = 0x0
+        selection = 0
+        for core, subregions in columns:
+            if subregions & extent == extent:
+                coremask |= 1 << core
+                selection |= extent << (16 * core)
+        candidates.append((selection, (extent, coremask)))
+    candidates.sort(key=lambda c: _popcount(c[0]), reverse=True)
+
+    required = 0
+    for core, subregions in columns:
+        required |= subregions << (16 * core)
+
+    solution = _greedy_cover(required, candidates)
+    if len(solution) < len(best):
+        best = solution
+    if exact and len(best) > 1:
+        solution = _exact_cover(required, candidates, len(best) - 1)
+        if solution is not None:
+            best = solution
+    return best
+
+
+def _group_by_subregions(subregions_by_core):
+    """For internal use. Group together cores which are selected in the same
+    subregions.
+
+    Returns
+    -------
+    [(subregions, core mask), ...]
+    """
+    subregions_cores = collections.defaultdict(lambda: 0x0)
+    for core, subregions in enumerate(subregions_by_core):
+        if subregions:  # If any subregions are selected on this level
+            subregions_cores[subregions] |= 1 << core
+    return list(iteritems(subregions_cores))
+
+
+def _group_by_cores(subregions_by_core):
+    """For internal use. Group together subregions in which the same cores
+    are selected.
+
+    Returns
+    -------
+    [(subregions, core mask), ...]
+    """
+    cores_subregions = collections.defaultdict(lambda: 0x0)
+    for subregion in range(16):
+        coremask = 0x0
+        for core, subregions in enumerate(subregions_by_core):
+            if subregions & (1 << subregion):
+                coremask |= 1 << core
+        if coremask:
+            cores_subregions[coremask] |= 1 << subregion
+    return [(subregions, coremask)
+            for coremask, subregions in iteritems(cores_subregions)]
+
+
+def _greedy_cover(required, candidates):
+    """For internal use. Greedily choose the candidates which cover the most
+    uncovered bits of `required`.
+
+    Parameters
+    ----------
+    required : int
+    candidates : [(selection, pair), ...]
+
+    Returns
+    -------
+    [pair, ...]
+    """
+    solution = []
+    uncovered = required
+    while uncovered:
+        selection, pair = max(
+            candidates, key=lambda c: _popcount(c[0] & uncovered))
+        solution.append(pair)
+        uncovered &= ~selection
+    return solution
+
+
+def _exact_cover(required, candidates, max_size,
+                 max_steps=_MAX_SEARCH_STEPS):
+    """For internal use. Find the smallest set of candidates, of no more than
+    `max_size` candidates, which covers every bit of `required`.
+
+    Parameters
+    ----------
+    required : int
+    candidates : [(selection, pair), ...]
+    max_size : int
+    max_steps : int
+        The search is abandoned after visiting this many partial solutions,
+        in which case the best solution found so far (if any) is returned.
+
+    Returns
+    -------
+    [pair, ...] or None
+        None if no solution of `max_size` candidates or fewer was found.
+    """
+    # For each required bit, a mask of the candidates which cover it
+    covers = collections.defaultdict(int)
+    for i, (selection, _) in enumerate(candidates):
+        while selection:
+            bit = selection & -selection
+            covers[bit] |= 1 << i
+            selection ^= bit
+    n_covers = dict((bit, _popcount(c)) for bit, c in iteritems(covers))
+
+    best = [None]
+    steps = [max_steps]
+
+    def search(uncovered, chosen, max_size):
+        if not uncovered:
+            best[0] = list(chosen)
+            return len(chosen) - 1
+
+        steps[0] -= 1
+        if steps[0] < 0:
+            return -1
+
+        # Lower bound on the number of further candidates required: no
+        # candidate covers more than one of a set of bits whose covering
+        # candidates are disjoint. Branch on the bit covered by the fewest
+        # candidates.
+        lower_bound = 0
+        used = 0
+        branch_on = None
+        remaining = uncovered
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            if not covers[bit] & used:
+                used |= covers[bit]
+                lower_bound += 1
+            if branch_on is None or n_covers[bit] < n_covers[branch_on]:
+                branch_on = bit
+        if len(chosen) + lower_bound > max_size:
+            return max_size
+
+        # Every solution must cover the chosen bit: try each candidate which
+        # does so.
+        for i, (selection, pair) in enumerate(candidates):
+            if covers[branch_on] & (1 << i):
+                chosen.append(pair)
+                max_size = search(uncovered & ~selection, chosen, max_size)
+                chosen.pop()
+        return max_size
+
+    search(required, [], max_size)
+    return best[0]
+
+
+def _popcount(value):
+    """For internal use. Count the set bits in a non-negative integer."""
+    return bin(value).count("1")
@@ -7,6 +7,7 @@ import six
 import socket
 import struct
 import time
+import threading
 import select
 from . import consts
 from .packets import SCPPacket
@@ -80,6 +81,21 @@ class SCPConnection(object):
         # Sequence values
         self.seq = seqs()
 
+        # Bursts are serialised so that a connection may be safely shared
+        # between threads.
+        self._lock = threading.Lock()
+
+        # The number of packets submitted to send_scp_burst (including those
+        # waiting for other bursts to complete) whose bursts have not yet
+        # completed. This is used as an indication of the load on the
+        # connection.
+        self.n_outstanding = 0
+        self._n_outstanding_lock = threading.Lock()
+
+        # An optional PacketLimit shared with other connections which bounds
+        # the total number of packets awaiting acknowledgement.
+        self.packet_limit = None
+
     def send_scp(self, buffer_size, x, y, p, cmd, arg1=0, arg2=0, arg3=0,
                  data=b'', expected_args=3, timeout=0.0):
         """Transmit a packet to the SpiNNaker machine and block until an
@@ -152,7 +168,38 @@ class SCPConnection(object):
         parameters_and_callbacks: iterable of :py:class:`.scpcall`
             Iterable of :py:class:`.scpcall` elements.  These elements can
             specify a callback which will be called with the returned packet.
+
+        .. note::
+            This method may be called from multiple threads. Concurrent bursts
+            through the same connection are transmitted one after another.
+
+        .. note::
+            If :py:attr:`.packet_limit` is set, the window size may be reduced
+            to keep the total number of packets awaiting replies within the
+            limit.
         """
+        parameters_and_callbacks = list(parameters_and_callbacks)
+        n_packets = len(parameters_and_callbacks)
+        with self._n_outstanding_lock:
+            self.n_outstanding += n_packets
+        try:
+            with self._lock:
+                packet_limit = self.packet_limit
+                if packet_limit is not None:
+                    window_size = packet_limit.acquire(window_size)
+                try:
+                    self._send_scp_burst(buffer_size, window_size,
+                                         parameters_and_callbacks)
+                finally:
+                    if packet_limit is not None:
+                        packet_limit.release(window_size)
+        finally:
+            with self._n_outstanding_lock:
+                self.n_outstanding -= n_packets
+
+    def _send_scp_burst(self, buffer_size, window_size,
+                        parameters_and_callbacks):
+        """Send a burst of SCP packets (without acquiring the lock)."""
         parameters_and_callbacks = iter(parameters_and_callbacks)
 
         self.sock.setblocking(False)
@@ -334,39 +381,11 @@ class SCPConnection(object):
         """
         # Prepare the buffer to receive the incoming data
         data = bytearray(length_bytes)
-        mem = memoryview(data)
-
-        # Create a callback which will write the data from a packet into a
-        # memoryview.
-        def callback(mem, data):
-            mem[:] = data[6 + consts.SDP_HEADER_LENGTH:]
-
-        # Create a generator that will generate request packets and store data
-        # until all data has been returned
-        def packets(length_bytes, data):
-            offset = 0
-            while length_bytes > 0:
-                # Get the next block of data
-                block_size = min((length_bytes, buffer_size))
-                read_address = address + offset
-                dtype = consts.address_length_dtype[(read_address % 4,
-                                                     block_size % 4)]
-
-                # Create the call spec and yield
-                yield scpcall(
-                    x, y, p, consts.SCPCommands.read, read_address,
-                    block_size, dtype,
-                    callback=functools.partial(callback,
-                                               mem[offset:offset + block_size])
-                )
-
-                # Update the number of bytes remaining and the offset
-                offset += block_size
-                length_bytes -= block_size
 
         # Run the event loop and then return the retrieved data
         self.send_scp_burst(buffer_size, window_size,
-                            list(packets(length_bytes, data)))
+                            list(read_scpcalls(buffer_size, x, y, p, address,
+                                               memoryview(data))))
         return bytes(data)
 
     def write(self, buffer_size, window_size, x, y, p, address, data):
@@ -395,34 +414,163 @@ class SCPConnection(object):
             Data to write into memory. Writes are automatically broken into a
             sequence of SCP write commands.
         """
-        # While there is still data perform a write: get the block to write
-        # this time around, determine the data type, perform the write and
-        # increment the address
-        def packets(address, data):
-            end = len(data)
-            pos = 0
-            while pos < end:
-                block = data[pos:pos + buffer_size]
-                block_size = len(block)
-
-                dtype = consts.address_length_dtype[(address % 4,
-                                                     block_size % 4)]
-
-                yield scpcall(x, y, p, consts.SCPCommands.write, address,
-                              block_size, dtype, block)
+        # Run the event loop
+        self.send_scp_burst(buffer_size, window_size,
+                            list(write_scpcalls(buffer_size, x, y, p, address,
+                                                data)))
 
-                address += block_size
-                pos += block_size
+    def send_datagram(self, data):
+        """Send a raw packet which does not expect a reply (e.g. an SDP
+        packet with the reply-expected flag cleared).
 
-        # Run the event loop and then return the retrieved data
-        self.send_scp_burst(buffer_size, window_size,
-                            list(packets(address, data)))
+        Parameters
+        ----------
+        data : bytes-like
+            The packet to send, including the two bytes of padding which
+            precede an SDP header.
+        """
+        self.sock.send(data)
 
     def close(self):
         """Close the SCP connection."""
         self.sock.close()
 
 
+class PacketLimit(object):
+    """A limit on the total number of SCP packets awaiting acknowledgement
+    across many connections.
+
+    When shared between connections (by setting their
+    :py:attr:`~.SCPConnection.packet_limit` attribute), each burst of packets
+    reserves part of the limit for its window of outstanding packets. When
+    the limit is exhausted, new bursts wait for others to complete and when
+    it is nearly exhausted, bursts proceed with smaller windows.
+    """
+
+    def __init__(self, max_outstanding):
+        """
+        Parameters
+        ----------
+        max_outstanding : int
+            The maximum number of packets which may be awaiting
+            acknowledgement at once.
+        """
+        if max_outstanding < 1:
+            raise ValueError("max_outstanding must be at least 1")
+        self.max_outstanding = max_outstanding
+        self._available = max_outstanding
+        self._condition = threading.Condition()
+
+    def acquire(self, n):
+        """Reserve up to n packets, waiting until at least one is available.
+
+        Returns
+        -------
+        int
+            The number of packets reserved (between 1 and n).
+        """
+        with self._condition:
+            while self._available == 0:
+                self._condition.wait()
+            n = min(n, self._available)
+            self._available -= n
+            return n
+
+    def release(self, n):
+        """Return a reservation made with :py:meth:`.acquire`."""
+        with self._condition:
+            self._available += n
+            self._condition.notify_all()
+
+
+def read_scpcalls(buffer_size, x, y, p, address, buf):
+    """For internal use. Generate the SCP packets required to read a block of
+    memory into a buffer.
+
+    Parameters
+    ----------
+    buffer_size : int
+        Maximum number of bytes to read in each packet.
+    x : int
+    y : int
+    p : int
+    address : int
+        The address at which to start reading the data.
+    buf : :py:class:`memoryview`
+        A writeable buffer into which the data will be read. The length of this
+        buffer determines the number of bytes read.
+
+    Yields
+    ------
+    :py:class:`.scpcall`
+        Packets whose callbacks will store the data read into the buffer.
+    """
+    # Create a callback which will write the data from a packet into a
+    # memoryview.
+    def callback(mem, data):
+        mem[:] = data[6 + consts.SDP_HEADER_LENGTH:]
+
+    offset = 0
+    length_bytes = len(buf)
+    while length_bytes > 0:
+        # Get the next block of data
+        block_size = min((length_bytes, buffer_size))
+        read_address = address + offset
+        dtype = consts.address_length_dtype[(read_address % 4,
+                                             block_size % 4)]
+
+        # Create the call spec and yield
+        yield scpcall(
+            x, y, p, consts.SCPCommands.read, read_address,
+            block_size, dtype,
+            callback=functools.partial(callback,
+                                       buf[offset:offset + block_size])
+        )
+
+        # Update the number of bytes remaining and the offset
+        offset += block_size
+        length_bytes -= block_size
+
+
+def write_scpcalls(buffer_size, x, y, p, address, data):
+    """For internal use. Generate the SCP packets required to write a
+    bytestring into memory.
+
+    Parameters
+    ----------
+    buffer_size : int
+        Maximum number of bytes to write in each packet.
+    x : int
+    y : int
+    p : int
+    address : int
+        The address at which to start writing the data.
+    data : :py:class:`bytes`
+        Data to write into memory.
+
+    Yields
+    ------
+    :py:class:`.scpcall`
+    """
+    # While there is still data perform a write: get the block to write
+    # this time around, determine the data type, perform the write and
+    # increment the address
+    end = len(data)
+    pos = 0
+    while pos < end:
+        block = data[pos:pos + buffer_size]
+        block_size = len(block)
+
+        dtype = consts.address_length_dtype[(address % 4,
+                                             block_size % 4)]
+
+        yield scpcall(x, y, p, consts.SCPCommands.write, address,
+                      block_size, dtype, block)
+
+        address += block_size
+        pos += block_size
+
+
 def seqs(mask=0xffff):
     i = 0
     while True:
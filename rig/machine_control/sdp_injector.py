@@ -0,0 +1,293 @@
+"""Inject SDP packets into running applications at high, controlled rates.
+
+The SCP request/response protocol used by
+:py:class:`~rig.machine_control.MachineController` waits for every packet to
+be acknowledged which limits throughput to a small fraction of what the
+machine's Ethernet links can sustain. When streaming real-time input into an
+application, acknowledgements are unnecessary: :py:class:`.SDPInjector`
+instead sends SDP packets which do not expect a reply.
+
+Since SpiNNaker silently discards packets which arrive faster than they can be
+handled by a board's Ethernet chip, the rate at which packets are sent to each
+board may be limited using a token-bucket rate limiter.
+"""
+
+import collections
+import heapq
+import itertools
+import struct
+import time
+
+from six import itervalues
+
+from rig.machine_control.consts import SDP_HEADER_LENGTH
+from rig.machine_control.packets import FLAG_NO_REPLY
+from rig.machine_control.sdp_receiver import SDP_DATA_LENGTH_MAX
+
+
+class TokenBucket(object):
+    """A token-bucket rate limiter.
+
+    Tokens are added to the bucket at a fixed rate up to a maximum capacity.
+    Each operation consumes a token, waiting for one to be added if the
+    bucket is empty. This limits the long-term rate of operations while
+    permitting short bursts.
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        Parameters
+        ----------
+        rate : float
+            The number of tokens added to the bucket each second.
+        burst : int
+            The capacity of the bucket, i.e. the maximum number of operations
+            which may be performed back-to-back. The bucket starts full.
+        """
+        self.rate = float(rate)
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last_time = time.time()
+
+    def _refill(self):
+        """Add the tokens which have arrived since the last refill."""
+        now = time.time()
+        self._tokens = min(self.burst,
+                           self._tokens + (now - self._last_time) * self.rate)
+        self._last_time = now
+        return now
+
+    def next_token_time(self):
+        """Get the time (as given by :py:func:`time.time`) at which a token
+        will be available, which may be in the past."""
+        now = self._refill()
+        return now + max(0.0, (1.0 - self._tokens) / self.rate)
+
+    def try_consume(self):
+        """Remove a token from the bucket if one is available.
+
+        Returns
+        -------
+        bool
+            True if a token was removed, False if the bucket was empty.
+        """
+        self._refill()
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    def consume(self):
+        """Remove a token from the bucket, waiting for one if none remain."""
+        self._refill()
+        if self._tokens < 1.0:
+            # Wait for the next token to arrive
+            time.sleep((1.0 - self._tokens) / self.rate)
+            self._tokens = 1.0
+            self._last_time = time.time()
+
+        self._tokens -= 1.0
+
+
+class SDPInjector(object):
+    """Send SDP packets into a SpiNNaker machine without waiting for replies.
+
+    For example, to send a stream of events to core 1 of chip (2, 3) on port
+    1, sending no more than 10000 packets per second to any one board::
+
+        >>> injector = SDPInjector(mc, rate=10000)  # doctest: +SKIP
+        >>> injector.send_many((2, 3, 1, 1, struct.pack("<I", event))
+        ...                    for event in events)  # doctest: +SKIP
+
+    .. note::
+        Packets sent by the injector may be lost (e.g. due to congestion)
+        without any indication.
+    """
+
+    max_pending = 1024
+    """The maximum number of packets :py:meth:`.send_many` holds back while
+    waiting for the rate limits of their boards."""
+
+    def __init__(self, controller, rate=None, burst=1, spread=False,
+                 max_data_length=SDP_DATA_LENGTH_MAX):
+        """
+        Parameters
+        ----------
+        controller : :py:class:`~rig.machine_control.MachineController`
+            The controller whose connections will be used to send packets.
+            To make use of the Ethernet connections of all boards in a
+            multi-board machine, call
+            :py:meth:`~rig.machine_control.MachineController.\
+discover_connections` first.
+        rate : float or None
+            The maximum number of packets per second to send to each board.
+            If None, packets are sent as fast as possible.
+        burst : int
+            The number of packets which may be sent back-to-back to a board
+            before rate limiting takes effect.
+        spread : bool
+            If False (the default), packets are sent via the Ethernet
+            connection of the board they are destined for, when available. If
+            True, packets are distributed in turn across all available
+            Ethernet connections and routed to their destination by the
+            machine. This allows packets destined for a single board to
+            exceed the bandwidth of that board's Ethernet connection.
+        max_data_length : int
+            The maximum length of the data in any packet.
+        """
+        self._controller = controller
+        self.rate = rate
+        self.burst = burst
+        self.spread = spread
+        self.max_data_length = max_data_length
+
+        # {board: TokenBucket, ...}
+        self._buckets = {}
+
+        # Packets are assembled in a single reusable buffer.
+        self._buffer = bytearray(2 + SDP_HEADER_LENGTH + max_data_length)
+        self._buffer_view = memoryview(self._buffer)
+
+        # An endless cycle of the distinct connections to the machine (used
+        # when spreading packets) and the controller's connections_version
+        # when it was built.
+        self._connections = None
+        self._connections_version = None
+
+    def _get_board(self, x, y):
+        return self._controller.get_local_ethernet_chip(x, y)
+
+    def _get_bucket(self, board):
+        bucket = self._buckets.get(board)
+        if bucket is None:
+            bucket = self._buckets[board] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _get_next_connection(self):
+        # Rebuild the cycle whenever the controller's connections change
+        version = self._controller.connections_version
+        if self._connections is None or version != self._connections_version:
+            connections = []
+            for connection in itervalues(self._controller.connections):
+                if connection not in connections:
+                    connections.append(connection)
+            self._connections = itertools.cycle(connections)
+            self._connections_version = version
+        return next(self._connections)
+
+    def _check_data_length(self, data):
+        if len(data) > self.max_data_length:
+            raise ValueError(
+                "SDP packets may contain at most {} bytes of data.".format(
+                    self.max_data_length))
+
+    def send(self, x, y, p, port, data):
+        """Send a single SDP packet.
+
+        Parameters
+        ----------
+        x : int
+        y : int
+        p : int
+            The chip and core to send the packet to.
+        port : int
+            The SDP port (1-7) to send the packet to.
+        data : bytes
+            The data to send in the packet.
+        """
+        self._check_data_length(data)
+        if self.rate is not None:
+            self._get_bucket(self._get_board(x, y)).consume()
+        self._send(x, y, p, port, data)
+
+    def _send(self, x, y, p, port, data):
+        """Send a packet, regardless of the rate limit."""
+        if self.spread:
+            connection = self._get_next_connection()
+        else:
+            connection = self._controller.get_connection(x, y)
+
+        # Assemble the packet in the buffer (see
+        # rig.machine_control.packets.SDPPacket.bytestring).
+        length = 2 + SDP_HEADER_LENGTH + len(data)
+        struct.pack_into("<2x8B", self._buffer, 0,
+                         FLAG_NO_REPLY, 0xff,
+                         (port & 0x7) << 5 | (p & 0x1f), (7 << 5) | 31,
+                         y, x, 0, 0)
+        self._buffer[2 + SDP_HEADER_LENGTH:length] = data
+        connection.send_datagram(self._buffer_view[:length])
+
+    def send_many(self, packets):
+        """Send many SDP packets.
+
+        When rate limited, packets destined for a board which has reached its
+        rate limit are held back (up to :py:attr:`.max_pending` packets in
+        total) while packets for other boards are sent. Packets are always
+        sent to each board in the order given, but packets for different
+        boards may be reordered.
+
+        Parameters
+        ----------
+        packets : iterable of (x, y, p, port, data)
+            The packets to send, in the order they should be sent. The rate
+            limit of each destination board is respected independently.
+        """
+        if self.rate is None:
+            send = self.send
+            for x, y, p, port, data in packets:
+                send(x, y, p, port, data)
+            return
+
+        # Packets held back for each board, {board: deque([packet, ...])},
+        # and a heap of (next_token_time, n, board) of the boards with
+        # packets held back, ordered by when they may next be sent to (with
+        # ties broken by the order the boards were added, n).
+        pending = {}
+        heap = []
+        order = itertools.count()
+        n_pending = 0
+
+        for packet in packets:
+            self._check_data_length(packet[4])
+
+            # Send anything which no longer needs to be held back
+            while heap and heap[0][0] <= time.time():
+                self._send_pending(pending, heap, order)
+                n_pending -= 1
+
+            board = self._get_board(packet[0], packet[1])
+            queue = pending.get(board)
+            if queue is None:
+                bucket = self._get_bucket(board)
+                if bucket.try_consume():
+                    self._send(*packet)
+                    continue
+                queue = pending[board] = collections.deque()
+                heapq.heappush(
+                    heap, (bucket.next_token_time(), next(order), board))
+            queue.append(packet)
+            n_pending += 1
+
+            # Wait for the earliest board to be ready if too much is pending
+            while n_pending > self.max_pending:
+                self._send_pending(pending, heap, order)
+                n_pending -= 1
+
+        while heap:
+            self._send_pending(pending, heap, order)
+
+    def _send_pending(self, pending, heap, order):
+        """Send the first held-back packet of the board at the top of the
+        heap, waiting for its rate limit if necessary (see
+        :py:meth:`.send_many`)."""
+        _, _, board = heapq.heappop(heap)
+        bucket = self._get_bucket(board)
+        bucket.consume()
+
+        queue = pending[board]
+        self._send(*queue.popleft())
+        if queue:
+            heapq.heappush(
+                heap, (bucket.next_token_time(), next(order), board))
+        else:
+            del pending[board]
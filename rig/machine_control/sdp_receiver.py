@@ -0,0 +1,387 @@
+"""Receive SDP packets sent by applications via IP tags at high rates.
+
+Applications running on SpiNNaker may stream data to the host by sending SDP
+packets to an IP tag (see
+:py:meth:`~rig.machine_control.MachineController.iptag_set`) which forwards
+them as UDP datagrams. Since a single SpiNNaker board can produce tens of
+thousands of such packets each second, handling packets one at a time in
+Python (e.g. using
+:py:meth:`~rig.machine_control.packets.SDPPacket.from_bytestring`) quickly
+becomes a bottleneck, with the operating system silently dropping packets
+which arrive while Python is busy.
+
+:py:class:`.SDPReceiver` instead drains its socket in batches into a
+preallocated buffer and decodes the SDP headers of a whole batch at once,
+presenting each batch (or 'block') of packets as a set of NumPy arrays. Blocks
+may be received directly or, to ensure the socket is drained even while the
+consumer is busy, collected by a background thread.
+"""
+
+import collections
+import errno
+import socket
+import threading
+
+import numpy as np
+
+from six.moves import queue
+
+from rig.machine_control.consts import SDP_HEADER_LENGTH
+from rig.machine_control.packets import SDPPacket, FLAG_REPLY
+
+SDP_DATA_LENGTH_MAX = 272
+"""The maximum number of bytes of data which may follow the header of an SDP
+packet (256 bytes of payload plus 16 bytes of SCP header)."""
+
+
+def _sdp_dtype(max_data_length):
+    """Get the NumPy structured type of a received SDP packet.
+
+    The field layout mirrors that unpacked by
+    :py:func:`rig.machine_control.packets._unpack_sdp_into_packet`: two
+    bytes of padding followed by the eight byte SDP header and the data.
+    One extra byte is allocated after the largest permitted data so that
+    oversized packets can be detected.
+    """
+    return np.dtype([
+        ("padding", np.uint16),
+        ("flags", np.uint8),
+        ("tag", np.uint8),
+        ("dest_cpu_port", np.uint8),
+        ("src_cpu_port", np.uint8),
+        ("dest_y", np.uint8),
+        ("dest_x", np.uint8),
+        ("src_y", np.uint8),
+        ("src_x", np.uint8),
+        ("data", np.uint8, (max_data_length + 1, )),
+    ])
+
+
+class SDPBlock(collections.namedtuple("SDPBlock",
+                                      "reply_expected, tag, "
+                                      "dest_port, dest_cpu, "
+                                      "src_port, src_cpu, "
+                                      "dest_x, dest_y, src_x, src_y, "
+                                      "length, data")):
+    """A block of SDP packets received by a :py:class:`.SDPReceiver`.
+
+    Each field is a NumPy array with one entry per packet, in the order the
+    packets were received. The header fields have the same meanings as the
+    attributes of :py:class:`~rig.machine_control.packets.SDPPacket`.
+
+    Parameters
+    ----------
+    reply_expected : :py:class:`numpy.ndarray` of bool
+    tag : :py:class:`numpy.ndarray` of uint8
+    dest_port : :py:class:`numpy.ndarray` of uint8
+    dest_cpu : :py:class:`numpy.ndarray` of uint8
+    src_port : :py:class:`numpy.ndarray` of uint8
+    src_cpu : :py:class:`numpy.ndarray` of uint8
+    dest_x : :py:class:`numpy.ndarray` of uint8
+    dest_y : :py:class:`numpy.ndarray` of uint8
+    src_x : :py:class:`numpy.ndarray` of uint8
+    src_y : :py:class:`numpy.ndarray` of uint8
+    length : :py:class:`numpy.ndarray` of int
+        The number of bytes of data in each packet.
+    data : :py:class:`numpy.ndarray` of uint8
+        A two-dimensional array with one row per packet containing the data
+        which followed each packet's SDP header. Only the first ``length``
+        bytes of each row are valid.
+    """
+
+    @property
+    def n_packets(self):
+        """The number of packets in the block."""
+        return len(self.length)
+
+    def payloads(self):
+        """Get the data of each packet in the block as a bytestring.
+
+        Returns
+        -------
+        [bytes, ...]
+        """
+        return [row[:length].tobytes()
+                for row, length in zip(self.data, self.length)]
+
+    def packets(self):
+        """Get the packets in the block as individual
+        :py:class:`~rig.machine_control.packets.SDPPacket` objects.
+
+        .. note::
+            This method is intended for convenience only and is not suitable
+            for use at high packet rates.
+
+        Returns
+        -------
+        [:py:class:`~rig.machine_control.packets.SDPPacket`, ...]
+        """
+        return [
+            SDPPacket(reply_expected=bool(self.reply_expected[i]),
+                      tag=int(self.tag[i]),
+                      dest_port=int(self.dest_port[i]),
+                      dest_cpu=int(self.dest_cpu[i]),
+                      src_port=int(self.src_port[i]),
+                      src_cpu=int(self.src_cpu[i]),
+                      dest_x=int(self.dest_x[i]),
+                      dest_y=int(self.dest_y[i]),
+                      src_x=int(self.src_x[i]),
+                      src_y=int(self.src_y[i]),
+                      data=payload)
+            for i, payload in enumerate(self.payloads())
+        ]
+
+
+class SDPReceiver(object):
+    """Receive SDP packets forwarded to a UDP port by IP tags.
+
+    For example, to receive packets sent by an application via IP tag 1::
+
+        >>> with SDPReceiver() as receiver:  # doctest: +SKIP
+        ...     mc.iptag_set(1, "192.168.240.1", receiver.port, x=0, y=0)
+        ...     # ...start the application...
+        ...     while True:
+        ...         block = receiver.receive_block(timeout=1.0)
+        ...         if block is None:
+        ...             break
+        ...         process(block.src_x, block.src_y, block.data)
+
+    Alternatively, a background thread may be used to drain the socket while
+    the consumer processes blocks. Blocks may then be fetched from an internal
+    queue::
+
+        >>> receiver.start()  # doctest: +SKIP
+        >>> block = receiver.get_block(timeout=1.0)  # doctest: +SKIP
+
+    Or passed directly to a callback function (called from the background
+    thread)::
+
+        >>> receiver.start(callback=process_block)  # doctest: +SKIP
+
+    Attributes
+    ----------
+    n_received : int
+        The number of packets received.
+    n_dropped : int
+        The number of received packets which were discarded because the queue
+        of blocks awaiting collection by :py:meth:`.get_block` was full.
+    n_truncated : int
+        The number of packets which were too long to be received in full and
+        whose data was truncated.
+    n_malformed : int
+        The number of datagrams which were too short to contain an SDP header
+        and were discarded.
+    """
+
+    def __init__(self, port=0, hostname="", block_size=1024,
+                 max_data_length=SDP_DATA_LENGTH_MAX,
+                 receive_buffer_size=8 * 1024 * 1024):
+        """Bind a socket to receive SDP packets.
+
+        Parameters
+        ----------
+        port : int
+            The UDP port to listen on. If 0 (the default), an unused port is
+            chosen by the operating system, see :py:attr:`.port`.
+        hostname : str
+            The address of the interface to listen on. The default listens on
+            all interfaces.
+        block_size : int
+            The maximum number of packets to return in each block.
+        max_data_length : int
+            The maximum number of bytes of data expected after the SDP header
+            of each packet. Longer packets will be truncated.
+        receive_buffer_size : int
+            The size (in bytes) of the operating system's receive buffer to
+            request for the socket. Larger buffers reduce the likelihood of
+            packets being dropped when packets arrive in bursts. The operating
+            system may impose a smaller limit.
+        """
+        self.block_size = block_size
+        self.max_data_length = max_data_length
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                                 receive_buffer_size)
+        except socket.error:  # pragma: no cover
+            # Not fatal: the default buffer size will be used instead
+            pass
+        self.sock.bind((hostname, port))
+
+        # Packets are received directly into a preallocated buffer (via the
+        # memoryview of each packet-sized row).
+        self._buffer = np.zeros(block_size, dtype=_sdp_dtype(max_data_length))
+        raw = self._buffer.view(np.uint8).reshape(block_size, -1)
+        self._rows = [memoryview(row) for row in raw]
+        self._lengths = np.zeros(block_size, dtype=np.uint32)
+
+        self.n_received = 0
+        self.n_dropped = 0
+        self.n_truncated = 0
+        self.n_malformed = 0
+
+        self._thread = None
+        self._stop = threading.Event()
+        self._queue = None
+
+    @property
+    def port(self):
+        """The UDP port number the receiver is listening on."""
+        return self.sock.getsockname()[1]
+
+    def receive_block(self, timeout=None):
+        """Wait for packets to arrive and return them as a block.
+
+        Once a packet arrives, all further packets already waiting in the
+        socket's buffer (up to the block size) are collected without further
+        waiting.
+
+        .. warning::
+            This method should not be used while a background thread is
+            running (see :py:meth:`.start`).
+
+        Parameters
+        ----------
+        timeout : float or None
+            The maximum number of seconds to wait for the first packet to
+            arrive. If None, wait forever.
+
+        Returns
+        -------
+        :py:class:`.SDPBlock` or None
+            The packets received or None if no packets arrived before the
+            timeout.
+        """
+        n = 0
+        self.sock.settimeout(timeout)
+        try:
+            while n < self.block_size:
+                length = self.sock.recv_into(self._rows[n])
+                if length < 2 + SDP_HEADER_LENGTH:
+                    self.n_malformed += 1
+                    continue
+                self._lengths[n] = length
+                n += 1
+
+                # Subsequent packets are only taken if already waiting
+                self.sock.settimeout(0.0)
+        except socket.timeout:
+            pass
+        except socket.error as e:
+            if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                raise
+
+        if n == 0:
+            return None
+        self.n_received += n
+
+        # Copy the packets received out of the preallocated buffer and decode
+        # the SDP headers (see packets._unpack_sdp_into_packet)
+        packets = self._buffer[:n].copy()
+        length = self._lengths[:n].astype(np.int64) - (2 + SDP_HEADER_LENGTH)
+        truncated = length > self.max_data_length
+        if truncated.any():
+            self.n_truncated += int(np.count_nonzero(truncated))
+            length[truncated] = self.max_data_length
+
+        return SDPBlock(
+            reply_expected=packets["flags"] == FLAG_REPLY,
+            tag=packets["tag"],
+            dest_port=packets["dest_cpu_port"] >> 5,
+            dest_cpu=packets["dest_cpu_port"] & 0x1f,
+            src_port=packets["src_cpu_port"] >> 5,
+            src_cpu=packets["src_cpu_port"] & 0x1f,
+            dest_x=packets["dest_x"],
+            dest_y=packets["dest_y"],
+            src_x=packets["src_x"],
+            src_y=packets["src_y"],
+            length=length,
+            data=packets["data"][:, :self.max_data_length],
+        )
+
+    def start(self, callback=None, queue_length=64):
+        """Start a background thread which receives blocks of packets.
+
+        Parameters
+        ----------
+        callback : callable or None
+            If given, a function which is called (from the background thread)
+            with each :py:class:`.SDPBlock` as it is received. The callback
+            should return quickly to avoid packets being dropped by the
+            operating system. If None, blocks are placed in a queue to be
+            collected using :py:meth:`.get_block`.
+        queue_length : int
+            The maximum number of blocks to hold in the queue. If the queue is
+            full, newly received blocks are discarded and counted in
+            :py:attr:`.n_dropped`.
+        """
+        if self._thread is not None:
+            raise RuntimeError("Receiver thread already running.")
+
+        self._stop.clear()
+        if callback is None:
+            self._queue = queue.Queue(queue_length)
+            callback = self._enqueue_block
+
+        self._thread = threading.Thread(target=self._run, args=(callback, ))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _enqueue_block(self, block):
+        try:
+            self._queue.put_nowait(block)
+        except queue.Full:
+            self.n_dropped += block.n_packets
+
+    def _run(self, callback):
+        """Background thread body."""
+        while not self._stop.is_set():
+            # Wake regularly to check whether we should stop
+            block = self.receive_block(timeout=0.1)
+            if block is not None:
+                callback(block)
+
+    def get_block(self, timeout=None):
+        """Get the next block received by the background thread.
+
+        Parameters
+        ----------
+        timeout : float or None
+            Number of seconds to wait for a block. If None, wait forever.
+
+        Returns
+        -------
+        :py:class:`.SDPBlock` or None
+            The next block or None if no block arrived before the timeout.
+        """
+        if self._queue is None:
+            raise RuntimeError(
+                "get_block() requires a background thread started without a "
+                "callback.")
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stop(self):
+        """Stop the background thread, if running.
+
+        Any blocks already queued may still be collected using
+        :py:meth:`.get_block`.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Stop the background thread, if running, and close the socket."""
+        self.stop()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
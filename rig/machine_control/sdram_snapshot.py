@@ -0,0 +1,186 @@
+"""Save and restore the contents of many regions of SDRAM to and from disk.
+
+A snapshot of the SDRAM allocated to every vertex (e.g. by
+:py:func:`~rig.machine_control.utils.sdram_alloc_for_vertices`) can be useful
+for post-mortem analysis of an application or for restarting it from a
+checkpoint. :py:func:`.snapshot_sdram` reads every region using bursts of SCP
+packets via every connection to the machine concurrently (see
+:py:meth:`~rig.machine_control.MachineController.read_many`), streaming the
+data directly into a memory-mapped file. :py:func:`.restore_sdram` writes the
+data back in the same way.
+
+For example::
+
+    >>> vertex_memory = sdram_alloc_for_vertices(  # doctest: +SKIP
+    ...     mc, placements, allocations)
+    >>> # ... run the application ...
+    >>> index = snapshot_sdram(mc, vertex_memory,  # doctest: +SKIP
+    ...                        "checkpoint.bin")
+    >>> # ... later ...
+    >>> restore_sdram(mc, index, "checkpoint.bin")  # doctest: +SKIP
+
+The index returned by :py:func:`.snapshot_sdram` records where each vertex's
+data was read from and where it is stored in the file. Since vertices may be
+arbitrary objects, the index is not stored in the file; it may be saved
+alongside it using, e.g., :py:mod:`pickle`.
+"""
+
+import collections
+
+import numpy as np
+
+from six import iteritems, itervalues
+
+from rig.machine_control.scp_connection import read_scpcalls
+
+from rig.machine_control.machine_controller import SlicedMemoryIO
+
+
+class SnapshotRegion(collections.namedtuple("SnapshotRegion",
+                                            "x, y, address, length, offset")):
+    """The location of a region of SDRAM and of its data in a snapshot file.
+
+    Parameters
+    ----------
+    x : int
+    y : int
+        The chip the region of SDRAM is on.
+    address : int
+        The address of the start of the region.
+    length : int
+        The length of the region in bytes.
+    offset : int
+        The offset of the region's data in the snapshot file.
+    """
+
+
+def snapshot_sdram(controller, regions, filename,
+                   chunk_size=64 * 1024 * 1024):
+    """Read many regions of SDRAM into a file.
+
+    Parameters
+    ----------
+    controller : :py:class:`~rig.machine_control.MachineController`
+        The controller to use to read the regions.
+    regions : {key: :py:class:`~rig.machine_control.machine_controller.\
+MemoryIO` or (x, y, address, length), ...}
+        The regions of SDRAM to read, for example the file-like views of
+        memory returned by
+        :py:func:`~rig.machine_control.utils.sdram_alloc_for_vertices`.
+    filename : str
+        The file to write the data into. The data from each region is stored
+        consecutively (see the returned index).
+    chunk_size : int
+        The (approximate) maximum number of bytes to read in each set of
+        bursts. This bounds the memory required to track outstanding reads.
+
+    Returns
+    -------
+    {key: :py:class:`.SnapshotRegion`, ...}
+        The index of the regions stored in the file.
+    """
+    index = collections.OrderedDict()
+    offset = 0
+    for key, region in iteritems(regions):
+        if isinstance(region, SlicedMemoryIO):
+            # NB: The whole region is read (regardless of the file-like's
+            # current position)
+            region = (region.x, region.y, region.start_address, len(region))
+        x, y, address, length = region
+        index[key] = SnapshotRegion(x, y, address, length, offset)
+        offset += length
+
+    if offset == 0:
+        # NB: numpy cannot memory-map empty files
+        open(filename, "wb").close()
+        return index
+
+    data = np.memmap(filename, dtype=np.uint8, mode="w+", shape=(offset, ))
+    try:
+        buffer_size = controller.scp_data_length
+        for chunk in _chunks(itervalues(index), chunk_size):
+            # Read directly into the memory-mapped file
+            controller._send_scp_bursts(
+                call
+                for x, y, address, length, offset in chunk
+                for call in read_scpcalls(
+                    buffer_size, x, y, 0, address,
+                    memoryview(data[offset:offset + length])))
+        data.flush()
+    finally:
+        del data
+
+    return index
+
+
+def restore_sdram(controller, index, filename, chunk_size=64 * 1024 * 1024):
+    """Write regions of SDRAM back from a file produced by
+    :py:func:`.snapshot_sdram`.
+
+    Parameters
+    ----------
+    controller : :py:class:`~rig.machine_control.MachineController`
+        The controller to use to write the regions.
+    index : {key: :py:class:`.SnapshotRegion`, ...}
+        The index returned by :py:func:`.snapshot_sdram`. Only the regions in
+        the index are restored.
+    filename : str
+        The file containing the data.
+    chunk_size : int
+        The (approximate) maximum number of bytes to write in each set of
+        bursts.
+
+    Raises
+    ------
+    ValueError
+        If the file is too short to contain all of the regions in the index.
+    """
+    end = max([r.offset + r.length for r in itervalues(index)] or [0])
+    if end == 0:
+        return
+
+    data = np.memmap(filename, dtype=np.uint8, mode="r")
+    try:
+        if len(data) < end:
+            raise ValueError(
+                "{} contains {} bytes but the index requires {}.".format(
+                    filename, len(data), end))
+
+        for chunk in _chunks(itervalues(index), chunk_size):
+            controller.write_many(
+                (x, y, 0, address, data[offset:offset + length].tobytes())
+                for x, y, address, length, offset in chunk)
+    finally:
+        del data
+
+
+def _chunks(regions, chunk_size):
+    """Divide regions into chunks of (approximately) no more than chunk_size
+    bytes, splitting regions larger than the chunk size.
+
+    Parameters
+    ----------
+    regions : iterable of :py:class:`.SnapshotRegion`
+
+    Yields
+    ------
+    [:py:class:`.SnapshotRegion`, ...]
+    """
+    chunk = []
+    chunk_length = 0
+    for region in regions:
+        x, y, address, length, offset = region
+        while length > 0:
+            piece_length = min(length, chunk_size - chunk_length)
+            chunk.append(SnapshotRegion(x, y, address, piece_length, offset))
+            chunk_length += piece_length
+            address += piece_length
+            offset += piece_length
+            length -= piece_length
+
+            if chunk_length >= chunk_size:
+                yield chunk
+                chunk = []
+                chunk_length = 0
+    if chunk:
+        yield chunk
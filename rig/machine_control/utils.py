@@ -47,6 +47,9 @@ def sdram_alloc_for_vertices(controller, placements, allocations,
         pointer is returned.  If False (the default) the memory will be left
         as-is.
 
+        All regions are cleared at once, once every region has been allocated,
+        using :py:meth:`~rig.machine_control.MachineController.fill_many`.
+
     Other Parameters
     ----------------
     core_as_tag : bool
@@ -88,7 +91,14 @@ def sdram_alloc_for_vertices(controller, placements, allocations,
 
             # Get the memory
             vertex_memory[vertex] = controller.sdram_alloc_as_filelike(
-                size, tag, x=x, y=y, clear=clear
+                size, tag, x=x, y=y
             )
 
+    # Clear all of the allocated memory in one go
+    if clear:
+        controller.fill_many(
+            (memory._x, memory._y, 0, memory._start_address, 0, len(memory))
+            for memory in six.itervalues(vertex_memory)
+        )
+
     return vertex_memory
@@ -1,10 +1,13 @@
 # Basic routing table datastructures
-from rig.routing_table.entries import RoutingTableEntry, Routes
+from rig.routing_table.entries import RoutingTableEntry, Routes, RoutingTable
 
 # Common exceptions produced by algorithms in this module
 from rig.routing_table.exceptions import (MinimisationFailedError,
                                           MultisourceRouteError)
 
+# Emulation of router look-ups
+from rig.routing_table.lookup import RoutingTableLookup
+
 # Generic routing table manipulation and generation functions
 from rig.routing_table.utils import (
     build_routing_table_target_lengths,
@@ -14,3 +17,6 @@ from rig.routing_table.utils import (
 # Routing table minimisation common-case wrappers
 from rig.routing_table.minimise import (
     minimise_tables, minimise_table)
+
+# Caching of minimised routing tables
+from rig.routing_table.cache import MinimisationCache
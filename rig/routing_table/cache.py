@@ -0,0 +1,235 @@
+"""An on-disk cache of minimised routing tables.
+
+When an application is rebuilt after a small change, most chips' routing
+tables are usually unchanged. A :py:class:`.MinimisationCache` stores the
+result of minimising each table under a hash of the table, its target length
+and the minimisation methods used so that these tables need not be minimised
+again.
+"""
+
+import errno
+import functools
+import hashlib
+import os
+import tempfile
+
+from rig.routing_table.minimise import pack_table, unpack_table
+
+
+class MinimisationCache(object):
+    """A size-bounded, content-addressed, on-disk cache of minimised routing
+    tables.
+
+    Each minimised table is stored in its own file in the cache directory,
+    named after the hash of the inputs which produced it (see
+    :py:meth:`.key`). Files are written atomically so a cache directory may be
+    safely shared by many processes at once. When the cache grows beyond its
+    maximum size the least recently used tables are removed.
+
+    For example::
+
+        >>> import tempfile
+        >>> from rig.routing_table import (
+        ...     RoutingTableEntry, Routes, minimise_tables)
+        >>> cache = MinimisationCache(tempfile.mkdtemp())
+        >>> tables = {(0, 0): [
+        ...     RoutingTableEntry({Routes.east}, 0x0, 0xf, {Routes.north}),
+        ...     RoutingTableEntry({Routes.east}, 0x1, 0xf, {Routes.south}),
+        ... ]}
+        >>> first = minimise_tables(tables, None, cache=cache)
+        >>> # The second time the result comes from the cache
+        >>> minimise_tables(tables, None, cache=cache) == first
+        True
+
+    .. note::
+
+        Methods are identified by their module and name. If the
+        implementation of a method changes the cache should be cleared (or a
+        new directory used).
+
+    .. note::
+
+        Tables for which a time-budgeted method (e.g.
+        ``partial(ordered_covering.minimise, timeout=1.0)``) ran out of time
+        are not cached by :py:func:`~rig.routing_table.minimise_table` and
+        :py:func:`~rig.routing_table.minimise_tables` since the result
+        depends on how much time was available.
+    """
+
+    def __init__(self, directory, max_size=64 * 1024 * 1024):
+        """
+        Parameters
+        ----------
+        directory : str
+            The directory in which to store cached tables. It is created if it
+            does not exist.
+        max_size : int
+            The (approximate) maximum total size of the cached tables in
+            bytes.
+        """
+        self.directory = directory
+        self.max_size = max_size
+
+        try:
+            os.makedirs(directory)
+        except OSError as e:  # pragma: no cover
+            if e.errno != errno.EEXIST:
+                raise
+
+        # A running estimate of the size of the cache (or None if not yet
+        # known). Other processes may also be adding to the cache so this is
+        # only used to decide when to examine the directory again.
+        self._size = None
+
+    @staticmethod
+    def key(table, target_length, methods):
+        """Get the key under which the result of minimising a table is
+        cached.
+
+        Parameters
+        ----------
+        table : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
+            The table to minimise.
+        target_length : int or None
+        methods : [function, ...]
+            The minimisation methods to be tried, in order.
+
+        Returns
+        -------
+        str
+            A hexadecimal SHA-256 digest.
+        """
+        h = hashlib.sha256()
+        h.update(pack_table(table))
+        h.update(repr(target_length).encode("ascii"))
+        for method in methods:
+            h.update(b"\0" + _method_name(method).encode("utf-8"))
+        return h.hexdigest()
+
+    def _filename(self, key):
+        return os.path.join(self.directory, key + ".table")
+
+    def get(self, key):
+        """Get a cached minimised table.
+
+        Returns
+        -------
+        [:py:class:`~rig.routing_table.RoutingTableEntry`, ...] or None
+            The cached table or None if the table is not cached.
+        """
+        filename = self._filename(key)
+        try:
+            with open(filename, "rb") as f:
+                data = f.read()
+            # Mark the table as recently used
+            os.utime(filename, None)
+        except (IOError, OSError):
+            return None
+        return unpack_table(data)
+
+    def put(self, key, table):
+        """Store a minimised table in the cache.
+
+        Parameters
+        ----------
+        key : str
+            The key returned by :py:meth:`.key`.
+        table : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
+            The minimised table.
+        """
+        data = pack_table(table)
+
+        # Write to a temporary file and then move it into place so that other
+        # processes never see a partially written table.
+        fd, temp_filename = tempfile.mkstemp(dir=self.directory,
+                                             suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            _replace(temp_filename, self._filename(key))
+        except Exception:  # pragma: no cover
+            os.remove(temp_filename)
+            raise
+
+        if self._size is not None:
+            self._size += len(data)
+        if self._size is None or self._size > self.max_size:
+            self._evict()
+
+    def _evict(self):
+        """Remove the least recently used tables until the cache is within
+        its size limit.
+
+        To avoid examining the directory after every write, tables are removed
+        until the cache is well within its limit.
+        """
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".table"):
+                continue
+            filename = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(filename)
+            except OSError:  # pragma: no cover
+                # Removed by another process
+                continue
+            files.append((stat.st_mtime, stat.st_size, filename))
+
+        self._size = sum(size for _, size, _ in files)
+        if self._size <= self.max_size:
+            return
+
+        low_water_mark = (self.max_size * 3) // 4
+        for _, size, filename in sorted(files):
+            if self._size <= low_water_mark:
+                break
+            try:
+                os.remove(filename)
+            except OSError:  # pragma: no cover
+                # Removed by another process
+                pass
+            self._size -= size
+
+    def clear(self):
+        """Remove all tables from the cache."""
+        for name in os.listdir(self.directory):
+            if name.endswith(".table"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:  # pragma: no cover
+                    pass
+        self._size = 0
+
+
+_OUTPUT_KEYWORDS = frozenset(["stats"])
+"""Keyword arguments of minimisation methods which are only used to return
+information (and so don't affect the minimised table)."""
+
+
+def _method_name(method):
+    """Get a name which identifies a minimisation method between runs."""
+    if isinstance(method, functools.partial):
+        # E.g. a method with a time limit set
+        return "{}(*{!r}, **{!r})".format(
+            _method_name(method.func), method.args,
+            sorted((name, value)
+                   for name, value in (method.keywords or {}).items()
+                   if name not in _OUTPUT_KEYWORDS))
+    else:
+        return "{}.{}".format(
+            getattr(method, "__module__", None),
+            getattr(method, "__name__", None) or repr(method))
+
+
+def _replace(src, dst):
+    """Atomically replace `dst` with `src`."""
+    try:
+        os.replace(src, dst)
+    except AttributeError:  # pragma: no cover
+        # Python 2: rename is atomic on POSIX but may not replace existing
+        # files on Windows, in which case another process has already cached
+        # the same table.
+        try:
+            os.rename(src, dst)
+        except OSError:
+            os.remove(src)
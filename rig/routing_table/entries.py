@@ -3,6 +3,8 @@
 
 from enum import IntEnum
 
+import numpy as np
+
 from rig.utils.docstrings import add_int_enums_to_docstring
 
 from collections import namedtuple
@@ -183,3 +185,193 @@ class Routes(IntEnum):
             return links_strs[self]
         else:
             return str(self.core_num)
+
+
+class RoutingTable(object):
+    """A compact, array-backed, routing table.
+
+    A :py:class:`.RoutingTable` holds the same information as a list of
+    :py:class:`.RoutingTableEntry` but stores the keys, masks, routes and
+    sources of its entries in arrays of 32-bit integers, using 16 bytes per
+    entry rather than several hundred. Routes and sources are stored as bit
+    fields with one bit per :py:class:`.Routes` value (as in the SpiNNaker
+    router) with bit 31 of the sources indicating an unknown (None) source.
+
+    Routing tables behave like (immutable) lists of
+    :py:class:`.RoutingTableEntry` and may be used wherever a list of entries
+    is expected, though the routing table minimisers (and
+    :py:func:`~rig.routing_table.minimise_tables`),
+    :py:func:`~rig.routing_table.table_is_subset_of` and
+    :py:meth:`~rig.machine_control.MachineController.load_routing_tables`
+    work on them directly. For example::
+
+        >>> table = RoutingTable([
+        ...     RoutingTableEntry({Routes.north}, 0x0, 0xf),
+        ...     RoutingTableEntry({Routes.core(1)}, 0x1, 0xf, {Routes.east}),
+        ... ])
+        >>> len(table)
+        2
+        >>> table[1] == RoutingTableEntry({Routes.core(1)}, 0x1, 0xf,
+        ...                               {Routes.east})
+        True
+        >>> table.routes[0] == 1 << Routes.north
+        True
+        >>> table.to_entries() == list(table)
+        True
+
+    Attributes
+    ----------
+    keys, masks, routes, sources : :py:class:`numpy.ndarray`
+        Arrays of uint32s giving the key, mask, route and sources of each
+        entry. These arrays should not be modified.
+    """
+
+    def __init__(self, entries=tuple()):
+        """Create a routing table from a list of entries.
+
+        Parameters
+        ----------
+        entries : [:py:class:`.RoutingTableEntry`, ...]
+        """
+        if isinstance(entries, RoutingTable):
+            self.keys = entries.keys
+            self.masks = entries.masks
+            self.routes = entries.routes
+            self.sources = entries.sources
+            return
+
+        entries = list(entries)
+        self.keys = np.array([e.key for e in entries], dtype=np.uint32)
+        self.masks = np.array([e.mask for e in entries], dtype=np.uint32)
+        self.routes = np.array([_routes_to_bits(e.route) for e in entries],
+                               dtype=np.uint32)
+        self.sources = np.array([_routes_to_bits(e.sources)
+                                 for e in entries], dtype=np.uint32)
+
+    @classmethod
+    def from_arrays(cls, keys, masks, routes, sources=None):
+        """Create a routing table from arrays of keys, masks, route bit
+        fields and source bit fields.
+
+        Parameters
+        ----------
+        keys, masks, routes : array-like
+        sources : array-like or None
+            If None, the sources of all entries are unknown.
+        """
+        table = cls.__new__(cls)
+        table.keys = np.asarray(keys, dtype=np.uint32)
+        table.masks = np.asarray(masks, dtype=np.uint32)
+        table.routes = np.asarray(routes, dtype=np.uint32)
+        if sources is None:
+            table.sources = np.full(len(table.keys), _NO_SOURCE,
+                                    dtype=np.uint32)
+        else:
+            table.sources = np.asarray(sources, dtype=np.uint32)
+
+        if not (len(table.keys) == len(table.masks) == len(table.routes) ==
+                len(table.sources)):
+            raise ValueError("All arrays must have the same length.")
+        return table
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Create a routing table from the form produced by
+        :py:meth:`.to_bytes`."""
+        words = np.frombuffer(data, dtype="<u4").reshape(-1, 4)
+        return cls.from_arrays(*words.T.astype(np.uint32))
+
+    def to_bytes(self):
+        """Get a compact binary representation of the table.
+
+        Each entry is represented by four little-endian 32-bit words: its key,
+        mask, route and sources.
+
+        Returns
+        -------
+        bytes
+        """
+        words = np.empty((len(self), 4), dtype="<u4")
+        words[:, 0] = self.keys
+        words[:, 1] = self.masks
+        words[:, 2] = self.routes
+        words[:, 3] = self.sources
+        return words.tobytes()
+
+    def to_entries(self):
+        """Get the table as a list of :py:class:`.RoutingTableEntry`."""
+        # Many entries usually share the same routes and sources, decode each
+        # combination only once.
+        decoded = {}
+        entries = []
+        for key, mask, route, sources in zip(
+                self.keys.tolist(), self.masks.tolist(),
+                self.routes.tolist(), self.sources.tolist()):
+            route_sources = decoded.get((route, sources))
+            if route_sources is None:
+                route_sources = (_bits_to_routes(route),
+                                 _bits_to_routes(sources))
+                decoded[(route, sources)] = route_sources
+            entries.append(RoutingTableEntry(route_sources[0], key, mask,
+                                             route_sources[1]))
+        return entries
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.to_entries())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return RoutingTable.from_arrays(
+                self.keys[index], self.masks[index], self.routes[index],
+                self.sources[index])
+        else:
+            return RoutingTableEntry(
+                _bits_to_routes(int(self.routes[index])),
+                int(self.keys[index]), int(self.masks[index]),
+                _bits_to_routes(int(self.sources[index])))
+
+    def __eq__(self, other):
+        if isinstance(other, RoutingTable):
+            return (len(self) == len(other) and
+                    bool(np.all(self.keys == other.keys)) and
+                    bool(np.all(self.masks == other.masks)) and
+                    bool(np.all(self.routes == other.routes)) and
+                    bool(np.all(self.sources == other.sources)))
+        elif isinstance(other, (list, tuple)):
+            return self.to_entries() == list(other)
+        else:
+            return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "<{} with {} entries>".format(type(self).__name__, len(self))
+
+
+_NO_SOURCE = 1 << 31
+"""Bit used in a bit field of sources to indicate an unknown source."""
+
+
+def _routes_to_bits(routes):
+    """Convert a set of :py:class:`.Routes` (and possibly None) into a bit
+    field."""
+    bits = 0
+    for route in routes:
+        bits |= _NO_SOURCE if route is None else 1 << route
+    return bits
+
+
+def _bits_to_routes(bits):
+    """Convert a bit field into a set of :py:class:`.Routes` (and possibly
+    None)."""
+    routes = set(r for r in Routes if bits & (1 << r))
+    if bits & _NO_SOURCE:
+        routes.add(None)
+    return routes
@@ -0,0 +1,288 @@
+"""
+Espresso-style Expansion
+========================
+
+A routing table minimiser based on the EXPAND and IRREDUNDANT steps of the
+Espresso two-level logic minimiser.
+
+Background
+----------
+
+The entries of a routing table with a given route may be thought of as a
+boolean function of the routing key which is true for keys which should take
+that route. The keys matched by entries with other routes are the keys for
+which the function must be false (the "OFF-set"). The keys which are not
+matched by any entry are "don't cares": if a packet with such a key were ever
+sent, the original table would not have routed it anywhere sensible.
+
+Minimising the table therefore amounts to finding, for every route, the
+smallest set of key-mask pairs which covers every key matched by entries with
+that route without matching any key in the OFF-set. Unlike
+:py:mod:`~rig.routing_table.ordered_covering`, entries produced by this
+algorithm never overlap keys matched in the original table by entries with
+different routes and so the order of the minimised table is unimportant.
+
+Algorithm
+---------
+
+For each route:
+
+1. EXPAND: Each entry is expanded, one bit at a time, by replacing bits with
+   ``X`` provided that the expanded entry does not match any key in the
+   OFF-set. Each entry is expanded twice: once considering bits in order of
+   increasing significance and once in order of decreasing significance.
+2. IRREDUNDANT: A minimal subset of the expanded entries which together cover
+   all of the original entries with the route is chosen greedily, preferring
+   entries which cover the most original entries.
+
+Finally, any entries which could be replaced by default routing are removed
+(see :py:mod:`~rig.routing_table.remove_default_routes`).
+
+Because it takes advantage of keys which are not matched by the original
+table, this algorithm can often produce significantly smaller tables than
+:py:mod:`~rig.routing_table.ordered_covering`, particularly when only a small
+fraction of the key space is in use. It is, however, unable to exploit the
+ordering of the routing table and so may produce larger tables where the key
+space is densely used.
+
+.. warning::
+
+    As with :py:mod:`~rig.routing_table.ordered_covering`, the input table is
+    assumed to be orthogonal (i.e., there are no two entries which would match
+    the same key).
+"""
+from collections import OrderedDict
+
+import numpy as np
+from six import iteritems
+
+from rig.routing_table import MinimisationFailedError, RoutingTableEntry
+from rig.routing_table.remove_default_routes import \
+    minimise as remove_default_routes
+
+
+def minimise(routing_table, target_length):
+    """Reduce the size of a routing table by expanding entries into unused
+    regions of the key space and removing redundant entries, then removing
+    any remaining default routes.
+
+    .. warning::
+
+        The input routing table *must* also include entries which could be
+        removed and replaced by default routing.
+
+    .. warning::
+
+        It is assumed that the input routing table is orthogonal (i.e., there
+        are no two entries which would match the same key).
+
+    Parameters
+    ----------
+    routing_table : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
+        Routing entries to be minimised.
+    target_length : int or None
+        Target length of the routing table. If None then the table will be
+        made as small as possible.
+
+    Raises
+    ------
+    MinimisationFailedError
+        If the smallest table that can be produced is larger than
+        `target_length`.
+
+    Returns
+    -------
+    [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
+        Reduced routing table entries.
+    """
+    table = espresso(routing_table, target_length, no_raise=True)
+    return remove_default_routes(table, target_length)
+
+
+def espresso(routing_table, target_length, no_raise=False):
+    """Reduce the size of a routing table by expanding entries into unused
+    regions of the key space and removing redundant entries.
+
+    Parameters
+    ----------
+    routing_table : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
+        Routing entries to be minimised.
+    target_length : int or None
+        Target length of the routing table.
+    no_raise : bool
+        If False (the default) then an error will be raised if the table cannot
+        be minimised to be smaller than `target_length` and `target_length` is
+        not None. If True then a table will be returned regardless of the size
+        of the final table.
+
+    Raises
+    ------
+    MinimisationFailedError
+        If the smallest table that can be produced is larger than
+        `target_length` and `no_raise` is False.
+
+    Returns
+    -------
+    [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
+        Reduced routing table entries, in order of increasing generality.
+    """
+    routing_table = list(routing_table)
+    keys = np.array([e.key & e.mask for e in routing_table], dtype=np.uint32)
+    masks = np.array([e.mask for e in routing_table], dtype=np.uint32)
+
+    # Group the entries by route, {route: [index, ...], ...}
+    routes = OrderedDict()
+    for i, entry in enumerate(routing_table):
+        routes.setdefault(frozenset(entry.route), []).append(i)
+
+    new_table = []
+    for route, indices in iteritems(routes):
+        # The OFF-set is every entry with a different route
+        off = np.ones(len(routing_table), dtype=bool)
+        off[indices] = False
+        off_keys = keys[off]
+        off_masks = masks[off]
+
+        # Expand each entry as far as possible (in both directions)
+        expanded = set()
+        for lsb_first in (True, False):
+            expanded.update(_expand(keys[indices], masks[indices], off_keys,
+                                    off_masks, lsb_first))
+
+        # Select the expanded entries required to cover the original entries
+        for key, mask, covered in _irredundant(expanded, keys[indices],
+                                               masks[indices]):
+            sources = set()
+            for i in covered:
+                sources.update(routing_table[indices[i]].sources)
+            new_table.append(RoutingTableEntry(route, key, mask, sources))
+
+    new_table.sort(key=lambda e: (_get_generality(e.mask), e.mask, e.key))
+
+    if (not no_raise and
+            target_length is not None and
+            len(new_table) > target_length):
+        raise MinimisationFailedError(target_length, len(new_table))
+
+    return new_table
+
+
+_SMALL = 1024
+"""When fewer than this many comparisons between key-mask pairs and the
+OFF-set are required, key-mask pairs are expanded without using arrays."""
+
+
+def _expand(keys, masks, off_keys, off_masks, lsb_first=True,
+            chunk_size=1 << 22):
+    """Expand key-mask pairs by replacing bits with Xs, least (or most)
+    significant first, without matching any key matched by a key-mask pair in
+    the OFF-set.
+
+    All of the key-mask pairs are expanded at once, in chunks of up to
+    `chunk_size` comparisons with OFF-set key-mask pairs at a time.
+
+    Yields
+    ------
+    (key, mask)
+        The expanded key-mask pairs.
+    """
+    if len(keys) * len(off_keys) < _SMALL:
+        for key, mask in zip(keys.tolist(), masks.tolist()):
+            yield _expand_one(key, mask, off_keys.tolist(),
+                              off_masks.tolist(), lsb_first)
+        return
+
+    chunk = max(1, chunk_size // max(1, len(off_keys)))
+    for start in range(0, len(keys), chunk):
+        chunk_keys = keys[start:start + chunk]
+        chunk_masks = masks[start:start + chunk].copy()
+
+        # The bits in which each entry differs from each OFF-set entry: an
+        # entry may be expanded provided that it continues to differ from
+        # every OFF-set entry in at least one bit.
+        conflicts = ((chunk_keys[:, np.newaxis] ^ off_keys) & off_masks &
+                     chunk_masks[:, np.newaxis])
+
+        bits = [np.uint32(1 << i) for i in range(32)]
+        if not lsb_first:
+            bits.reverse()
+        for bit in bits:
+            # The entries which could have this bit expanded
+            candidates = np.flatnonzero(chunk_masks & bit)
+            if len(candidates) == 0:
+                continue
+
+            remaining = conflicts[candidates] & ~bit
+            allowed = ~np.any(remaining == 0, axis=1)
+            expanded = candidates[allowed]
+            conflicts[expanded] = remaining[allowed]
+            chunk_masks[expanded] &= ~bit
+
+        for key, mask in zip((chunk_keys & chunk_masks).tolist(),
+                             chunk_masks.tolist()):
+            yield key, mask
+
+
+def _expand_one(key, mask, off_keys, off_masks, lsb_first=True):
+    """Expand a single key-mask pair, as :py:func:`._expand`, using Python
+    integers.
+
+    Returns
+    -------
+    (key, mask)
+    """
+    # The bits in which the entry differs from each OFF-set entry
+    conflicts = set((key ^ k) & m & mask for k, m in zip(off_keys, off_masks))
+
+    bits = [1 << i for i in range(32)]
+    if not lsb_first:
+        bits.reverse()
+    for bit in bits:
+        # The bit may be expanded unless it is the only remaining difference
+        # from some OFF-set entry.
+        if mask & bit and bit not in conflicts and 0 not in conflicts:
+            conflicts = set(c & ~bit for c in conflicts)
+            mask &= ~bit
+
+    return key & mask, mask
+
+
+def _irredundant(expanded, keys, masks):
+    """Greedily select a subset of expanded key-mask pairs which cover all of
+    a set of original key-mask pairs.
+
+    Parameters
+    ----------
+    expanded : {(key, mask), ...}
+        The expanded key-mask pairs, each of which contains at least one of
+        the original key-mask pairs.
+    keys, masks : :py:class:`numpy.ndarray`
+        The original key-mask pairs.
+
+    Yields
+    ------
+    (key, mask, [index, ...])
+        The selected key-mask pairs and the indices of the original key-mask
+        pairs which they were selected to cover.
+    """
+    # For each expanded key-mask pair, the set of original key-mask pairs it
+    # contains.
+    covers = {}
+    for key, mask in sorted(expanded):
+        contained = ((masks & mask) == mask) & ((keys & mask) == key)
+        covers[(key, mask)] = set(np.flatnonzero(contained).tolist())
+
+    uncovered = set(range(len(keys)))
+    while uncovered:
+        # Select the pair covering the most uncovered original pairs
+        (key, mask), covered = max(
+            iteritems(covers),
+            key=lambda kmc: (len(kmc[1] & uncovered), kmc[0]))
+        del covers[(key, mask)]
+        yield key, mask, sorted(covered)
+        uncovered -= covered
+
+
+def _get_generality(mask):
+    """Count the number of Xs in a mask."""
+    return 32 - bin(mask).count("1")
@@ -0,0 +1,240 @@
+"""Emulation of the look-up performed by a SpiNNaker router's TCAM.
+"""
+
+import numpy as np
+
+from rig.routing_table.entries import RoutingTable
+
+
+class RoutingTableLookup(object):
+    """A decision tree which finds the first entry in a routing table which
+    matches a key, as the TCAM in a SpiNNaker router does.
+
+    Each node of the tree tests a single bit of a key. Each leaf corresponds
+    to a region of the key space (a key-mask pair) and records the first
+    entry of the table which matches every key in the region (or that no
+    entry matches). The tree is built directly from the key-mask pairs in the
+    table without expanding their Xs.
+
+    For example::
+
+        >>> from rig.routing_table import RoutingTableEntry, Routes
+        >>> lookup = RoutingTableLookup([
+        ...     RoutingTableEntry({Routes.north}, 0b0000, 0b1111),
+        ...     RoutingTableEntry({Routes.south}, 0b0000, 0b1100),
+        ... ])
+        >>> lookup.lookup(0b0000)
+        0
+        >>> lookup.lookup(0b0011)
+        1
+        >>> lookup.lookup(0b0100) is None
+        True
+
+    Many keys may be looked up at once::
+
+        >>> list(lookup.lookup_many([0b0000, 0b0001, 0b1000]))
+        [0, 1, -1]
+
+    As may every key in a region of the key space::
+
+        >>> for key, mask, entry in lookup.lookup_region(0b0000, 0b1110):
+        ...     print("{:04b} {:04b} {}".format(key, mask & 0xf, entry))
+        0000 1111 0
+        0001 1111 1
+
+    Attributes
+    ----------
+    table : :py:class:`~rig.routing_table.RoutingTable`
+        The routing table.
+    overlaps : [(key, mask), ...]
+        Regions of the key space matched by more than one entry. If empty,
+        the table is orthogonal.
+    """
+
+    def __init__(self, table):
+        """Build the decision tree for a routing table.
+
+        Parameters
+        ----------
+        table : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...] or \
+                :py:class:`~rig.routing_table.RoutingTable`
+        """
+        self.table = RoutingTable(table)
+        self.overlaps = []
+
+        # The tree is stored as lists indexed by node number (with the root
+        # as node 0). Leaves have a bit of 0; internal nodes have an entry of
+        # -1.
+        self._bits = []  # The bit tested by each node
+        self._children = []  # The (zero, one) children of each node
+        self._entries = []  # The entry matched by each leaf (or -1 if none)
+
+        keys = self.table.keys & self.table.masks
+        masks = self.table.masks
+        self._build(keys, masks)
+
+        # Arrays of the above for bulk look-ups
+        self._bits_array = np.array(self._bits, dtype=np.uint32)
+        self._children_array = np.array(self._children,
+                                        dtype=np.intp).reshape(-1, 2)
+        self._entries_array = np.array(self._entries, dtype=np.intp)
+
+    _SMALL = 32
+    """Sets of candidate entries smaller than this are handled using Python
+    lists rather than arrays."""
+
+    def _add_node(self):
+        self._bits.append(0)
+        self._children.append((0, 0))
+        self._entries.append(-1)
+        return len(self._bits) - 1
+
+    def _build(self, keys, masks):
+        """Build the decision tree.
+
+        Parameters
+        ----------
+        keys, masks : :py:class:`numpy.ndarray`
+            The keys (with Xs set to 0) and masks of the table.
+        """
+        # (node, region key, region mask, candidates) where candidates are the
+        # indices of the entries which intersect the region in order of
+        # precedence (either as an array or, when few remain, as a list of
+        # (index, key, mask) tuples).
+        stack = [(self._add_node(), 0x00000000, 0x00000000,
+                  np.arange(len(keys)))]
+        while stack:
+            node, key, mask, candidates = stack.pop()
+            if len(candidates) == 0:
+                # No entry matches this region
+                continue
+
+            # Handle small sets of candidates without arrays
+            if (not isinstance(candidates, list) and
+                    len(candidates) < self._SMALL):
+                candidates = [(int(i), int(keys[i]), int(masks[i]))
+                              for i in candidates]
+
+            # If the first candidate entry matches every key in the region it
+            # is the entry matched in the region.
+            if isinstance(candidates, list):
+                first, _, first_mask = candidates[0]
+            else:
+                first = int(candidates[0])
+                first_mask = int(masks[first])
+            unknown = first_mask & ~mask
+            if not unknown:
+                self._entries[node] = first
+                if len(candidates) > 1:
+                    # Later entries are shadowed by the first
+                    self.overlaps.append((key, mask))
+                continue
+
+            # Otherwise split the region on a bit which the first entry
+            # depends upon. Entries with an X in this bit are in both halves.
+            bit = 1 << (unknown.bit_length() - 1)
+            self._bits[node] = bit
+            zero = self._add_node()
+            one = self._add_node()
+            self._children[node] = (zero, one)
+            if isinstance(candidates, list):
+                stack.append((one, key | bit, mask | bit, [
+                    c for c in candidates if c[1] & bit or not c[2] & bit]))
+                stack.append((zero, key, mask | bit, [
+                    c for c in candidates if not c[1] & bit]))
+            else:
+                candidate_ones = (keys[candidates] & bit) != 0
+                candidate_xs = (masks[candidates] & bit) == 0
+                stack.append((one, key | bit, mask | bit,
+                              candidates[candidate_ones | candidate_xs]))
+                stack.append((zero, key, mask | bit,
+                              candidates[~candidate_ones]))
+
+    def __len__(self):
+        """The number of nodes in the decision tree."""
+        return len(self._bits)
+
+    def lookup(self, key):
+        """Find the first entry which matches a key.
+
+        Returns
+        -------
+        int or None
+            The index of the first matching entry or None if no entry
+            matches.
+        """
+        node = 0
+        while self._bits[node]:
+            node = self._children[node][1 if key & self._bits[node] else 0]
+        entry = self._entries[node]
+        return entry if entry >= 0 else None
+
+    def lookup_many(self, keys):
+        """Find the first entry which matches each of many keys.
+
+        Parameters
+        ----------
+        keys : array-like
+            The keys to look up.
+
+        Returns
+        -------
+        :py:class:`numpy.ndarray`
+            The index of the first matching entry for each key or -1 if no
+            entry matches.
+        """
+        keys = np.asarray(keys, dtype=np.uint32)
+        nodes = np.zeros(len(keys), dtype=np.intp)
+        while True:
+            bits = self._bits_array[nodes]
+            internal = bits != 0
+            if not np.any(internal):
+                return self._entries_array[nodes]
+            ones = ((keys & bits) != 0).astype(np.intp)
+            nodes = np.where(internal, self._children_array[nodes, ones],
+                             nodes)
+
+    def lookup_region(self, key, mask):
+        """Find the entries which match the keys in a region of the key
+        space.
+
+        Parameters
+        ----------
+        key : int
+        mask : int
+            The key-mask pair defining the region.
+
+        Yields
+        ------
+        (key, mask, entry)
+            Disjoint sub-regions which together cover the region given and
+            the index of the first entry matching every key in each sub-region
+            (or -1 if no entry matches).
+        """
+        stack = [(0, key & mask, mask)]
+        while stack:
+            node, key, mask = stack.pop()
+            bit = self._bits[node]
+            if not bit:
+                yield key, mask, self._entries[node]
+            elif mask & bit:
+                # The bit is known in this region
+                stack.append((self._children[node][1 if key & bit else 0],
+                              key, mask))
+            else:
+                # The region is split by the bit
+                zero, one = self._children[node]
+                stack.append((one, key | bit, mask | bit))
+                stack.append((zero, key, mask | bit))
+
+    def regions(self):
+        """Get the regions of the key space which are matched by each entry.
+
+        Yields
+        ------
+        (key, mask, entry)
+            Disjoint regions which together cover the whole key space and the
+            index of the first entry matching every key in each region (or -1
+            if no entry matches).
+        """
+        return self.lookup_region(0x00000000, 0x00000000)
@@ -1,5 +1,8 @@
 import collections
+import functools
+import multiprocessing
 from rig.routing_table import MinimisationFailedError
+from rig.routing_table.entries import RoutingTable
 from rig.routing_table.remove_default_routes import minimise as \
     remove_default_entries
 from rig.routing_table.ordered_covering import minimise as ordered_covering
@@ -7,7 +10,8 @@ from six import iteritems
 
 
 def minimise_tables(routing_tables, target_lengths,
-                    methods=(remove_default_entries, ordered_covering)):
+                    methods=(remove_default_entries, ordered_covering),
+                    processes=None, executor=None, cache=None):
     """Utility function which attempts to minimises routing tables for multiple
     chips.
 
@@ -22,7 +26,10 @@ def minimise_tables(routing_tables, target_lengths,
             :py:class:`~rig.routing_table.RoutingTableEntry`, ...], ...}
         Dictionary mapping chip co-ordinates to the routing tables associated
         with that chip. NOTE: This is the data structure as returned by
-        :py:meth:`~rig.routing_table.routing_tree_to_tables`.
+        :py:meth:`~rig.routing_table.routing_tree_to_tables`. Tables may also
+        be given as :py:class:`~rig.routing_table.RoutingTable`\ s, in which
+        case the corresponding minimised tables are also
+        :py:class:`~rig.routing_table.RoutingTable`\ s.
     target_lengths : int or {(x, y): int or None, ...} or None
         Maximum length of routing tables. If an integer this is assumed to be
         the maximum length for any table; if a dictionary then it is assumed to
@@ -36,6 +43,30 @@ def minimise_tables(routing_tables, target_lengths,
         (:py:meth:`rig.routing_table.remove_default_routes.minimise`) and then
         fall back on the ordered covering algorithm
         (:py:meth:`rig.routing_table.ordered_covering.minimise`).
+    processes : int or None
+        If greater than one, the number of worker processes across which the
+        tables of different chips are minimised in parallel. If None (the
+        default) the tables are minimised one after another in the calling
+        process. Methods must be picklable (e.g. module-level functions) when
+        more than one process is used.
+    executor : object or None
+        Alternatively, an existing executor with a ``submit(f, *args)``
+        method returning futures (e.g. a
+        :py:class:`concurrent.futures.ProcessPoolExecutor` or a
+        :py:class:`rig.utils.parallel.ThreadPool`) to which the minimisation
+        of each table should be submitted. The executor is not shut down
+        afterwards.
+
+    cache : :py:class:`~rig.routing_table.cache.MinimisationCache` or None
+        If given, tables which have previously been minimised (with the same
+        target length and methods) are fetched from this cache rather than
+        minimised again and newly minimised tables are added to it. Tables
+        for which a time-budgeted method ran out of time are not cached (see
+        :py:func:`.minimise_table`).
+
+    When tables are minimised in parallel the largest tables are started
+    first and tables are sent to and from the workers in a compact packed
+    form (see :py:func:`.pack_table`).
 
     Returns
     -------
@@ -46,7 +77,9 @@ def minimise_tables(routing_tables, target_lengths,
     Raises
     ------
     MinimisationFailedError
-        If no method can sufficiently minimise a table.
+        If no method can sufficiently minimise a table. When tables are
+        minimised in parallel, the chip reported is that of the first failure
+        observed rather than necessarily the first in `routing_tables`.
     """
     # Coerce the target lengths into the correct forms
     if not isinstance(target_lengths, dict):
@@ -54,12 +87,16 @@ def minimise_tables(routing_tables, target_lengths,
     else:
         lengths = target_lengths
 
+    if executor is not None or (processes is not None and processes > 1):
+        return _minimise_tables_parallel(routing_tables, lengths, methods,
+                                         processes, executor, cache)
+
     # Minimise the routing tables
     new_tables = dict()
     for chip, table in iteritems(routing_tables):
         # Try to minimise the table
         try:
-            new_table = minimise_table(table, lengths[chip], methods)
+            new_table = minimise_table(table, lengths[chip], methods, cache)
         except MinimisationFailedError as exc:
             exc.chip = chip
             raise
@@ -71,14 +108,156 @@ def minimise_tables(routing_tables, target_lengths,
     return new_tables
 
 
+def _minimise_tables_parallel(routing_tables, lengths, methods, processes,
+                              executor, cache):
+    """Minimise routing tables using a pool of processes or an executor.
+
+    See :py:func:`.minimise_tables`.
+    """
+    new_tables = dict()
+
+    # Look up previously minimised tables before starting any workers
+    cache_keys = dict()
+    if cache is not None:
+        remaining = dict()
+        for chip, table in iteritems(routing_tables):
+            cache_keys[chip] = cache.key(table, lengths[chip], methods)
+            new_table = cache.get(cache_keys[chip])
+            if new_table is None:
+                remaining[chip] = table
+            elif new_table:
+                if isinstance(table, RoutingTable):
+                    new_table = RoutingTable(new_table)
+                new_tables[chip] = new_table
+        routing_tables = remaining
+
+    # Largest tables first so that the longest-running minimisations don't
+    # start last and leave other workers idle.
+    jobs = [(chip, pack_table(table), lengths[chip], tuple(methods))
+            for chip, table in sorted(iteritems(routing_tables),
+                                      key=lambda ct: (-len(ct[1]), ct[0]))]
+    if not jobs:
+        return new_tables
+
+    if executor is not None:
+        futures = [executor.submit(_minimise_packed_table, *job)
+                   for job in jobs]
+        results = (future.result() for future in futures)
+        _unpack_results(results, routing_tables, new_tables, cache,
+                        cache_keys)
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            _unpack_results(pool.imap_unordered(_minimise_packed_table_job,
+                                                jobs, chunksize=1),
+                            routing_tables, new_tables, cache, cache_keys)
+        finally:
+            # Any outstanding work is abandoned if minimisation fails
+            pool.terminate()
+            pool.join()
+
+    return new_tables
+
+
+def _unpack_results(results, routing_tables, new_tables, cache, cache_keys):
+    """Unpack the (chip, packed_table, timed_out) results of minimising many
+    tables into `new_tables` (discarding empty tables) and the cache.
+
+    Minimised tables are unpacked into the same type as the original tables.
+    """
+    for chip, data, timed_out in results:
+        if isinstance(routing_tables[chip], RoutingTable):
+            new_table = RoutingTable.from_bytes(data)
+        else:
+            new_table = unpack_table(data)
+        if cache is not None and not timed_out:
+            cache.put(cache_keys[chip], new_table)
+        if new_table:
+            new_tables[chip] = new_table
+
+
+def _minimise_packed_table(chip, data, target_length, methods):
+    """Minimise a packed routing table (in a worker process).
+
+    Returns
+    -------
+    ((x, y), bytes, timed_out)
+        The chip, the minimised, packed, routing table and whether any
+        time-budgeted method ran out of time (see
+        :py:func:`._minimise_table_timed`).
+
+    Raises
+    ------
+    MinimisationFailedError
+        With the `chip` attribute set.
+    """
+    try:
+        new_table, timed_out = _minimise_table_timed(
+            RoutingTable.from_bytes(data), target_length, methods)
+    except MinimisationFailedError as exc:
+        exc.chip = chip
+        raise
+    return chip, pack_table(new_table), timed_out
+
+
+def _minimise_packed_table_job(job):
+    """Unpack the arguments for :py:func:`._minimise_packed_table`."""
+    return _minimise_packed_table(*job)
+
+
+def pack_table(table):
+    """Pack a routing table into a compact binary form.
+
+    Each entry is packed into 16 bytes holding its key, mask and its route and
+    sources as bit fields (with one bit per :py:class:`~.Routes` value, as in
+    the SpiNNaker router). This is far smaller and quicker to send between
+    processes than a pickled list of
+    :py:class:`~rig.routing_table.RoutingTableEntry`.
+
+    For example::
+
+        >>> from rig.routing_table import RoutingTableEntry, Routes
+        >>> table = [RoutingTableEntry({Routes.north}, 0x1, 0xf)]
+        >>> unpack_table(pack_table(table)) == table
+        True
+
+    Parameters
+    ----------
+    table : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...] or \
+            :py:class:`~rig.routing_table.RoutingTable`
+
+    Returns
+    -------
+    bytes
+        As produced by :py:meth:`rig.routing_table.RoutingTable.to_bytes`.
+    """
+    return RoutingTable(table).to_bytes()
+
+
+def unpack_table(data):
+    """Unpack a routing table packed by :py:func:`.pack_table`.
+
+    Parameters
+    ----------
+    data : bytes
+
+    Returns
+    -------
+    [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
+    """
+    return RoutingTable.from_bytes(data).to_entries()
+
+
 def minimise_table(table, target_length,
-                   methods=(remove_default_entries, ordered_covering)):
+                   methods=(remove_default_entries, ordered_covering),
+                   cache=None):
     """Apply different minimisation algorithms to minimise a single routing
     table.
 
     Parameters
     ----------
-    table : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
+    table : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...] or \
+            :py:class:`~rig.routing_table.RoutingTable`
         Routing table to minimise.  NOTE: This is the data structure as
         returned by :py:meth:`~rig.routing_table.routing_tree_to_tables`.
     target_length : int or None
@@ -92,24 +271,67 @@ def minimise_table(table, target_length,
         (:py:meth:rig.routing_table.remove_default_routes.minimise) and then
         fall back on the ordered covering algorithm
         (:py:meth:rig.routing_table.ordered_covering.minimise).
+    cache : :py:class:`~rig.routing_table.cache.MinimisationCache` or None
+        If given, a cache of previously minimised tables to use and update.
+
+        The result of a time-budgeted method (e.g.
+        ``partial(ordered_covering.minimise, timeout=1.0)``) depends on how
+        much time was available. Results for which such a method stopped
+        because it ran out of time are therefore not added to the cache.
 
     Returns
     -------
-    [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
+    [:py:class:`~rig.routing_table.RoutingTableEntry`, ...] or \
+            :py:class:`~rig.routing_table.RoutingTable`
         Minimised routing table, guaranteed to be at least as small as
         `target_length`, or as small as possible if `target_length` is None.
+        The minimised table is of the same type as `table`.
+
+        :py:class:`~rig.routing_table.RoutingTable`\ s are only converted
+        into lists of entries (which is costly for large tables) when a
+        method which does not work on them directly is tried. Checking
+        whether a table already fits and
+        :py:func:`rig.routing_table.remove_default_routes.minimise` do not
+        require this conversion.
 
     Raises
     ------
     MinimisationFailedError
         If no method can sufficiently minimise the table.
     """
+    if cache is not None:
+        key = cache.key(table, target_length, methods)
+        new_table = cache.get(key)
+        if new_table is None:
+            new_table, timed_out = _minimise_table_timed(
+                table, target_length, methods)
+            if not timed_out:
+                cache.put(key, new_table)
+        elif isinstance(table, RoutingTable):
+            new_table = RoutingTable(new_table)
+        return new_table
+
     # Add a final method which checks the size of the table and returns it if
     # the size is correct. NOTE: This method will avoid running any other
     # minimisers if the table is already sufficiently small.
     methods = list(methods)
     methods.insert(0, _identity)
 
+    if isinstance(table, RoutingTable):
+        # Other methods are given the table as a list of entries, converted
+        # (at most) once.
+        entries = []
+
+        def on_entries(method):
+            def f(table, target_length):
+                if not entries:
+                    entries.append(table.to_entries())
+                return RoutingTable(method(entries[0], target_length))
+            return f
+
+        methods = [f if f in _ROUTING_TABLE_METHODS else on_entries(f)
+                   for f in methods]
+
     if target_length is not None:
         best_achieved = len(table)
 
@@ -132,8 +354,54 @@ def minimise_table(table, target_length,
         return min((f(table, target_length) for f in methods), key=len)
 
 
+def _minimise_table_timed(table, target_length, methods):
+    """Minimise a table (as :py:func:`.minimise_table`) and report whether
+    any time-budgeted method ran out of time.
+
+    Time-budgeted methods are :py:func:`functools.partial` applications with
+    a `timeout` keyword argument. Such methods must also accept a `stats`
+    dictionary (as :py:func:`rig.routing_table.ordered_covering.minimise`
+    does) which is used to determine why they stopped.
+
+    Each time-budgeted method is given a new `stats` dictionary so that
+    stale statistics (or those written by other threads sharing the same
+    method) are never inspected. If the method already had a `stats`
+    dictionary, the new statistics are copied into it afterwards.
+
+    Returns
+    -------
+    (table, timed_out)
+    """
+    # [(stats, callers_stats or None), ...]
+    all_stats = []
+    tracked_methods = []
+    for method in methods:
+        keywords = getattr(method, "keywords", None) or {}
+        if (isinstance(method, functools.partial) and
+                keywords.get("timeout") is not None):
+            stats = {}
+            all_stats.append((stats, keywords.get("stats")))
+            method = functools.partial(method, stats=stats)
+        tracked_methods.append(method)
+
+    try:
+        new_table = minimise_table(table, target_length, tracked_methods)
+    finally:
+        for stats, callers_stats in all_stats:
+            if callers_stats is not None and stats:
+                callers_stats.update(stats)
+    timed_out = any(stats.get("stop_reason") == "timeout"
+                    for stats, _ in all_stats)
+    return new_table, timed_out
+
+
 def _identity(table, target_length):
     """Identity minimisation function."""
     if target_length is None or len(table) < target_length:
         return table
     raise MinimisationFailedError(target_length, len(table))
+
+
+_ROUTING_TABLE_METHODS = (_identity, remove_default_entries)
+"""Minimisation methods which work on
+:py:class:`~rig.routing_table.RoutingTable`\ s directly."""
@@ -124,14 +124,18 @@ As a heuristic:
       generality. If ``XX00`` were already present in the table the new entry
       ``0XX0`` must be inserted below it.
 """
-from collections import namedtuple
+from collections import defaultdict, namedtuple, OrderedDict
+import time
+import numpy as np
+from six import iteritems, itervalues
 from rig.routing_table import MinimisationFailedError, RoutingTableEntry
 from rig.routing_table.remove_default_routes import \
     minimise as remove_default_routes
 from rig.routing_table.utils import intersect
 
 
-def minimise(routing_table, target_length):
+def minimise(routing_table, target_length, timeout=None, max_iterations=None,
+             stats=None):
     """Reduce the size of a routing table by merging together entries where
     possible and by removing any remaining default routes.
 
@@ -170,6 +174,18 @@ def minimise(routing_table, target_length):
         halt once either this target is reached or no further minimisation is
         possible. If None then the table will be made as small as possible.
 
+    Other Parameters
+    ----------------
+    timeout : float or None
+    max_iterations : int or None
+    stats : dict or None
+        See :py:func:`.ordered_covering`. To limit the time spent minimising
+        tables with :py:func:`~rig.routing_table.minimise_tables`, use
+        :py:func:`functools.partial` to set these, e.g.::
+
+            methods = (remove_default_routes.minimise,
+                       partial(ordered_covering.minimise, timeout=1.0))
+
     Raises
     ------
     MinimisationFailedError
@@ -181,12 +197,15 @@ def minimise(routing_table, target_length):
     [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
         Reduced routing table entries.
     """
-    table, _ = ordered_covering(routing_table, target_length, no_raise=True)
+    table, _ = ordered_covering(routing_table, target_length, no_raise=True,
+                                timeout=timeout,
+                                max_iterations=max_iterations, stats=stats)
     return remove_default_routes(table, target_length)
 
 
 def ordered_covering(routing_table, target_length, aliases=dict(),
-                     no_raise=False):
+                     no_raise=False, timeout=None, max_iterations=None,
+                     stats=None):
     """Reduce the size of a routing table by merging together entries where
     possible.
 
@@ -239,6 +258,31 @@ def ordered_covering(routing_table, target_length, aliases=dict(),
         be minimised to be smaller than `target_length` and `target_length` is
         not None. If True then a table will be returned regardless of the size
         of the final table.
+    timeout : float or None
+        If not None, the maximum time (in seconds) to spend merging entries.
+        Every merge produces a valid table which is smaller than the last and
+        so, once the time is up, the table produced by the last merge is
+        returned (or, if it is larger than `target_length`, an error is
+        raised as usual).
+    max_iterations : int or None
+        If not None, the maximum number of merges to apply.
+    stats : dict or None
+        If a dictionary is given it is updated with statistics about the
+        minimisation:
+
+        ``"iterations"``
+            The number of merges applied.
+        ``"time"``
+            The time spent, in seconds.
+        ``"length"``
+            The length of the table produced.
+        ``"remaining"``
+            The number of entries by which the table exceeds `target_length`
+            (or None if `target_length` is None).
+        ``"stop_reason"``
+            Why minimisation stopped: ``"target_length"`` if the target was
+            reached, ``"no_merges"`` if no further merges were possible,
+            ``"timeout"`` or ``"max_iterations"``.
 
     Raises
     ------
@@ -253,6 +297,9 @@ def ordered_covering(routing_table, target_length, aliases=dict(),
     {(key, mask): {(key, mask), ...}, ...}
         A new aliases dictionary.
     """
+    start_time = time.time()
+    deadline = start_time + timeout if timeout is not None else None
+
     # Copy the aliases dictionary
     aliases = dict(aliases)
 
@@ -263,17 +310,49 @@ def ordered_covering(routing_table, target_length, aliases=dict(),
         key=lambda entry: _get_generality(entry.key, entry.mask)
     )
 
-    while target_length is None or len(routing_table) > target_length:
+    # Index of the merges possible in the table which is kept up to date as
+    # merges are applied.
+    index = _MergeIndex(routing_table)
+
+    iterations = 0
+    while True:
+        if target_length is not None and len(routing_table) <= target_length:
+            stop_reason = "target_length"
+            break
+        if max_iterations is not None and iterations >= max_iterations:
+            stop_reason = "max_iterations"
+            break
+
         # Get the best merge
-        merge = _get_best_merge(routing_table, aliases)
+        merge = index.get_best_merge(routing_table, aliases, deadline)
+
+        # If time ran out while searching for a merge then stop
+        if merge is None:
+            stop_reason = "timeout"
+            break
 
         # If there is no merge then stop
         if merge.goodness <= 0:
+            stop_reason = "no_merges"
             break
 
         # Otherwise apply the merge, this returns a new routing table and a new
         # aliases dictionary.
         routing_table, aliases = merge.apply(aliases)
+        index.update(merge, routing_table, aliases)
+        iterations += 1
+
+        if deadline is not None and time.time() >= deadline:
+            stop_reason = "timeout"
+            break
+
+    if stats is not None:
+        stats["iterations"] = iterations
+        stats["time"] = time.time() - start_time
+        stats["length"] = len(routing_table)
+        stats["remaining"] = (max(0, len(routing_table) - target_length)
+                              if target_length is not None else None)
+        stats["stop_reason"] = stop_reason
 
     # If the table is still too big then raise an error
     if (not no_raise and
@@ -298,8 +377,8 @@ def _get_generality(key, mask):
         >>> _get_generality(0xffffffff, 0xffffffff)
         0
     """
-    xs = (~key) & (~mask)
-    return sum(1 for i in range(32) if xs & (1 << i))
+    xs = (~key) & (~mask) & 0xffffffff
+    return bin(xs).count("1")
 
 
 def _get_best_merge(routing_table, aliases):
@@ -343,30 +422,180 @@ def _get_all_merges(routing_table):
     ------
     :py:class:`~.Merge`
     """
-    # Memorise entries that have been considered as part of a merge
-    considered_entries = set()
-
+    # Group the entries by route, in the order in which each route first
+    # appears in the table.
+    groups = OrderedDict()
     for i, entry in enumerate(routing_table):
-        # If we've already considered this entry then skip
-        if i in considered_entries:
-            continue
-
-        # Construct a merge by including other routing table entries below this
-        # one which have equivalent routes.
-        merge = set([i])
-        merge.update(
-            j for j, other_entry in enumerate(routing_table[i+1:], start=i+1)
-            if entry.route == other_entry.route
-        )
-
-        # Mark all these entries as considered
-        considered_entries.update(merge)
+        groups.setdefault(frozenset(entry.route), []).append(i)
 
+    for merge in itervalues(groups):
         # If the merge contains multiple entries then yield it
         if len(merge) > 1:
             yield _Merge(routing_table, merge)
 
 
+class _MergeIndex(object):
+    """An index of the best valid merge of each group of entries with
+    equivalent routes which is maintained as merges are applied.
+
+    :py:func:`._get_best_merge` refines every possible merge each time it is
+    called. However, applying a merge only removes some entries from the
+    table and inserts a new one (whose aliases are those of the removed
+    entries) so most refined merges are unaffected. Every merge considered
+    while refining a group's merge is contained within the key-mask pair
+    produced by merging the whole group. Consequently, the refined merge of a
+    group need only be recomputed when:
+
+    * :py:func:`._refine_downcheck` might now be covering one of the aliases
+      of the new entry, i.e., an alias intersects the group's key-mask pair.
+    * :py:func:`._refine_upcheck` might now find the new entry (or no longer
+      find a removed entry) between an entry of the group and the insertion
+      point of the merge, i.e., the entry intersects the group's key-mask
+      pair and is less general.
+
+    The merges chosen are exactly those which would be chosen by
+    :py:func:`._get_best_merge`.
+    """
+
+    def __init__(self, routing_table):
+        # {route: [entry, ...], ...}
+        self._groups = defaultdict(list)
+        for entry in routing_table:
+            self._groups[frozenset(entry.route)].append(entry)
+
+        # The result of refining the merge of each group:
+        # {route: (key, mask, generality, goodness, [entry, ...] or None), ...}
+        # where the key, mask and generality are those produced by merging the
+        # whole group. If the refinement was abandoned because the merge was
+        # no better than another merge, the goodness is an upper bound and the
+        # list of entries is None.
+        self._refined = {}
+
+    def get_best_merge(self, routing_table, aliases, deadline=None):
+        """Get the merge which would combine the greatest number of entries.
+
+        Parameters
+        ----------
+        routing_table : [:py:class:`~rig.routing_table.RoutingTableEntry`, \
+                        ...]
+            The current routing table, which must contain every entry given to
+            the index (or produced by applied merges) in increasing order of
+            generality.
+        aliases : {(key, mask): {(key, mask), ...}, ...}
+        deadline : float or None
+            If not None, the :py:func:`time.time` after which the search is
+            abandoned.
+
+        Returns
+        -------
+        :py:class:`~.Merge` or None
+            The best merge or None if the deadline passed before it was found.
+        """
+        # NB: Entries are identified by identity since the indices of entries
+        # change as merges are applied.
+        positions = dict((id(entry), i) for i, entry in
+                         enumerate(routing_table))
+
+        # Consider the groups in the same order as _get_all_merges so that
+        # ties are broken in the same way.
+        groups = sorted(
+            (min(positions[id(e)] for e in entries), route)
+            for route, entries in iteritems(self._groups)
+            if len(entries) > 1
+        )
+
+        # Array-backed copy of the table, built when first required
+        arrays = None
+
+        best_entries = None
+        best_goodness = 0
+        for _, route in groups:
+            refined = self._refined.get(route)
+            if refined is None:
+                # Not refined: the upper bound is the unrefined goodness
+                goodness = len(self._groups[route]) - 1
+                entries = None
+            else:
+                goodness, entries = refined[3:]
+
+            if goodness <= best_goodness:
+                continue
+
+            if entries is None:
+                if deadline is not None and time.time() >= deadline:
+                    return None
+
+                # Refine the merge (again)
+                if arrays is None:
+                    arrays = _TableArrays(routing_table, aliases)
+                merge = _Merge(routing_table, set(
+                    positions[id(e)] for e in self._groups[route]))
+                refined_merge = _refine_merge(merge, aliases, best_goodness,
+                                              arrays)
+                if refined_merge.goodness > best_goodness:
+                    goodness = refined_merge.goodness
+                    entries = [routing_table[i]
+                               for i in refined_merge.entries]
+                else:
+                    goodness = best_goodness
+                self._refined[route] = (merge.key, merge.mask,
+                                        merge.generality, goodness, entries)
+
+            if entries is not None and goodness > best_goodness:
+                best_entries = entries
+                best_goodness = goodness
+
+        if best_entries is None:
+            return _Merge(routing_table)
+        else:
+            return _Merge(routing_table,
+                          set(positions[id(e)] for e in best_entries))
+
+    def update(self, merge, routing_table, aliases):
+        """Update the index after a merge has been applied.
+
+        Parameters
+        ----------
+        merge : :py:class:`~.Merge`
+            The merge which was applied.
+        routing_table : [:py:class:`~rig.routing_table.RoutingTableEntry`, \
+                        ...]
+        aliases : {(key, mask): {(key, mask), ...}, ...}
+            The routing table and aliases produced by applying the merge.
+        """
+        # Find the new entry in the new table
+        new_index = merge.insertion_index - sum(
+            1 for i in merge.entries if i < merge.insertion_index)
+        new_entry = routing_table[new_index]
+        route = frozenset(new_entry.route)
+
+        # Replace the merged entries with the new entry
+        removed = [merge.routing_table[i] for i in merge.entries]
+        removed_ids = set(id(e) for e in removed)
+        self._groups[route] = [e for e in self._groups[route]
+                               if id(e) not in removed_ids]
+        self._groups[route].append(new_entry)
+        self._refined.pop(route, None)
+
+        # Invalidate the refined merges which may have been affected
+        new_aliases = aliases[(merge.key, merge.mask)]
+        moved = [(e.key, e.mask, _get_generality(e.key, e.mask))
+                 for e in removed]
+        moved.append((merge.key, merge.mask, merge.generality))
+        for other_route, refined in list(iteritems(self._refined)):
+            key, mask, generality = refined[:3]
+
+            # NB: The new entry contains all of its aliases and all of the
+            # removed entries.
+            if not intersect(key, mask, merge.key, merge.mask):
+                continue
+
+            if (any(intersect(key, mask, k, m) for k, m in new_aliases) or
+                    any(g < generality and intersect(key, mask, k, m)
+                        for k, m, g in moved)):
+                del self._refined[other_route]
+
+
 def _get_insertion_index(routing_table, generality):
     """Determine the index in the routing table where a new entry should be
     inserted.
@@ -513,7 +742,7 @@ class _Merge(namedtuple("_Merge", ["routing_table", "entries", "key", "mask",
         return new_table, aliases
 
 
-def _refine_merge(merge, aliases, min_goodness):
+def _refine_merge(merge, aliases, min_goodness, arrays=None):
     """Remove entries from a merge to generate a valid merge which may be
     applied to the routing table.
 
@@ -526,6 +755,9 @@ def _refine_merge(merge, aliases, min_goodness):
         represent.
     min_goodness : int
         Reject merges which are worse than the minimum goodness.
+    arrays : :py:class:`._TableArrays` or None
+        If given, an array-backed copy of the routing table and aliases which
+        is used to perform the checks in bulk. The result is the same.
 
     Returns
     -------
@@ -533,24 +765,24 @@ def _refine_merge(merge, aliases, min_goodness):
         Valid merge which may be applied to the routing table.
     """
     # Perform the down-check
-    merge = _refine_downcheck(merge, aliases, min_goodness)
+    merge = _refine_downcheck(merge, aliases, min_goodness, arrays)
 
     # If the merge is still sufficiently good then continue to refine it.
     if merge.goodness > min_goodness:
         # Perform the up-check
-        merge, changed = _refine_upcheck(merge, min_goodness)
+        merge, changed = _refine_upcheck(merge, min_goodness, arrays)
 
         if changed and merge.goodness > min_goodness:
             # If the up-check removed any entries we need to re-perform the
             # down-check; but we do not need to re-perform the up-check as the
             # down check can only move the resultant merge nearer the top of
             # the routing table.
-            merge = _refine_downcheck(merge, aliases, min_goodness)
+            merge = _refine_downcheck(merge, aliases, min_goodness, arrays)
 
     return merge
 
 
-def _refine_upcheck(merge, min_goodness):
+def _refine_upcheck(merge, min_goodness, arrays=None):
     """Remove from the merge any entries which would be covered by entries
     between their current position and the merge insertion position.
 
@@ -565,6 +797,13 @@ def _refine_upcheck(merge, min_goodness):
     new entry ``XXXX`` which would move ``1000`` below the entry with the
     key-mask pair of ``X000``, which would cover it.
 
+    Parameters
+    ----------
+    arrays : :py:class:`._TableArrays` or None
+        If given, an array-backed copy of the routing table used to check each
+        entry against all of the entries between it and the insertion position
+        at once.
+
     Returns
     -------
     :py:class:`~.Merge`
@@ -582,8 +821,14 @@ def _refine_upcheck(merge, min_goodness):
         # covered up by any of them then we remove it from the merge.
         entry = merge.routing_table[i]
         key, mask = entry.key, entry.mask
-        if any(intersect(key, mask, other.key, other.mask) for other in
-               merge.routing_table[i+1:merge.insertion_index]):
+        if arrays is not None:
+            covered = arrays.any_intersect(key, mask, i + 1,
+                                           merge.insertion_index)
+        else:
+            covered = any(intersect(key, mask, other.key, other.mask)
+                          for other in
+                          merge.routing_table[i+1:merge.insertion_index])
+        if covered:
             # The entry would be partially or wholly covered by another entry,
             # remove it from the merge and return a new merge.
             merge = _Merge(merge.routing_table, merge.entries - {i})
@@ -598,7 +843,7 @@ def _refine_upcheck(merge, min_goodness):
     return merge, changed
 
 
-def _refine_downcheck(merge, aliases, min_goodness):
+def _refine_downcheck(merge, aliases, min_goodness, arrays=None):
     """Prune the merge to avoid it covering up any entries which are below the
     merge insertion position.
 
@@ -632,6 +877,13 @@ def _refine_downcheck(merge, aliases, min_goodness):
         000X1 -> N S
         XX1XX -> 3 5
 
+    Parameters
+    ----------
+    arrays : :py:class:`._TableArrays` or None
+        If given, an array-backed copy of the routing table and aliases used to
+        find the covered entries, and the bits which could be set to avoid
+        covering them, in bulk.
+
     Returns
     -------
     :py:class:`~.Merge`
@@ -725,38 +977,45 @@ def _refine_downcheck(merge, aliases, min_goodness):
     # While the merge is still worth considering continue to perform the
     # down-check.
     while merge.goodness > min_goodness:
-        covered = list(_get_covered_keys_and_masks(merge, aliases))
+        if arrays is not None:
+            most_stringent, bits_and_vals = \
+                arrays.get_most_stringent_bits_and_vals(merge)
+            if most_stringent is None:
+                # No covered entries: the merge is valid
+                break
+        else:
+            covered = list(_get_covered_keys_and_masks(merge, aliases))
 
-        # If there are no covered entries (the merge is valid) then break out
-        # of the loop.
-        if not covered:
-            break
+            # If there are no covered entries (the merge is valid) then break
+            # out of the loop.
+            if not covered:
+                break
 
-        # For each covered entry work out which bits in the key-mask pair which
-        # are not Xs are not covered by Xs in the merge key-mask pair. Only
-        # keep track of the entries which have the fewest bits that we could
-        # set.
-        most_stringent = 33  # Not at all stringent
-        bits_and_vals = set()
-        for key, mask in covered:
-            # Get the bit positions where there ISN'T an X in the covered entry
-            # but there IS an X in the merged entry.
-            settable = mask & ~merge.mask
-
-            # Count the number of settable bits, if this is a more stringent
-            # constraint than the previous constraint then ensure that we
-            # record the new stringency and store which bits we need to set to
-            # meet the constraint.
-            n_settable = sum(1 for bit in all_bits if bit & settable)
-            if n_settable <= most_stringent:
-                if n_settable < most_stringent:
-                    most_stringent = n_settable
-                    bits_and_vals = set()
-
-                # Add this settable mask and the required values to the
-                # settables list.
-                bits_and_vals.update((bit, not (key & bit)) for bit in
-                                     all_bits if bit & settable)
+            # For each covered entry work out which bits in the key-mask pair
+            # which are not Xs are not covered by Xs in the merge key-mask
+            # pair. Only keep track of the entries which have the fewest bits
+            # that we could set.
+            most_stringent = 33  # Not at all stringent
+            bits_and_vals = set()
+            for key, mask in covered:
+                # Get the bit positions where there ISN'T an X in the covered
+                # entry but there IS an X in the merged entry.
+                settable = mask & ~merge.mask
+
+                # Count the number of settable bits, if this is a more
+                # stringent constraint than the previous constraint then
+                # ensure that we record the new stringency and store which
+                # bits we need to set to meet the constraint.
+                n_settable = sum(1 for bit in all_bits if bit & settable)
+                if n_settable <= most_stringent:
+                    if n_settable < most_stringent:
+                        most_stringent = n_settable
+                        bits_and_vals = set()
+
+                    # Add this settable mask and the required values to the
+                    # settables list.
+                    bits_and_vals.update((bit, not (key & bit)) for bit in
+                                         all_bits if bit & settable)
 
         if most_stringent == 0:
             # If are there any instances where we could not possibly change a
@@ -769,20 +1028,30 @@ def _refine_downcheck(merge, aliases, min_goodness):
             # resultant key-mask to avoid covering a lower entry. Prefer to
             # modify more significant bits of the key mask.
             remove = set()  # Entries to remove
+            if arrays is not None:
+                entries = np.array(sorted(merge.entries))
+                entry_keys = arrays.keys[entries]
+                entry_masks = arrays.masks[entries]
             for bit, val in sorted(bits_and_vals, reverse=True):
-                working_remove = set()  # Holder for working remove set
-
-                for i in merge.entries:
-                    entry = merge.routing_table[i]
-
-                    if ((not entry.mask & bit) or
-                            (bool(entry.key & bit) is (not val))):
-                        # If the entry has an X in this position then it will
-                        # need to be removed regardless of whether we want to
-                        # set a 0 or a 1 in this position, likewise it will
-                        # need to be removed if it is a 0 and we want a 1 or
-                        # vice-versa.
-                        working_remove.add(i)
+                if arrays is not None:
+                    # As below, for all entries at once
+                    working_remove = set(entries[
+                        ((entry_masks & bit) == 0) |
+                        (((entry_keys & bit) != 0) == (not val))].tolist())
+                else:
+                    working_remove = set()  # Holder for working remove set
+
+                    for i in merge.entries:
+                        entry = merge.routing_table[i]
+
+                        if ((not entry.mask & bit) or
+                                (bool(entry.key & bit) is (not val))):
+                            # If the entry has an X in this position then it
+                            # will need to be removed regardless of whether we
+                            # want to set a 0 or a 1 in this position,
+                            # likewise it will need to be removed if it is a 0
+                            # and we want a 1 or vice-versa.
+                            working_remove.add(i)
 
                 # If the current remove set is empty or the new remove set is
                 # smaller update the remove set.
@@ -801,7 +1070,7 @@ def _refine_downcheck(merge, aliases, min_goodness):
     return merge
 
 
-def _get_covered_keys_and_masks(merge, aliases):
+def _get_covered_keys_and_masks(merge, aliases, arrays=None):
     """Get keys and masks which would be covered by the entry resulting from
     the merge.
 
@@ -810,6 +1079,9 @@ def _get_covered_keys_and_masks(merge, aliases):
     aliases : {(key, mask): {(key, mask), ...}, ...}
         Map of key-mask pairs to the sets of key-mask pairs that they actually
         represent.
+    arrays : :py:class:`._TableArrays` or None
+        If given, an array-backed copy of the routing table and aliases used to
+        find all of the covered keys and masks at once.
 
     Yields
     ------
@@ -817,6 +1089,13 @@ def _get_covered_keys_and_masks(merge, aliases):
         Pairs of keys and masks which would be covered if the given `merge`
         were to be applied to the routing table.
     """
+    if arrays is not None:
+        keys, masks = arrays.get_covered(merge.key, merge.mask,
+                                         merge.insertion_index)
+        for key, mask in zip(keys.tolist(), masks.tolist()):
+            yield key, mask
+        return
+
     # For every entry in the table below the insertion index see which keys
     # and masks would overlap with the key and mask of the merged entry.
     for entry in merge.routing_table[merge.insertion_index:]:
@@ -826,3 +1105,111 @@ def _get_covered_keys_and_masks(merge, aliases):
         for key, mask in keys_masks:
             if intersect(merge.key, merge.mask, key, mask):
                 yield key, mask
+
+
+class _TableArrays(object):
+    """An array-backed copy of a routing table and its aliases which allows
+    the checks made while refining merges to be performed in bulk.
+
+    Attributes
+    ----------
+    keys, masks : :py:class:`numpy.ndarray`
+        The key and mask of every entry in the table (as uint32s).
+    generality : :py:class:`numpy.ndarray`
+        The generality of every entry in the table.
+    alias_keys, alias_masks : :py:class:`numpy.ndarray`
+        The keys and masks of the aliases of every entry in the table (or the
+        key and mask of the entry itself if it has no aliases), flattened in
+        table order.
+    alias_starts : :py:class:`numpy.ndarray`
+        The index in `alias_keys` and `alias_masks` of the first alias of each
+        entry.
+    """
+
+    def __init__(self, routing_table, aliases):
+        self.keys = np.array([e.key for e in routing_table], dtype=np.uint32)
+        self.masks = np.array([e.mask for e in routing_table],
+                              dtype=np.uint32)
+        self.generality = _popcount(~self.keys & ~self.masks)
+
+        alias_keys = []
+        alias_masks = []
+        self.alias_starts = np.empty(len(routing_table) + 1, dtype=np.intp)
+        for i, entry in enumerate(routing_table):
+            self.alias_starts[i] = len(alias_keys)
+            key_mask = (entry.key, entry.mask)
+            for key, mask in aliases.get(key_mask, [key_mask]):
+                alias_keys.append(key)
+                alias_masks.append(mask)
+        self.alias_starts[-1] = len(alias_keys)
+        self.alias_keys = np.array(alias_keys, dtype=np.uint32)
+        self.alias_masks = np.array(alias_masks, dtype=np.uint32)
+
+    def any_intersect(self, key, mask, start, stop):
+        """Does a key-mask pair intersect any of the entries in a slice of the
+        table?
+        """
+        return bool(np.any(((self.keys[start:stop] ^ key) &
+                            self.masks[start:stop] & mask) == 0))
+
+    def get_covered(self, key, mask, start):
+        """Get the aliases of the entries from `start` onwards which intersect
+        a key-mask pair.
+
+        Returns
+        -------
+        keys, masks : :py:class:`numpy.ndarray`
+        """
+        first = self.alias_starts[start]
+        keys = self.alias_keys[first:]
+        masks = self.alias_masks[first:]
+        selected = ((keys ^ key) & masks & mask) == 0
+        return keys[selected], masks[selected]
+
+    def get_most_stringent_bits_and_vals(self, merge):
+        """Find the bits (and values) which could be set in a merged entry to
+        avoid covering those entries below it which most constrain it.
+
+        See :py:func:`._refine_downcheck`.
+
+        Returns
+        -------
+        most_stringent : int or None
+            The fewest bits which could be set to avoid covering any entry or
+            None if no entries are covered.
+        bits_and_vals : {(bit, bool), ...}
+        """
+        keys, masks = self.get_covered(merge.key, merge.mask,
+                                       merge.insertion_index)
+        if len(keys) == 0:
+            return None, set()
+
+        # Bits which are not Xs in the covered entries but are in the merge
+        settable = masks & np.uint32(~merge.mask & 0xffffffff)
+        n_settable = _popcount(settable)
+        most_stringent = int(n_settable.min())
+
+        # Of the most stringent entries, which bits have a 0 (and so must be
+        # set to 1) and which a 1.
+        stringent = n_settable == most_stringent
+        settable = settable[stringent]
+        keys = keys[stringent]
+        zeros = int(np.bitwise_or.reduce(settable & ~keys))
+        ones = int(np.bitwise_or.reduce(settable & keys))
+        bits_and_vals = set()
+        for i in range(32):
+            bit = 1 << i
+            if zeros & bit:
+                bits_and_vals.add((bit, True))
+            if ones & bit:
+                bits_and_vals.add((bit, False))
+        return most_stringent, bits_and_vals
+
+
+def _popcount(values):
+    """Count the set bits in each element of an array of uint32s."""
+    values = values - ((values >> 1) & np.uint32(0x55555555))
+    values = ((values & np.uint32(0x33333333)) +
+              ((values >> 2) & np.uint32(0x33333333)))
+    values = (values + (values >> 4)) & np.uint32(0x0f0f0f0f)
+    return (values * np.uint32(0x01010101)) >> 24
@@ -1,4 +1,10 @@
+from bisect import bisect_right
+from collections import defaultdict
+
+import numpy as np
+
 from rig.routing_table import MinimisationFailedError
+from rig.routing_table.entries import RoutingTable
 from rig.routing_table.utils import intersect
 
 
@@ -8,20 +14,26 @@ def minimise(table, target_length, check_for_aliases=True):
 
     Parameters
     ----------
-    routing_table : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
+    routing_table : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...] \
+            or :py:class:`~rig.routing_table.RoutingTable`
         Routing table from which to remove entries which could be handled by
-        default routing.
+        default routing. :py:class:`~rig.routing_table.RoutingTable`\ s are
+        minimised without converting them to lists of entries.
     target_length : int or None
         Target length of the routing table.
     check_for_aliases : bool
         If True (the default), default-route candidates are checked for aliased
         entries before suggesting a route may be default routed. This check is
-        required to ensure correctness in the general case but has a runtime
-        complexity of O(N^2) in the worst case for N-entry tables.
+        required to ensure correctness in the general case. Entries are
+        indexed by the prefix of bits their masks specify so only entries
+        which share a prefix need be compared and the check takes linear time
+        for typical tables. In the worst case (e.g., where masks have Xs in
+        their most significant bits) it has a runtime complexity of O(N^2) for
+        N-entry tables.
 
-        If False, the alias-check is skipped resulting in O(N) runtime. This
-        option should only be used if the supplied table is guaranteed not to
-        contain any aliased entries.
+        If False, the alias-check is skipped. This option should only be used
+        if the supplied table is guaranteed not to contain any aliased
+        entries.
 
     Raises
     ------
@@ -31,9 +43,14 @@ def minimise(table, target_length, check_for_aliases=True):
 
     Returns
     -------
-    [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
-        Reduced routing table entries.
+    [:py:class:`~rig.routing_table.RoutingTableEntry`, ...] or \
+            :py:class:`~rig.routing_table.RoutingTable`
+        Reduced routing table entries, of the same type as `table`.
     """
+    if isinstance(table, RoutingTable):
+        return _minimise_routing_table(table, target_length,
+                                       check_for_aliases)
+
     # If alias checking is required, see if we can cheaply prove that no
     # aliases exist in the table to skip this costly check.
     if check_for_aliases:
@@ -43,10 +60,13 @@ def minimise(table, target_length, check_for_aliases=True):
                 len(table) == len(set(e.key for e in table)):
             check_for_aliases = False
 
+    # Index of the table used to find aliases
+    index = _AliasIndex(table) if check_for_aliases else None
+
     # Generate a new table with default-route entries removed
     new_table = list()
     for i, entry in enumerate(table):
-        if not _is_defaultable(i, entry, table, check_for_aliases):
+        if not _is_defaultable(i, entry, table, check_for_aliases, index):
             # If the entry cannot be removed then add it to the table
             new_table.append(entry)
 
@@ -57,7 +77,47 @@ def minimise(table, target_length, check_for_aliases=True):
     return new_table
 
 
-def _is_defaultable(i, entry, table, check_for_aliases=True):
+def _minimise_routing_table(table, target_length, check_for_aliases):
+    """Remove default-routable entries from a
+    :py:class:`~rig.routing_table.RoutingTable` (see :py:func:`.minimise`).
+    """
+    # Entries whose route is a single link and whose (only) source is the
+    # opposite link. Links are the lowest six bits of a route or source so
+    # the opposite of a link is found by rotating these bits by three places.
+    routes = table.routes.astype(np.int64)
+    links = (1 << 6) - 1
+    single_link = (((routes & ~links) == 0) &
+                   ((routes & (routes - 1)) == 0))
+    opposites = ((routes << 3) | (routes >> 3)) & links
+    defaultable = single_link & (routes != 0) & (table.sources == opposites)
+
+    # Aliases cannot exist when all entries share the same mask and all keys
+    # are unique.
+    if check_for_aliases and len(table) > 0:
+        if (np.all(table.masks == table.masks[0]) and
+                len(np.unique(table.keys)) == len(table)):
+            check_for_aliases = False
+
+    if check_for_aliases:
+        index = _AliasIndex(table)
+        for i in np.flatnonzero(defaultable).tolist():
+            if index.intersects_after(i, int(table.keys[i]),
+                                      int(table.masks[i])):
+                defaultable[i] = False
+
+    keep = ~defaultable
+    new_table = RoutingTable.from_arrays(table.keys[keep], table.masks[keep],
+                                         table.routes[keep],
+                                         table.sources[keep])
+
+    # If the resultant table is larger than the target raise an exception
+    if target_length is not None and target_length < len(new_table):
+        raise MinimisationFailedError(target_length, len(new_table))
+
+    return new_table
+
+
+def _is_defaultable(i, entry, table, check_for_aliases=True, index=None):
     """Determine if an entry may be removed from a routing table and be
     replaced by a default route.
 
@@ -72,6 +132,8 @@ def _is_defaultable(i, entry, table, check_for_aliases=True):
     check_for_aliases : bool
         If True, the table is checked for aliased entries before suggesting a
         route may be default routed.
+    index : :py:class:`._AliasIndex` or None
+        If given, an index of the table used to speed up the alias check.
     """
     # May only have one source and sink (which may not be None)
     if (len(entry.sources) == 1 and
@@ -86,8 +148,87 @@ def _is_defaultable(i, entry, table, check_for_aliases=True):
             if source.opposite is sink:
                 # And the entry must not be aliased
                 key, mask = entry.key, entry.mask
-                if not check_for_aliases or \
-                        not any(intersect(key, mask, d.key, d.mask) for
-                                d in table[i+1:]):
+                if not check_for_aliases:
+                    return True
+                elif index is not None:
+                    return not index.intersects_after(i, key, mask)
+                elif not any(intersect(key, mask, d.key, d.mask) for
+                             d in table[i+1:]):
                     return True
     return False
+
+
+class _AliasIndex(object):
+    """An index of the entries in a routing table which may intersect a
+    key-mask pair.
+
+    Entries are bucketed by their "prefix": the most significant bits of
+    their key up to the first X in their mask. Two entries can only intersect
+    if the shorter of their prefixes is a prefix of the other entry's key and
+    so, for each prefix length present in the table, entries are bucketed by
+    their key's prefix of that length.
+    """
+
+    def __init__(self, table):
+        if isinstance(table, RoutingTable):
+            self._keys = table.keys.tolist()
+            self._masks = table.masks.tolist()
+        else:
+            self._keys = [e.key for e in table]
+            self._masks = [e.mask for e in table]
+
+        # Prefix lengths present in the table, in ascending order
+        self._lengths = sorted(set(_prefix_length(m) for m in self._masks))
+
+        # {length: {prefix: [i, ...], ...}, ...} The entries whose prefix is
+        # exactly the given length (_exact) and at least the given length
+        # (_at_least). Entries are listed in ascending order.
+        self._exact = dict((length, defaultdict(list))
+                           for length in self._lengths)
+        self._at_least = dict((length, defaultdict(list))
+                              for length in self._lengths)
+
+        for i, (key, mask) in enumerate(zip(self._keys, self._masks)):
+            entry_length = _prefix_length(mask)
+            self._exact[entry_length][_prefix(key, entry_length)].append(i)
+            for length in self._lengths:
+                if length > entry_length:
+                    break
+                self._at_least[length][_prefix(key, length)].append(i)
+
+    def intersects_after(self, i, key, mask):
+        """Determine if any entry after the `i`-th intersects a key-mask
+        pair.
+
+        The key-mask pair must have a prefix length present in the table
+        (e.g. be the key-mask pair of one of its entries).
+        """
+        query_length = _prefix_length(mask)
+        for length in self._lengths:
+            if length < query_length:
+                # Entries with shorter prefixes matching the key
+                candidates = self._exact[length].get(_prefix(key, length))
+            else:
+                # Entries with the same or longer prefixes starting with the
+                # key's prefix
+                candidates = self._at_least[length].get(
+                    _prefix(key, length))
+            if candidates:
+                for j in candidates[bisect_right(candidates, i):]:
+                    if intersect(key, mask, self._keys[j], self._masks[j]):
+                        return True
+            if length >= query_length:
+                break
+        return False
+
+
+def _prefix_length(mask):
+    """Get the number of most significant bits set before the first X in a
+    mask.
+    """
+    return 32 - (~mask & 0xffffffff).bit_length()
+
+
+def _prefix(key, length):
+    """Get the `length` most significant bits of a key."""
+    return (key & 0xffffffff) >> (32 - length)
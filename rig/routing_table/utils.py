@@ -1,6 +1,7 @@
 from collections import defaultdict, namedtuple, OrderedDict
 
 from rig.routing_table import RoutingTableEntry, MultisourceRouteError
+from rig.routing_table.lookup import RoutingTableLookup
 from six import iteritems
 import warnings
 
@@ -152,7 +153,10 @@ def table_is_subset_of(entries_a, entries_b):
     ----------
     entries_a : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
     entries_b : [:py:class:`~rig.routing_table.RoutingTableEntry`, ...]
-        Ordered of lists of routing table entries to compare.
+        Ordered of lists of routing table entries to compare. Either may also
+        be a :py:class:`~rig.routing_table.RoutingTable`. The tables need not
+        be orthogonal: as in a router, the first entry matching a key
+        determines its route.
 
     Returns
     -------
@@ -160,44 +164,50 @@ def table_is_subset_of(entries_a, entries_b):
         True if every key matched in `entries_a` would result in an equivalent
         route for the packet when matched in `entries_b`.
     """
-    # Determine which bits we don't need to explicitly test for
-    common_xs = get_common_xs(entries_b)
-
-    # For every entry in the first table
-    for entry in expand_entries(entries_a, ignore_xs=common_xs):
-        # Look at every entry in the second table
-        for other_entry in entries_b:
-            # If the first entry matches the second
-            if other_entry.mask & entry.key == other_entry.key:
-                if other_entry.route == entry.route:
-                    # If the route is the same then we move on to the next
-                    # entry in the first table.
-                    break
-                else:
-                    # Otherwise we return false as the tables are different
+    # Compare the routes of each region of the key space matched by an entry
+    # in the first table with those given by the second table, without
+    # expanding the entries.
+    lookup_a = RoutingTableLookup(entries_a)
+    lookup_b = RoutingTableLookup(entries_b)
+    for key, _ in lookup_a.overlaps:
+        warnings.warn("Table is not orthogonal: Key {:#010x} matches "
+                      "multiple entries.".format(key))
+    routes_a = lookup_a.table.routes
+    routes_b = lookup_b.table.routes
+    for key, mask, i in lookup_a.regions():
+        if i < 0:
+            # Keys not matched by the first table need not be considered
+            continue
+
+        for _, _, j in lookup_b.lookup_region(key, mask):
+            if j >= 0:
+                # If a key is matched in the second table the route must be
+                # the same
+                if routes_a[i] != routes_b[j]:
                     return False
-        else:
-            # If we didn't break out of the loop then the entry from the first
-            # table never matched an entry in the second table. If the entry
-            # from the first table could not be default routed we return False
-            # as the tables cannot be equivalent.
-            default_routed = False
-
-            if len(entry.route) == 1 and len(entry.sources) == 1:
-                source = next(iter(entry.sources))
-                sink = next(iter(entry.route))
-
-                if (source is not None and
-                        sink.is_link and
-                        source is sink.opposite):
-                    default_routed = True
-
-            if not default_routed:
+            elif not _is_default_routed(lookup_a.table[i]):
+                # If the key is not matched in the second table the entry
+                # from the first table must be able to be default routed
                 return False
 
     return True
 
 
+def _is_default_routed(entry):
+    """Would packets matching an entry be default routed in the absence of
+    the entry?"""
+    if len(entry.route) == 1 and len(entry.sources) == 1:
+        source = next(iter(entry.sources))
+        sink = next(iter(entry.route))
+
+        if (source is not None and
+                sink.is_link and
+                source is sink.opposite):
+            return True
+
+    return False
+
+
 def intersect(key_a, mask_a, key_b, mask_b):
     """Return if key-mask pairs intersect (i.e., would both match some of the
     same keys).
@@ -6,12 +6,16 @@ Installed as "rig-boot" by setuptools.
 import sys
 import argparse
 
+from six import iteritems
+
 import rig
 
 from rig.machine_control import boot, MachineController
 
 from rig.machine_control.machine_controller import SpiNNakerBootError
 
+from rig.machine_control.multi_machine import boot_machines
+
 BOOT_OPTION_POSTFIX = "_boot_options"
 """Postfix for boot option dicts in boot."""
 
@@ -22,7 +26,9 @@ def main(args=None):
                         version="%(prog)s {}".format(rig.__version__))
 
     parser.add_argument("hostname", type=str,
-                        help="hostname or IP of SpiNNaker system")
+                        help="hostname or IP of SpiNNaker system or a "
+                             "comma-separated list of systems to boot "
+                             "concurrently")
 
     # Automatically build a list of available machine parameters by inspecting
     # boot module.
@@ -41,21 +47,45 @@ def main(args=None):
 
     args = parser.parse_args(args)
 
-    # Attempt to boot the machine
-    mc = MachineController(args.hostname)
-    try:
-        if mc.boot(**args.board_options):
-            return 0
+    # Parse the list of machines
+    hostnames = [hostname.strip() for hostname in args.hostname.split(",")]
+    if not all(hostnames):
+        parser.error("'{}' is not a valid list of hostnames".format(
+            args.hostname))
+
+    if len(hostnames) == 1:
+        # Attempt to boot the machine
+        mc = MachineController(hostnames[0])
+        try:
+            if mc.boot(**args.board_options):
+                return 0
+            else:
+                # The machine was already booted.
+                sys.stderr.write(
+                    "{}: error: machine already booted.\n".format(
+                        parser.prog))
+                return 1
+        except SpiNNakerBootError as e:
+            # The machine could not be booted for some reason; show an
+            # appropriate message
+            sys.stderr.write("{}: error: {}\n".format(parser.prog, str(e)))
+            return 2
+
+    # Boot many machines concurrently, reporting the outcome for each
+    return_code = 0
+    results = boot_machines(hostnames, **args.board_options)
+    for hostname, result in iteritems(results):
+        if result.error is not None:
+            sys.stderr.write("{}: error: {}: {}\n".format(
+                parser.prog, hostname, str(result.error)))
+            return_code = 2
+        elif not result.booted:
+            sys.stderr.write("{}: error: {}: machine already booted.\n".format(
+                parser.prog, hostname))
+            return_code = max(return_code, 1)
         else:
-            # The machine was already booted.
-            sys.stderr.write(
-                "{}: error: machine already booted.\n".format(parser.prog))
-            return 1
-    except SpiNNakerBootError as e:
-        # The machine could not be booted for some reason; show an appropriate
-        # message
-        sys.stderr.write("{}: error: {}\n".format(parser.prog, str(e)))
-        return 2
+            print("{}: booted in {:.1f} s".format(hostname, result.duration))
+    return return_code
 
 
 if __name__ == "__main__":  # pragma: no cover
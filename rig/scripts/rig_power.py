@@ -6,6 +6,7 @@ Installed as "rig-power" by setuptools.
 
 import sys
 import argparse
+import functools
 
 from six import next
 
@@ -15,6 +16,8 @@ from rig.machine_control import BMPController
 
 from rig.machine_control.scp_connection import TimeoutError
 
+from rig.utils.parallel import run_concurrently
+
 ON_CHOICES = "on 1".split()
 OFF_CHOICES = "off 0".split()
 
@@ -26,7 +29,9 @@ def main(args=None):
                         version="%(prog)s {}".format(rig.__version__))
 
     parser.add_argument("hostname", type=str,
-                        help="hostname or IP of a SpiNNaker board BMP")
+                        help="hostname or IP of a SpiNNaker board BMP or a "
+                             "comma-separated list of BMPs to control "
+                             "concurrently")
 
     parser.add_argument("state", type=str, default=ON_CHOICES[0], nargs="?",
                         choices=ON_CHOICES + OFF_CHOICES)
@@ -71,27 +76,93 @@ def main(args=None):
             parser.error("'{}' is not a valid board/range".format(
                 range_spec))
 
-    bc = BMPController(args.hostname)
-    try:
-        # Check that the device is a actually BMP
-        info = bc.get_software_version(board=next(iter(boards)))
-        if "BMP" not in info.version_string:
-            sys.stderr.write("{}: error: device is not a BMP\n".format(
-                parser.prog))
-            return 2
+    # Parse the list of BMPs
+    hostnames = [hostname.strip() for hostname in args.hostname.split(",")]
+    if not all(hostnames):
+        parser.error("'{}' is not a valid list of hostnames".format(
+            args.hostname))
 
-        # Actually send the command
-        if args.power_on_delay is None:
-            bc.set_power(state=state, board=boards)
+    def set_power(hostname):
+        """Set the power of the boards of a single BMP.
+
+        Returns
+        -------
+        (return_code, error_message)
+        """
+        bc = BMPController(hostname)
+        try:
+            # Check that the device is a actually BMP
+            info = bc.get_software_version(board=next(iter(boards)))
+            if "BMP" not in info.version_string:
+                return 2, "device is not a BMP"
+
+            # Actually send the command
+            if args.power_on_delay is None:
+                bc.set_power(state=state, board=boards)
+            else:
+                bc.set_power(state=state, board=boards,
+                             post_power_on_delay=args.power_on_delay)
+        except TimeoutError:
+            return 1, "bmp did not respond to command"
+
+        return 0, None
+
+    if len(hostnames) == 1:
+        return_code, message = set_power(hostnames[0])
+        if message is not None:
+            sys.stderr.write("{}: error: {}\n".format(parser.prog, message))
+        return return_code
+
+    # When many BMPs are given, they are all controlled concurrently. Each
+    # BMP is treated as frame 0 of its own cabinet.
+    bc = BMPController({(cabinet, 0): hostname
+                        for cabinet, hostname in enumerate(hostnames)})
+
+    def check_bmp(cabinet):
+        """Check that a device is actually a BMP.
+
+        Returns
+        -------
+        (return_code, error_message)
+        """
+        try:
+            info = bc.get_software_version(cabinet=cabinet, frame=0,
+                                           board=next(iter(boards)))
+        except TimeoutError:
+            return 1, "bmp did not respond to command"
+        if "BMP" not in info.version_string:
+            return 2, "device is not a BMP"
+        return 0, None
+    results = run_concurrently(functools.partial(check_bmp, cabinet)
+                               for cabinet in range(len(hostnames)))
+
+    # Actually send the command
+    cabinets = [cabinet for cabinet, (return_code, _) in enumerate(results)
+                if return_code == 0]
+    durations = {}
+    if cabinets:
+        kwargs = {}
+        if args.power_on_delay is not None:
+            kwargs["post_power_on_delay"] = args.power_on_delay
+        try:
+            durations = bc.set_power_many(
+                state, [(cabinet, 0, board)
+                        for cabinet in cabinets for board in sorted(boards)],
+                **kwargs)
+        except TimeoutError:
+            # NB: Which BMP(s) did not respond is not known
+            for cabinet in cabinets:
+                results[cabinet] = (1, "bmp did not respond to command")
+
+    for cabinet, (hostname, (return_code, message)) in enumerate(
+            zip(hostnames, results)):
+        if message is not None:
+            sys.stderr.write("{}: error: {}: {}\n".format(
+                parser.prog, hostname, message))
         else:
-            bc.set_power(state=state, board=boards,
-                         post_power_on_delay=args.power_on_delay)
-    except TimeoutError:
-        sys.stderr.write("{}: error: bmp did not respond to command\n".format(
-            parser.prog))
-        return 1
-
-    return 0
+            print("{}: powered {} in {:.1f} s".format(
+                hostname, "on" if state else "off", durations[(cabinet, 0)]))
+    return max(return_code for return_code, _ in results)
 
 
 if __name__ == "__main__":  # pragma: no cover
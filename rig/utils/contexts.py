@@ -29,7 +29,6 @@ arguments and a mixin for classes that provides a `get_new_context` method
 which could be mapped to `__call__` to produce and use concepts as in the
 previous example.
 """
-import collections
 import inspect
 import functools
 import sentinel
@@ -69,8 +68,13 @@ class ContextMixin(object):
         initial_context : {kwarg: value}
             An initial set of contextual arguments mapping keyword to value.
         """
-        self.__context_stack = collections.deque()
-        self.__context_stack.append(Context(initial_context))
+        self.__context_stack = ContextStack()
+        self.__context_stack.append(Context(initial_context,
+                                            self.__context_stack))
+
+        # Return the (cached) dictionary of current context arguments. The
+        # returned dictionary must not be modified.
+        self._get_flattened_context = self.__context_stack.flatten
 
     def get_new_context(self, **kwargs):
         """Create a new context with the given keyword arguments."""
@@ -82,10 +86,7 @@ class ContextMixin(object):
 
     def get_context_arguments(self):
         """Return a dictionary containing the current context arguments."""
-        cargs = {}
-        for context in self.__context_stack:
-            cargs.update(context.context_arguments)
-        return cargs
+        return dict(self._get_flattened_context())
 
     @staticmethod
     def use_contextual_arguments(**kw_only_args_defaults):
@@ -140,34 +141,60 @@ class ContextMixin(object):
             defaults = (([Required] * (len(arg_names) - len(defaults))) +
                         list(defaults))
 
+            # The arguments which may be set by the context depend only on
+            # the number of positional arguments supplied. For each number of
+            # positional arguments seen, the following are computed once (on
+            # first use):
+            #
+            # {n_args: (defaults, names, required_names), ...}
+            #
+            # Where 'defaults' is a dictionary of the arguments (and their
+            # default values) which may potentially be set by the context,
+            # 'names' is a tuple of their names and 'required_names' is a tuple
+            # of those names whose default is the 'Required' sentinel.
+            binders = {}
+
+            def make_binder(n_args):
+                # This includes any non-supplied positional arguments and any
+                # keyword-only arguments.
+                binder_defaults = dict(zip(arg_names[1 + n_args:],
+                                           defaults[1 + n_args:]))
+                binder_defaults.update(kw_only_args_defaults)
+                binder = binders[n_args] = (
+                    binder_defaults,
+                    tuple(binder_defaults),
+                    tuple(name for name, default in iteritems(binder_defaults)
+                          if default is Required))
+                return binder
+
             # Update the docstring signature to include the specified arguments
             @add_signature_to_docstring(f, kw_only_args=kw_only_args_defaults)
             @functools.wraps(f)
             def f_(self, *args, **kwargs):
-                # Construct a dictionary of arguments (and their default
-                # values) which may potentially be set by the context. This
-                # includes any non-supplied positional arguments and any
-                # keyword-only arguments.
-                new_kwargs = dict(zip(arg_names[1 + len(args):],
-                                      defaults[1 + len(args):]))
-                new_kwargs.update(kw_only_args_defaults)
+                binder = binders.get(len(args))
+                if binder is None:
+                    binder = make_binder(len(args))
+                binder_defaults, names, required_names = binder
+                new_kwargs = binder_defaults.copy()
 
                 # Values from the context take priority over default argument
                 # values.
-                context = self.get_context_arguments()
-                for name, val in iteritems(context):
-                    if name in new_kwargs:
-                        new_kwargs[name] = val
+                context = self._get_flattened_context()
+                if context:
+                    for name in names:
+                        if name in context:
+                            new_kwargs[name] = context[name]
 
                 # Finally, the values actually pased to the function call take
                 # ultimate priority.
                 new_kwargs.update(kwargs)
 
                 # Raise a TypeError if any `Required` sentinels remain
-                for k, v in iteritems(new_kwargs):
-                    if v is Required:
+                for name in required_names:
+                    if new_kwargs[name] is Required:
                         raise TypeError(
-                            "{!s}: missing argument {}".format(f.__name__, k))
+                            "{!s}: missing argument {}".format(f.__name__,
+                                                               name))
 
                 return f(self, *args, **new_kwargs)
             return f_
@@ -175,6 +202,65 @@ class ContextMixin(object):
         return decorator
 
 
+class ContextStack(object):
+    """A stack of :py:class:`.Context` objects which caches the union of their
+    arguments.
+
+    The stack may only be changed using :py:meth:`.append` and
+    :py:meth:`.pop` and contexts' arguments may only be changed using
+    :py:meth:`.Context.update` so that the cached arguments are recomputed
+    whenever they change.
+    """
+
+    def __init__(self):
+        self._contexts = []
+
+        # Incremented whenever the stack or its contexts change. The cache
+        # holds the version it was computed at (so that changes made while
+        # it is being computed by another thread invalidate it).
+        self.version = 0
+        self._cache = (-1, None)
+
+    def invalidate(self):
+        """Discard the cached arguments."""
+        self.version += 1
+
+    def append(self, context):
+        """Push a context onto the stack."""
+        self._contexts.append(context)
+        self.invalidate()
+
+    def pop(self):
+        """Pop the most recently pushed context from the stack."""
+        context = self._contexts.pop()
+        self.invalidate()
+        return context
+
+    def __getitem__(self, index):
+        return self._contexts[index]
+
+    def __iter__(self):
+        return iter(self._contexts)
+
+    def __len__(self):
+        return len(self._contexts)
+
+    def flatten(self):
+        """Return a dictionary containing the arguments of all contexts in
+        the stack, with later contexts taking priority.
+
+        The returned dictionary is shared and must not be modified.
+        """
+        version, cargs = self._cache
+        if version != self.version:
+            version = self.version
+            cargs = {}
+            for context in self._contexts:
+                cargs.update(context._context_arguments)
+            self._cache = (version, cargs)
+        return cargs
+
+
 class Context(object):
     """A context object that stores arguments that may be passed to
     functions.
@@ -186,17 +272,27 @@ class Context(object):
         ----------
         context_arguments : {kwarg: value}
             A dict of contextual arguments mapping keyword to value.
-        stack : :py:class:`deque`
+        stack : :py:class:`.ContextStack`
             Context stack to which this context will append itself when
             entered.
         """
-        self.context_arguments = dict(context_arguments)
+        self._context_arguments = dict(context_arguments)
         self.stack = stack
         self._before_close = list()
 
+    @property
+    def context_arguments(self):
+        """A copy of the arguments contained within this context.
+
+        The arguments may only be changed using :py:meth:`.update`.
+        """
+        return dict(self._context_arguments)
+
     def update(self, updates):
         """Update the arguments contained within this context."""
-        self.context_arguments.update(updates)
+        self._context_arguments.update(updates)
+        if self.stack is not None:
+            self.stack.invalidate()
 
     def before_close(self, *args):
         """Call the given function(s) before this context is exited."""
@@ -0,0 +1,274 @@
+"""Utilities for performing blocking operations concurrently.
+
+Most operations which communicate with a SpiNNaker machine spend the majority
+of their time blocked waiting for the network. When many independent operations
+must be performed (e.g. communicating with many boards via their own Ethernet
+connections), overlapping these waits using threads can yield large speedups.
+"""
+
+import sys
+import threading
+import time
+
+import six
+from six.moves import queue
+
+
+def run_concurrently(functions, timeout=None):
+    """Call a number of functions concurrently, each in its own thread, and
+    wait for them all to complete (or for a timeout to expire).
+
+    For example::
+
+        >>> run_concurrently([lambda: 1 + 1, lambda: 2 * 3])
+        [2, 6]
+
+    .. note::
+
+        If only a single function is given and no timeout is specified it
+        is called directly in the calling thread.
+
+    Parameters
+    ----------
+    functions : iterable of callables
+        Zero-argument functions to call.
+    timeout : float or None
+        If not None, the maximum number of seconds to wait for all of the
+        functions to return. Functions which have not returned by this time
+        are abandoned: they continue to run in the background (in daemon
+        threads) but their results, and any exceptions they raise, are
+        discarded and None is returned in place of their results.
+
+    Returns
+    -------
+    [value, ...]
+        The values returned by each function, in the same order as the
+        functions were given.
+
+    Raises
+    ------
+    Exception
+        If any of the functions raise an exception, the exception raised by
+        the first (in the order given) of these functions is re-raised once
+        all functions have returned.
+    """
+    functions = list(functions)
+
+    # No need to spin up threads for trivial cases
+    if len(functions) <= 1 and timeout is None:
+        return [f() for f in functions]
+
+    results = [None] * len(functions)
+    exc_infos = [None] * len(functions)
+
+    def run(i, f):
+        try:
+            results[i] = f()
+        except Exception:
+            # Re-raised in the calling thread
+            exc_infos[i] = sys.exc_info()
+
+    threads = [threading.Thread(target=run, args=(i, f))
+               for i, f in enumerate(functions)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    if timeout is None:
+        for thread in threads:
+            thread.join()
+    else:
+        deadline = time.time() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.time()))
+
+    # Discard the results of abandoned functions and re-raise the first
+    # exception encountered, if any.
+    # NB: New lists are built (and bound to new names, since `run` refers to
+    # `results` and `exc_infos` by name) to ensure abandoned threads can't
+    # modify the results after they have been returned.
+    finished = [not thread.is_alive() for thread in threads]
+    returned = [r if f else None for r, f in zip(results, finished)]
+    raised = [e if f else None for e, f in zip(exc_infos, finished)]
+    for exc_info in raised:
+        if exc_info is not None:
+            six.reraise(*exc_info)
+
+    return returned
+
+
+class TimeoutError(Exception):
+    """Raised when the result of a :py:class:`.Future` is not available
+    within the time allowed."""
+    pass
+
+
+class Future(object):
+    """The eventual result of a function submitted to a
+    :py:class:`.ThreadPool`.
+
+    This is a minimal equivalent of :py:class:`concurrent.futures.Future`
+    (which is not available in Python 2 without an additional package).
+    """
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def done(self):
+        """Has the function finished (returned or raised an exception)?"""
+        return self._done.is_set()
+
+    def _wait(self, timeout):
+        if not self._done.wait(timeout):
+            raise TimeoutError()
+
+    def result(self, timeout=None):
+        """Wait for the function to finish and return its result.
+
+        Parameters
+        ----------
+        timeout : float or None
+            The maximum number of seconds to wait. If None, wait forever.
+
+        Raises
+        ------
+        TimeoutError
+            If the function did not finish within the timeout.
+        Exception
+            If the function raised an exception, it is re-raised.
+        """
+        self._wait(timeout)
+        if self._exc_info is not None:
+            six.reraise(*self._exc_info)
+        return self._result
+
+    def exception(self, timeout=None):
+        """Wait for the function to finish and return the exception it
+        raised, or None if it returned normally.
+
+        Raises
+        ------
+        TimeoutError
+            If the function did not finish within the timeout.
+        """
+        self._wait(timeout)
+        return self._exc_info[1] if self._exc_info is not None else None
+
+    def add_done_callback(self, callback):
+        """Call a function (with this future as its argument) when the
+        function finishes.
+
+        If the function has already finished, the callback is called
+        immediately. Otherwise it is called in the thread which ran the
+        function.
+        """
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self, result, exc_info):
+        with self._lock:
+            self._result = result
+            self._exc_info = exc_info
+            self._done.set()
+            callbacks = self._callbacks
+            self._callbacks = []
+        for callback in callbacks:
+            callback(self)
+
+
+class ThreadPool(object):
+    """A fixed-size pool of threads which call submitted functions.
+
+    Unlike :py:func:`.run_concurrently`, which starts a thread per function,
+    a pool bounds the number of threads in use no matter how many functions
+    are submitted. For example::
+
+        >>> with ThreadPool(max_workers=2) as pool:
+        ...     futures = [pool.submit(pow, 2, n) for n in range(4)]
+        ...     print([f.result() for f in futures])
+        [1, 2, 4, 8]
+    """
+
+    def __init__(self, max_workers):
+        """
+        Parameters
+        ----------
+        max_workers : int
+            The maximum number of threads to use. Threads are started as
+            functions are submitted.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+
+        # A queue of (future, f, args, kwargs) tuples or None to instruct a
+        # worker to exit.
+        self._queue = queue.Queue()
+        self._threads = []
+        self._shutdown = False
+        self._lock = threading.Lock()
+
+    def submit(self, f, *args, **kwargs):
+        """Schedule ``f(*args, **kwargs)`` to be called by a thread in the
+        pool.
+
+        Returns
+        -------
+        :py:class:`.Future`
+            The eventual result of the call.
+        """
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit to a pool after shutdown.")
+            self._queue.put((future, f, args, kwargs))
+
+            if len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._worker)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+        return future
+
+    def _worker(self):
+        while True:
+            work = self._queue.get()
+            if work is None:
+                return
+
+            future, f, args, kwargs = work
+            try:
+                result = f(*args, **kwargs)
+            except Exception:
+                future._finish(None, sys.exc_info())
+            else:
+                future._finish(result, None)
+
+    def shutdown(self, wait=True):
+        """Stop the pool once all submitted functions have been called.
+
+        Parameters
+        ----------
+        wait : bool
+            If True, block until all submitted functions have finished.
+        """
+        with self._lock:
+            if not self._shutdown:
+                self._shutdown = True
+                for _ in self._threads:
+                    self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.shutdown()
@@ -1,8 +1,9 @@
 import pytest
 
 import struct
+import time
 
-from mock import Mock
+from mock import Mock, call
 
 from rig.machine_control import BMPController
 from rig.machine_control.bmp_controller import BMPInfo
@@ -236,6 +237,40 @@ class TestBMPController(object):
             expected_args=0
         )
 
+    def test_set_power_many(self, monkeypatch):
+        bc = BMPController({(0, 0): "localhost",
+                            (0, 1): "localhost",
+                            (0, 1, 3): "localhost",
+                            (1, 0, 0): "localhost",
+                            (1, 0, 5): "localhost"})
+        bc.set_power = Mock()
+        mock_sleep = Mock()
+        monkeypatch.setattr(time, "sleep", mock_sleep)
+
+        # Powering everything off: whole frames where a frame's BMP is
+        # connected, otherwise just the boards connected.
+        durations = bc.set_power_many(False, delay=0.5)
+        assert set(durations) == set([(0, 0), (0, 1), (1, 0)])
+        assert sorted(bc.set_power.mock_calls) == sorted([
+            call(False, 0, 0, list(range(24)), delay=0.5,
+                 post_power_on_delay=0.0),
+            call(False, 0, 1, list(range(24)), delay=0.5,
+                 post_power_on_delay=0.0),
+            call(False, 1, 0, [0, 5], delay=0.5, post_power_on_delay=0.0),
+        ])
+        assert not mock_sleep.called
+        bc.set_power.reset_mock()
+
+        # Powering on specific boards, waiting just once
+        durations = bc.set_power_many(True, [(0, 0, 1), (0, 1, 2), (0, 0, 3)],
+                                      post_power_on_delay=2.0)
+        assert set(durations) == set([(0, 0), (0, 1)])
+        assert sorted(bc.set_power.mock_calls) == sorted([
+            call(True, 0, 0, [1, 3], delay=0.0, post_power_on_delay=0.0),
+            call(True, 0, 1, [2], delay=0.0, post_power_on_delay=0.0),
+        ])
+        mock_sleep.assert_called_once_with(2.0)
+
     @pytest.mark.parametrize("board,boards", [(0, [0]), (1, [1]), ([2], [2]),
                                               ([0, 1, 2], [0, 1, 2])])
     @pytest.mark.parametrize("action,led_action",
@@ -0,0 +1,325 @@
+import struct
+import threading
+
+import numpy as np
+import pytest
+
+from mock import Mock
+
+from rig.machine_control import BMPController
+from rig.machine_control.bmp_controller import ADCInfo, unpack_adc_info
+from rig.machine_control.bmp_telemetry import \
+    telemetry_dtype, TelemetryBuffer, BMPTelemetrySampler
+
+from rig.machine_control.consts import \
+    SCPCommands, BMPInfoType, SDP_HEADER_LENGTH
+from rig.machine_control.scp_connection import \
+    SCPConnection, SCPError, TimeoutError
+
+
+def make_records(times, n_fpga_registers=0):
+    records = np.zeros(len(times), dtype=telemetry_dtype(n_fpga_registers))
+    records["time"] = times
+    return records
+
+
+def test_telemetry_dtype():
+    assert "fpga" not in telemetry_dtype().names
+    dtype = telemetry_dtype(3)
+    assert dtype.names[:4] == ("time", "cabinet", "frame", "board")
+    assert dtype.names[4:-1] == ADCInfo._fields
+    assert dtype["fpga"].shape == (3, )
+
+
+def test_telemetry_buffer():
+    with pytest.raises(ValueError):
+        TelemetryBuffer(0)
+
+    buf = TelemetryBuffer(4)
+    assert len(buf) == 0
+    assert len(buf.to_array()) == 0
+
+    buf.append(make_records([0, 1, 2]))
+    assert len(buf) == 3
+    assert list(buf.to_array()["time"]) == [0, 1, 2]
+    assert buf.n_overwritten == 0
+
+    # Wrap around
+    buf.append(make_records([3, 4]))
+    assert len(buf) == 4
+    assert list(buf.to_array()["time"]) == [1, 2, 3, 4]
+    assert buf.n_overwritten == 1
+
+    # More records than fit at once
+    buf.append(make_records([5, 6, 7, 8, 9, 10]))
+    assert list(buf.to_array()["time"]) == [7, 8, 9, 10]
+    assert buf.n_overwritten == 7
+
+    # Exported arrays are copies
+    array = buf.to_array()
+    buf.append(make_records([11]))
+    assert list(array["time"]) == [7, 8, 9, 10]
+
+
+def test_telemetry_buffer_save(tmpdir):
+    buf = TelemetryBuffer(2, n_fpga_registers=1)
+    records = make_records([0, 1, 2], n_fpga_registers=1)
+    records["fpga"] = [[10], [11], [12]]
+    buf.append(records)
+
+    filename = str(tmpdir.join("telemetry.npy"))
+    buf.save(filename)
+    loaded = np.load(filename)
+    assert loaded.dtype == buf.dtype
+    assert list(loaded["time"]) == [1, 2]
+    assert list(loaded["fpga"][:, 0]) == [11, 12]
+
+
+def make_adc_data(board):
+    """The data returned by an ADC bmp_info request to a board."""
+    return struct.pack("<8H4h4h4hII",
+                       0, 1966, 1966, 1966, 2949, 0, 3604, 3277,
+                       (30 + board) * 256, 25 * 256, 0, 0,
+                       -0x8000, -0x8000, 0, 0,
+                       -1, 1000, 0, 0,
+                       0, 0)
+
+
+def make_adc_info(board):
+    return unpack_adc_info(make_adc_data(board))
+
+
+def fpga_reg_value(fpga_num, addr, board):
+    return fpga_num + addr + board
+
+
+@pytest.fixture
+def bc():
+    bc = BMPController({(0, 0): "127.0.0.1", (0, 1): "127.0.0.2"})
+    bc.read_adc = Mock(side_effect=lambda c, f, b: make_adc_info(b))
+    bc.read_fpga_reg = Mock(side_effect=lambda fpga_num, addr, c, f, b:
+                            fpga_reg_value(fpga_num, addr, b))
+
+    # Bursts are acknowledged as the above
+    for coord in list(bc.connections):
+        bc.connections[coord].close()
+        bc.connections[coord] = conn = Mock(spec_set=SCPConnection)
+
+        def send_scp_burst(buffer_size, window_size, calls):
+            for call in calls:
+                if call.cmd == SCPCommands.bmp_info:
+                    assert call.arg1 == BMPInfoType.adc
+                    data = make_adc_data(call.p)
+                else:
+                    assert call.cmd == SCPCommands.link_read
+                    assert call.arg2 == 4
+                    data = struct.pack("<I", fpga_reg_value(
+                        call.arg3, call.arg1, call.p))
+                # Response: padding, SDP header, cmd_rc, seq, data
+                call.callback(b"\x00" * (6 + SDP_HEADER_LENGTH) + data)
+        conn.send_scp_burst.side_effect = send_scp_burst
+    return bc
+
+
+def test_default_boards(bc):
+    sampler = BMPTelemetrySampler(bc)
+    assert sampler.boards == ([(0, 0, b) for b in range(24)] +
+                              [(0, 1, b) for b in range(24)])
+
+    # Individually connected boards are also included
+    bc.connections[(1, 0, 3)] = bc.connections[(0, 0)]
+    sampler = BMPTelemetrySampler(bc)
+    assert (1, 0, 3) in sampler.boards
+    assert (1, 0, 4) not in sampler.boards
+
+
+def test_sample(bc):
+    sampler = BMPTelemetrySampler(bc, boards=[(0, 0, 1), (0, 1, 2)],
+                                  fpga_registers=[(0, 0x10), (1, 0x20)])
+    records = sampler.sample()
+
+    assert len(records) == 2
+    assert len(sampler.buffer) == 2
+    assert sampler.n_errors == 0
+
+    records = sorted(records, key=lambda r: (r["frame"], r["board"]))
+    assert [(r["cabinet"], r["frame"], r["board"]) for r in records] == \
+        [(0, 0, 1), (0, 1, 2)]
+    assert [r["temp_top"] for r in records] == [31.0, 32.0]
+    assert records[0]["voltage_supply"] == pytest.approx(12.0, abs=0.01)
+    assert np.isnan(records[0]["temp_ext_0"])
+    assert np.isnan(records[0]["fan_0"])
+    assert records[0]["fan_1"] == 1000.0
+    assert list(records[0]["fpga"]) == [0x11, 0x22]
+    assert list(records[1]["fpga"]) == [0x12, 0x23]
+    assert all(r["time"] > 0 for r in records)
+
+
+def test_sample_burst(bc):
+    sampler = BMPTelemetrySampler(bc, boards=[(0, 0, 1), (0, 0, 2),
+                                              (0, 1, 2)],
+                                  fpga_registers=[(0, 0x10), (1, 0x20)])
+    first = sampler.sample()
+    assert bc.read_adc.call_count == 3
+    assert not bc.connections[(0, 0)].send_scp_burst.called
+
+    # Once every board has responded, the requests to each frame should be
+    # sent in a single burst
+    bc.read_adc.reset_mock()
+    bc.read_fpga_reg.reset_mock()
+    records = sampler.sample()
+    assert not bc.read_adc.called
+    assert not bc.read_fpga_reg.called
+    for frame, n_boards in [(0, 2), (1, 1)]:
+        burst = bc.connections[(0, frame)].send_scp_burst
+        assert burst.call_count == 1
+        buffer_size, window_size, calls = burst.call_args[0]
+        assert window_size == sampler.window_size
+        assert len(list(calls)) == n_boards * 3
+
+    # The same values should be recorded either way
+    for field in ("cabinet", "frame", "board", "temp_top", "voltage_1_8",
+                  "fpga"):
+        assert np.array_equal(records[field], first[field])
+    assert np.all(records["time"] >= first["time"])
+    assert sampler.n_errors == 0
+    assert len(sampler.buffer) == 6
+
+
+def test_sample_concurrently(bc):
+    # Boards in different frames should be sampled concurrently: each read
+    # waits until both frames have started being read.
+    lock = threading.Lock()
+    frames_read = set()
+    all_read = threading.Event()
+
+    def read_adc(cabinet, frame, board):
+        with lock:
+            frames_read.add(frame)
+            if len(frames_read) == 2:
+                all_read.set()
+        assert all_read.wait(1.0)
+        return make_adc_info(board)
+
+    bc.read_adc = Mock(side_effect=read_adc)
+    sampler = BMPTelemetrySampler(bc, boards=[(0, 0, 0), (0, 1, 0)])
+    assert len(sampler.sample()) == 2
+
+
+def test_sample_errors(bc):
+    def read_adc(cabinet, frame, board):
+        if frame == 1:
+            raise SCPError("Timeout")
+        return make_adc_info(board)
+    bc.read_adc = Mock(side_effect=read_adc)
+
+    sampler = BMPTelemetrySampler(bc, boards=[(0, 0, 0), (0, 1, 0)])
+    records = sampler.sample()
+    assert len(records) == 1
+    assert records[0]["frame"] == 0
+    assert sampler.n_errors == 1
+
+
+def test_sample_absent_boards(bc):
+    # Boards which don't respond when first sampled (e.g. empty slots) should
+    # not be sampled again.
+    def read_adc(cabinet, frame, board):
+        if board == 1:
+            raise TimeoutError("Timeout")
+        return make_adc_info(board)
+    bc.read_adc = Mock(side_effect=read_adc)
+
+    sampler = BMPTelemetrySampler(bc, boards=[(0, 0, 0), (0, 0, 1)])
+    assert len(sampler.sample()) == 1
+    assert sampler.absent_boards == set([(0, 0, 1)])
+    assert sampler.n_errors == 1
+
+    assert len(sampler.sample()) == 1
+    calls = bc.connections[(0, 0)].send_scp_burst.call_args[0][2]
+    assert [call.p for call in calls] == [0]
+    assert bc.read_adc.call_count == 2
+    assert sampler.n_errors == 1
+
+
+def test_sample_burst_errors(bc):
+    sampler = BMPTelemetrySampler(bc, boards=[(0, 0, 0), (0, 0, 1)])
+    assert len(sampler.sample()) == 2
+
+    # If a board which has previously responded fails, its burst fails and
+    # every board is sampled individually instead.
+    bc.connections[(0, 0)].send_scp_burst.side_effect = TimeoutError()
+
+    def read_adc(cabinet, frame, board):
+        if board == 1:
+            raise TimeoutError("Timeout")
+        return make_adc_info(board)
+    bc.read_adc = Mock(side_effect=read_adc)
+
+    records = sampler.sample()
+    assert list(records["board"]) == [0]
+    assert sampler.n_errors == 1
+    assert bc.read_adc.call_count == 2
+
+    # The board is still sampled in future
+    assert sampler.absent_boards == set()
+
+
+def test_sample_absent_after_failures(bc):
+    sampler = BMPTelemetrySampler(bc, boards=[(0, 0, 0), (0, 0, 1)],
+                                  max_failures=2)
+    assert len(sampler.sample()) == 2
+
+    # A board which repeatedly fails to respond is eventually assumed to be
+    # absent (but occasional failures are tolerated).
+    burst = bc.connections[(0, 0)].send_scp_burst
+    send_scp_burst = burst.side_effect
+    burst.side_effect = TimeoutError()
+
+    def read_adc(cabinet, frame, board):
+        if board == 1 and failing[0]:
+            raise TimeoutError("Timeout")
+        return make_adc_info(board)
+    bc.read_adc = Mock(side_effect=read_adc)
+
+    failing = [True]
+    assert list(sampler.sample()["board"]) == [0]
+    failing[0] = False
+    assert len(sampler.sample()) == 2
+    failing[0] = True
+    assert list(sampler.sample()["board"]) == [0]
+    assert sampler.absent_boards == set()
+    assert list(sampler.sample()["board"]) == [0]
+    assert sampler.absent_boards == set([(0, 0, 1)])
+    assert sampler.n_errors == 3
+
+    # The absent board is no longer sampled
+    burst.side_effect = send_scp_burst
+    bc.read_adc.reset_mock()
+    assert list(sampler.sample()["board"]) == [0]
+    assert [call.p for call in burst.call_args[0][2]] == [0]
+    assert not bc.read_adc.called
+    assert sampler.n_errors == 3
+
+
+def test_background_sampling(bc):
+    sampler = BMPTelemetrySampler(bc, boards=[(0, 0, 0)])
+    sampled = threading.Event()
+    sample = sampler.sample
+
+    def sample_and_notify():
+        records = sample()
+        if len(sampler.buffer) >= 2:
+            sampled.set()
+        return records
+    sampler.sample = sample_and_notify
+
+    sampler.start(interval=0.001)
+    with pytest.raises(RuntimeError):
+        sampler.start()
+    assert sampled.wait(1.0)
+    sampler.stop()
+    sampler.stop()  # Should be a no-op
+
+    samples = sampler.buffer.to_array()
+    assert len(samples) >= 2
+    assert np.all(np.diff(samples["time"]) >= 0)
@@ -0,0 +1,77 @@
+import mock
+import pytest
+import struct
+
+from rig.machine_control import boot
+from rig.machine_control.boot import boot_packet, BootCommand, BOOT_BYTE_SIZE
+
+
+class FakeTime(object):
+    """A replacement for the time module whose clock only advances when
+    sleep is called."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, duration):
+        self.sleeps.append(duration)
+        self.now += duration
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake_time = FakeTime()
+    monkeypatch.setattr(boot, "time", fake_time)
+    return fake_time
+
+
+@pytest.fixture
+def mock_sock(monkeypatch):
+    mock_sock = mock.Mock()
+    monkeypatch.setattr(boot.socket, "socket",
+                        mock.Mock(return_value=mock_sock))
+    return mock_sock
+
+
+def test_boot_packet():
+    sock = mock.Mock()
+    boot_packet(sock, BootCommand.send_block, 1, 2, 3,
+                data=b"\x01\x02\x03\x04\x05\x06\x07\x08")
+    sock.send.assert_called_once_with(
+        struct.pack("!H4I", 1, BootCommand.send_block, 1, 2, 3) +
+        b"\x04\x03\x02\x01\x08\x07\x06\x05")
+
+
+def get_commands(mock_sock):
+    return [struct.unpack_from("!H4I", call[1][0])[1]
+            for call in mock_sock.send.mock_calls]
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_boot(mock_sock, fake_time, fast, tmpdir):
+    # A boot image of 2.5 blocks
+    scamp_binary = tmpdir.join("scamp.boot")
+    scamp_binary.write(b"\x00" * (BOOT_BYTE_SIZE * 2 + BOOT_BYTE_SIZE // 2),
+                       mode="wb")
+
+    structs = boot.boot("localhost", scamp_binary=str(scamp_binary),
+                        boot_delay=0.5, post_boot_delay=3.0, fast=fast)
+    assert b"sv" in structs
+
+    mock_sock.connect.assert_called_once_with(("localhost", 54321))
+    assert get_commands(mock_sock) == [BootCommand.start,
+                                       BootCommand.send_block,
+                                       BootCommand.send_block,
+                                       BootCommand.send_block,
+                                       BootCommand.end]
+    assert mock_sock.close.called
+
+    if fast:
+        # No post-boot delay should be used
+        assert fake_time.sleeps == [0.5] * 4
+    else:
+        assert fake_time.sleeps == [0.5] * 4 + [3.0]
@@ -40,6 +40,7 @@ def test_sdram_alloc_for_vertices(core_as_tag, clear):
         cn.sdram_alloc = mock.Mock(wraps=sdram_alloc)
     else:
         cn.sdram_alloc = mock.Mock(return_value=0x60080000)
+    cn.fill_many = mock.Mock()
 
     # Perform the SDRAM allocation
     with cn(app_id=33):
@@ -49,11 +50,23 @@ def test_sdram_alloc_for_vertices(core_as_tag, clear):
 
     # Ensure the correct calls were made to sdram_alloc
     cn.sdram_alloc.assert_has_calls([
-        mock.call(400, 1 if core_as_tag else 0, 0, 0, 33, clear),
-        mock.call(200, 2 if core_as_tag else 0, 0, 0, 33, clear),
-        mock.call(100, 1 if core_as_tag else 0, 1, 1, 33, clear),
+        mock.call(400, 1 if core_as_tag else 0, 0, 0, 33, False),
+        mock.call(200, 2 if core_as_tag else 0, 0, 0, 33, False),
+        mock.call(100, 1 if core_as_tag else 0, 1, 1, 33, False),
     ], any_order=True)
 
+    # The memory should be cleared with a single call to fill_many
+    if clear:
+        assert cn.fill_many.call_count == 1
+        fills = list(cn.fill_many.call_args[0][0])
+        assert sorted(fills) == sorted([
+            (0, 0, 0, allocs[vertices[0]]._start_address, 0, 400),
+            (0, 0, 0, allocs[vertices[1]]._start_address, 0, 200),
+            (1, 1, 0, allocs[vertices[2]]._start_address, 0, 100),
+        ])
+    else:
+        assert not cn.fill_many.called
+
     # Ensure that every vertex has a memory file-like
     assert len(allocs) == 3
     assert isinstance(allocs[vertices[0]], MemoryIO)
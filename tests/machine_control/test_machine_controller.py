@@ -5,6 +5,7 @@ import six
 from six import iteritems, itervalues
 import struct
 import tempfile
+import threading
 import os
 import time
 import itertools
@@ -15,16 +16,18 @@ from rig.machine_control.consts import (
 from rig.machine_control.machine_controller import (
     MachineController, SpiNNakerBootError, SpiNNakerMemoryError, MemoryIO,
     SpiNNakerRouterError, SpiNNakerLoadingError, SystemInfo, CoreInfo,
-    ChipInfo, ProcessorStatus, unpack_routing_table_entry, TruncationWarning
+    ChipInfo, ProcessorStatus, unpack_routing_table_entry, TruncationWarning,
+    unpack_routing_table_entries, pack_routing_table_entries
 )
 from rig.machine_control.packets import SCPPacket
 from rig.machine_control.scp_connection import \
-    SCPConnection, SCPError
+    SCPConnection, SCPError, TimeoutError, FatalReturnCodeError, PacketLimit
 from rig.machine_control import boot, regions, consts, struct_file
+from rig.machine_control import machine_controller
 
 from rig.links import Links
 
-from rig.routing_table import RoutingTableEntry, Routes
+from rig.routing_table import RoutingTableEntry, Routes, RoutingTable
 
 
 @pytest.fixture(scope="module")
@@ -739,6 +742,58 @@ class TestMachineController(object):
         for call in mock_get_software_version.mock_calls:
             assert call == mock.call(255, 255, 0)
 
+    @pytest.mark.parametrize("boot_succeeds", [True, False])
+    def test_boot_fast(self, boot_succeeds, monkeypatch):
+        mc = MachineController("localhost")
+
+        mock_boot = mock.Mock(return_value=mc.structs)
+        monkeypatch.setattr(boot, "boot", mock_boot)
+
+        # The machine initially doesn't respond, then indicates the P2P
+        # network is not yet up and then that the number of active P2P
+        # addresses is growing before settling.
+        if boot_succeeds:
+            responses = [SCPError(),
+                         0,
+                         1, 3,
+                         1, 5,
+                         1, 5]
+        else:
+            responses = [SCPError()] * 1000
+        mock_read_struct_field = mock.Mock(side_effect=responses)
+        monkeypatch.setattr(MachineController, "read_struct_field",
+                            mock_read_struct_field)
+
+        if boot_succeeds:
+            assert mc.boot(only_if_needed=False, fast=True,
+                           boot_timeout=10.0) is True
+            assert mock_read_struct_field.mock_calls == [
+                mock.call("sv", "p2p_up", 255, 255),
+                mock.call("sv", "p2p_up", 255, 255),
+                mock.call("sv", "p2p_up", 255, 255),
+                mock.call("sv", "p2p_active", 255, 255),
+                mock.call("sv", "p2p_up", 255, 255),
+                mock.call("sv", "p2p_active", 255, 255),
+                mock.call("sv", "p2p_up", 255, 255),
+                mock.call("sv", "p2p_active", 255, 255),
+            ]
+        else:
+            with pytest.raises(SpiNNakerBootError):
+                mc.boot(only_if_needed=False, fast=True, boot_timeout=0.1)
+
+        mock_boot.assert_called_once_with("localhost",
+                                          boot_port=consts.BOOT_PORT,
+                                          fast=True)
+
+    def test_boot_fast_check_booted(self, monkeypatch):
+        # Fast boot always waits for the machine to boot
+        mc = MachineController("localhost")
+        mock_boot = mock.Mock(return_value=mc.structs)
+        monkeypatch.setattr(boot, "boot", mock_boot)
+        with pytest.raises(ValueError):
+            mc.boot(only_if_needed=False, fast=True, check_booted=False)
+        assert not mock_boot.called
+
     def test_boot_width_height_deprecated(self, monkeypatch):
         mc = MachineController("localhost")
 
@@ -838,7 +893,18 @@ class TestMachineController(object):
         else:
             assert ip is None
 
-    def test__get_connection(self):
+    def test_close(self):
+        cn = MachineController("localhost")
+        conn0 = mock.Mock()
+        conn1 = mock.Mock()
+        cn.connections = {None: conn0, (0, 0): conn0, (4, 8): conn1}
+
+        # Each distinct connection is closed once
+        cn.close()
+        conn0.close.assert_called_once_with()
+        conn1.close.assert_called_once_with()
+
+    def test_get_connection(self):
         cn = MachineController("localhost")
         cn.connections = {
             None: "default",
@@ -849,11 +915,11 @@ class TestMachineController(object):
 
         # Until _width and _height are set, the default should be used at all
         # times.
-        assert cn._get_connection(0, 0) == "default"
-        assert cn._get_connection(1, 0) == "default"
-        assert cn._get_connection(0, 1) == "default"
-        assert cn._get_connection(11, 0) == "default"
-        assert cn._get_connection(0, 11) == "default"
+        assert cn.get_connection(0, 0) == "default"
+        assert cn.get_connection(1, 0) == "default"
+        assert cn.get_connection(0, 1) == "default"
+        assert cn.get_connection(11, 0) == "default"
+        assert cn.get_connection(0, 11) == "default"
 
         # With width and height specified, the local connector should be used
         # in all cases when possible
@@ -861,18 +927,74 @@ class TestMachineController(object):
         cn._height = 12
         cn._root_chip = (0, 0)
 
-        assert cn._get_connection(0, 0) == "0,0"
-        assert cn._get_connection(1, 0) == "0,0"
-        assert cn._get_connection(0, 1) == "0,0"
+        assert cn.get_connection(0, 0) == "0,0"
+        assert cn.get_connection(1, 0) == "0,0"
+        assert cn.get_connection(0, 1) == "0,0"
 
-        assert cn._get_connection(4, 8) == "4,8"
-        assert cn._get_connection(5, 8) == "4,8"
-        assert cn._get_connection(4, 9) == "4,8"
+        assert cn.get_connection(4, 8) == "4,8"
+        assert cn.get_connection(5, 8) == "4,8"
+        assert cn.get_connection(4, 9) == "4,8"
 
         # When a missing a connection, another connection should be used
-        assert cn._get_connection(8, 4) in ("default", "0,0", "4,8")
-        assert cn._get_connection(9, 4) in ("default", "0,0", "4,8")
-        assert cn._get_connection(8, 5) in ("default", "0,0", "4,8")
+        assert cn.get_connection(8, 4) in ("default", "0,0", "4,8")
+        assert cn.get_connection(9, 4) in ("default", "0,0", "4,8")
+        assert cn.get_connection(8, 5) in ("default", "0,0", "4,8")
+
+        # Degraded connections should be avoided
+        cn.degraded_connections = set([(4, 8)])
+        assert cn.get_connection(4, 8) in ("default", "0,0")
+        assert cn.get_connection(0, 0) == "0,0"
+        cn.degraded_connections = set([(4, 8), None])
+        assert cn.get_connection(4, 8) == "0,0"
+        assert cn.get_connection(8, 4) == "0,0"
+
+        # If all connections are degraded, the default should be used
+        cn.degraded_connections = set([(4, 8), None, (0, 0)])
+        assert cn.get_connection(4, 8) == "default"
+
+    def test_get_connection_nearest(self):
+        cn = MachineController("localhost")
+        cn.connections = {
+            None: mock.Mock(n_outstanding=0),
+            (0, 0): mock.Mock(n_outstanding=0),
+            (12, 12): mock.Mock(n_outstanding=0),
+        }
+
+        # Wrap-around links exist in a 24x24 machine
+        cn._width = cn._height = 24
+        cn._root_chip = (0, 0)
+
+        # Local connections used when available
+        assert cn.get_connection(13, 13) is cn.connections[(12, 12)]
+
+        # The nearest connection should be chosen, taking wrap-around links
+        # into account
+        assert cn.get_connection(16, 8) is cn.connections[(12, 12)]
+        assert cn.get_connection(1, 18) is cn.connections[(0, 0)]
+
+        # When equally near, the least loaded connection should be used
+        cn.connections[(0, 0)].n_outstanding = 10
+        assert cn.get_connection(4, 8) is cn.connections[(12, 12)]
+        cn.connections[(12, 12)].n_outstanding = 20
+        assert cn.get_connection(4, 8) is cn.connections[(0, 0)]
+
+        # Changes to the set of connections should be noticed once reported
+        assert cn.get_connection(8, 4) is cn.connections[(0, 0)]
+        cn.connections[(4, 8)] = mock.Mock(n_outstanding=0)
+        cn._connections_changed()
+        assert cn.get_connection(8, 4) is cn.connections[(4, 8)]
+        cn.degraded_connections = set([(4, 8)])
+        assert cn.get_connection(8, 4) is cn.connections[(0, 0)]
+
+        # In a machine without wrap-around links, the mesh distance should be
+        # used
+        cn._width = cn._height = 20
+        assert cn.get_connection(1, 18) is cn.connections[(12, 12)]
+
+        # When all known connections are degraded, the initial connection
+        # should be used
+        cn.degraded_connections = set([(0, 0), (4, 8), (12, 12)])
+        assert cn.get_connection(1, 18) is cn.connections[None]
 
     def test_discover_connections(self):
         # In this test, the discovered system is a 12-board system with the
@@ -899,14 +1021,22 @@ class TestMachineController(object):
         cn.get_ip_address = mock.Mock(side_effect=get_ip_address)
 
         def get_software_version(x=255, y=255, p=0):
-            if (x, y) == (8, 4):
-                raise SCPError("Fail.")
             if (x, y) == (255, 255):
                 return mock.Mock(position=(0, 0))
         cn.get_software_version = mock.Mock(side_effect=get_software_version)
 
+        def ping_connection(connection, x=255, y=255):
+            if (x, y) == (8, 4):
+                raise SCPError("Fail.")
+        cn._ping_connection = mock.Mock(side_effect=ping_connection)
+
         cn.connections[(20, 4)] = mock.Mock()
 
+        # Any packet limit should be applied to new connections
+        cn.packet_limit = PacketLimit(4)
+        assert cn.connections[None].packet_limit is cn.packet_limit
+        assert cn.connections[(20, 4)].packet_limit is cn.packet_limit
+
         assert cn.discover_connections() == 7
         assert cn._width == w
         assert cn._height == h
@@ -920,6 +1050,147 @@ class TestMachineController(object):
         assert isinstance(cn.connections[(12, 12)], SCPConnection)
         assert isinstance(cn.connections[(16, 20)], SCPConnection)
         assert isinstance(cn.connections[(20, 16)], SCPConnection)
+        assert all(connection.packet_limit is cn.packet_limit
+                   for connection in cn.connections.values())
+
+    def test_discover_connections_timeout(self):
+        # A 3-board system where one board is very slow to respond.
+        cn = MachineController("localhost")
+        cn._root_chip = (0, 0)
+        cn.get_p2p_routing_table = mock.Mock(return_value={
+            (x, y): consts.P2PTableEntry.north
+            for x in range(12)
+            for y in range(12)
+        })
+        cn.get_ip_address = mock.Mock(return_value="127.0.0.1")
+
+        def ping_connection(connection, x=255, y=255):
+            if (x, y) == (4, 8):
+                time.sleep(1.0)
+        cn._ping_connection = mock.Mock(side_effect=ping_connection)
+
+        before = time.time()
+        assert cn.discover_connections(timeout=0.1) == 2
+        assert time.time() - before < 0.9
+        assert set(cn.connections) == set([None, (0, 0), (8, 4)])
+
+    @pytest.mark.parametrize("before_return", [True, False])
+    def test_discover_connections_timeout_late_connections(
+            self, monkeypatch, before_return):
+        # A connection established after the deadline must be either used or
+        # closed, never leaked. If before_return is True, the connection is
+        # established after the deadline but before discover_connections has
+        # finished; otherwise it is established afterwards.
+        cn = MachineController("localhost")
+        cn._root_chip = (0, 0)
+        cn.get_p2p_routing_table = mock.Mock(return_value={
+            (x, y): consts.P2PTableEntry.north
+            for x in range(12)
+            for y in range(12)
+        })
+        cn.get_ip_address = mock.Mock(side_effect=lambda x, y: str((x, y)))
+
+        connections = {}
+
+        def make_connection(ip, *args):
+            connections[ip] = mock.Mock(spec=SCPConnection)
+            return connections[ip]
+        monkeypatch.setattr(machine_controller, "SCPConnection",
+                            mock.Mock(side_effect=make_connection))
+
+        # The slow board responds once released
+        release = threading.Event()
+
+        def ping_connection(connection, x=255, y=255):
+            if (x, y) == (4, 8):
+                release.wait(2.0)
+        cn._ping_connection = mock.Mock(side_effect=ping_connection)
+
+        real_run_concurrently = machine_controller.run_concurrently
+
+        def run_concurrently(functions, timeout=None):
+            results = real_run_concurrently(functions, timeout)
+            if before_return:
+                release.set()
+                time.sleep(0.2)
+            return results
+        monkeypatch.setattr(machine_controller, "run_concurrently",
+                            run_concurrently)
+
+        num_new = cn.discover_connections(timeout=0.1)
+        release.set()
+        time.sleep(0.2)
+
+        slow = connections[str((4, 8))]
+        if (4, 8) in cn.connections:
+            assert num_new == 3
+            assert cn.connections[(4, 8)] is slow
+            assert not slow.close.called
+        else:
+            assert num_new == 2
+            slow.close.assert_called_once_with()
+        assert not connections[str((0, 0))].close.called
+        assert not connections[str((8, 4))].close.called
+
+    def test_check_connections(self):
+        cn = MachineController("localhost")
+        cn.connections[None] = mock.Mock(spec_set=SCPConnection)
+        cn.connections[(0, 0)] = mock.Mock(spec_set=SCPConnection)
+        cn.connections[(4, 8)] = mock.Mock(spec_set=SCPConnection)
+
+        # Initially everything is fine and should be checked via the right
+        # connection
+        version = cn._connections_version
+        assert cn.check_connections(max_failures=2) == set()
+        assert cn.degraded_connections == set()
+        for xy, (x, y) in [(None, (255, 255)),
+                           ((0, 0), (0, 0)),
+                           ((4, 8), (4, 8))]:
+            cn.connections[xy].send_scp.assert_called_once_with(
+                consts.SCP_SVER_RECEIVE_LENGTH_MAX, x, y, 0,
+                SCPCommands.sver)
+
+        # Connections should only be marked degraded after repeated timeouts
+        # (other errors indicate the connection is working).
+        cn.connections[(0, 0)].send_scp.side_effect = TimeoutError()
+        cn.connections[(4, 8)].send_scp.side_effect = \
+            FatalReturnCodeError(0x81)
+        assert cn.check_connections(max_failures=2) == set()
+        # The cache of nearest connections is only invalidated when the set
+        # of degraded connections changes
+        assert cn._connections_version == version
+        assert cn.check_connections(max_failures=2) == set([(0, 0)])
+        assert cn._connections_version == version + 1
+        assert cn.degraded_connections == set([(0, 0)])
+        assert cn.get_connection(0, 0) is cn.connections[None]
+
+        # Recovery should be immediate
+        cn.connections[(0, 0)].send_scp.side_effect = None
+        assert cn.check_connections(max_failures=2) == set()
+        assert cn.degraded_connections == set()
+
+        # Failure counts should have been reset
+        cn.connections[(0, 0)].send_scp.side_effect = TimeoutError()
+        assert cn.check_connections(max_failures=2) == set()
+
+    def test_health_checks(self):
+        cn = MachineController("localhost")
+        cn.check_connections = mock.Mock()
+
+        cn.stop_health_checks()  # No-op when not running
+
+        cn.start_health_checks(interval=0.01, max_failures=5)
+        with pytest.raises(RuntimeError):
+            cn.start_health_checks()
+        time.sleep(0.1)
+        cn.stop_health_checks()
+
+        assert cn.check_connections.called
+        cn.check_connections.assert_called_with(5)
+
+        # Should be able to restart
+        cn.start_health_checks(interval=0.01)
+        cn.stop_health_checks()
 
     @pytest.mark.parametrize("size", [128, 256])
     def test_scp_data_length(self, size):
@@ -988,6 +1259,149 @@ class TestMachineController(object):
             buffer_size, window_size, x, y, p, start_address, length
         )
 
+    def _mock_burst_connections(self, cn, ethernet_chips, memory,
+                                other_command=None):
+        """Replace the connections of a controller with mocks whose
+        send_scp_burst methods simulate read/write packets against a shared
+        memory dictionary {(x, y, address): byte}.
+
+        Other commands are acknowledged with a packet whose arg1 is the value
+        returned by other_command(call).
+
+        Returns a dictionary {(x, y): [scpcall, ...]} recording the packets
+        sent by each connection.
+        """
+        sent = {}
+        for eth_xy in ethernet_chips:
+            conn = mock.Mock(spec_set=SCPConnection)
+            sent[eth_xy] = []
+
+            def send_scp_burst(buffer_size, window_size, calls, eth_xy=eth_xy):
+                for call in calls:
+                    sent[eth_xy].append(call)
+                    address, length = call.arg1, call.arg2
+                    if call.cmd == SCPCommands.read:
+                        # Response: padding, SDP header, cmd_rc, seq, data
+                        call.callback(
+                            b"\x00" * (6 + consts.SDP_HEADER_LENGTH) +
+                            bytes(bytearray(
+                                memory.get((call.x, call.y, address + i), 0)
+                                for i in range(length))))
+                    elif call.cmd == SCPCommands.write:
+                        for i, byte in enumerate(bytearray(call.data)):
+                            memory[(call.x, call.y, address + i)] = byte
+                        call.callback(None)
+                    else:
+                        call.callback(
+                            b"\x00" * (2 + consts.SDP_HEADER_LENGTH) +
+                            struct.pack("<2HI", 0x80, 0, other_command(call)))
+            conn.send_scp_burst.side_effect = send_scp_burst
+            cn.connections[eth_xy] = conn
+        cn.connections[None] = cn.connections[ethernet_chips[0]]
+        return sent
+
+    def test_read_many_write_many(self):
+        cn = MachineController("localhost")
+        cn._scp_data_length = 16
+        cn._width = cn._height = 24
+        cn._root_chip = (0, 0)
+        memory = {}
+        sent = self._mock_burst_connections(cn, [(0, 0), (4, 8)], memory)
+
+        # Writes spanning multiple packets and different boards
+        cn.write_many([
+            (0, 0, 1, 0x1000, b"\x01" * 20),
+            (5, 9, 0, 0x2000, b"\x02\x03"),
+            (1, 1, 0, 0x3000, b""),
+        ])
+        assert len(sent[(0, 0)]) == 2
+        assert len(sent[(4, 8)]) == 1
+        assert all(call.p == 1 for call in sent[(0, 0)])
+        assert sent[(4, 8)][0].x == 5
+        assert sent[(4, 8)][0].y == 9
+
+        # Read back the data, again spanning multiple packets and boards
+        assert cn.read_many([
+            (5, 9, 0, 0x2000, 3),
+            (0, 0, 0, 0x1000 - 1, 22),
+            (1, 1, 0, 0x3000, 0),
+        ]) == [
+            b"\x02\x03\x00",
+            b"\x00" + b"\x01" * 20 + b"\x00",
+            b"",
+        ]
+        assert len(sent[(0, 0)]) == 4
+        assert len(sent[(4, 8)]) == 2
+
+    def test_fill_many(self):
+        cn = MachineController("localhost")
+        cn._scp_data_length = 16
+        cn._width = cn._height = 24
+        cn._root_chip = (0, 0)
+        memory = {}
+        fills = []
+
+        def fill(call):
+            assert call.cmd == SCPCommands.fill
+            assert call.arg1 % 4 == 0 and call.arg3 % 4 == 0
+            fills.append(call)
+            for i in range(call.arg3):
+                memory[(call.x, call.y, call.arg1 + i)] = call.arg2 & 0xff
+            return 0
+        sent = self._mock_burst_connections(cn, [(0, 0), (4, 8)], memory,
+                                            fill)
+
+        cn.fill_many([
+            # Adjacent and overlapping regions are merged into one fill
+            (0, 0, 0, 0x1000, 0xAB, 8),
+            (0, 0, 1, 0x1008, 0xAB, 8),
+            (0, 0, 0, 0x1004, 0xAB, 4),
+            # ...but not if they're to be filled with different values
+            (0, 0, 0, 0x1010, 0xCD, 4),
+            # Unaligned bytes are written
+            (5, 9, 0, 0x2001, 0x11, 8),
+            # Regions smaller than a word
+            (5, 9, 0, 0x3001, 0x22, 2),
+            # Empty regions are ignored
+            (1, 1, 0, 0x4000, 0x33, 0),
+        ])
+
+        assert [(c.x, c.y, c.p, c.arg1, c.arg2, c.arg3) for c in fills] == [
+            (0, 0, 0, 0x1000, 0xABABABAB, 16),
+            (0, 0, 0, 0x1010, 0xCDCDCDCD, 4),
+            (5, 9, 0, 0x2004, 0x11111111, 4),
+        ]
+        assert len(sent[(0, 0)]) == 2
+        assert len(sent[(4, 8)]) == 4
+
+        assert memory == dict(
+            [((0, 0, 0x1000 + i), 0xAB) for i in range(16)] +
+            [((0, 0, 0x1010 + i), 0xCD) for i in range(4)] +
+            [((5, 9, 0x2001 + i), 0x11) for i in range(8)] +
+            [((5, 9, 0x3001 + i), 0x22) for i in range(2)])
+
+    def test_send_scp_bursts_concurrently(self):
+        # Bursts through different connections should be performed at the
+        # same time (and so only complete when both are running)
+        cn = MachineController("localhost")
+        cn._scp_data_length = 256
+        cn._width = cn._height = 24
+        cn._root_chip = (0, 0)
+        lock = threading.Lock()
+        started = []
+        all_started = threading.Event()
+        for eth_xy in [(0, 0), (4, 8)]:
+            def send_scp_burst(buffer_size, window_size, calls):
+                with lock:
+                    started.append(True)
+                    if len(started) == 2:
+                        all_started.set()
+                assert all_started.wait(5.0)
+            cn.connections[eth_xy] = mock.Mock(spec_set=SCPConnection)
+            cn.connections[eth_xy].send_scp_burst.side_effect = send_scp_burst
+
+        cn.read_many([(0, 0, 0, 0x1000, 4), (4, 8, 0, 0x1000, 4)])
+
     @pytest.mark.parametrize(
         "buffer_size, x, y, link, start_address, length, data",
         [(128, 0, 1, Links.north, 0x67800000, 80, [b"\x11" * 80, ]),
@@ -1808,6 +2222,27 @@ class TestMachineController(object):
             exp_flags |= consts.AppFlags.wait
         assert arg2 & 0x00fc0000 == exp_flags << 18
 
+    @pytest.mark.parametrize("optimise_regions", [False, True])
+    def test_flood_fill_aplx_optimise_regions(self, cn, aplx_file,
+                                              optimise_regions):
+        cn._send_scp = mock.Mock()
+        cn.read_struct_field = mock.Mock(return_value=0x68900000)
+        targets = {(0, 0): {1, 2}, (1, 0): {1, 3}, (0, 1): {1, 2, 3}}
+
+        with mock.patch("rig.machine_control.machine_controller.regions."
+                        "compress_flood_fill_regions",
+                        wraps=regions.compress_flood_fill_regions) as cffr:
+            cn.flood_fill_aplx(aplx_file, targets, app_id=30,
+                               optimise_regions=optimise_regions)
+        cffr.assert_called_once_with(targets, optimise=optimise_regions)
+
+        # Fewer flood-fill core select packets are sent when optimising
+        n_ffcs = sum(
+            1 for call in cn._send_scp.call_args_list
+            if call[0][3] == SCPCommands.nearest_neighbour_packet and
+            call[0][4] >> 24 == NNCommands.flood_fill_core_select)
+        assert n_ffcs == (2 if optimise_regions else 3)
+
     def test_load_and_check_succeed_use_count(self):
         """Test that APLX loading doesn't take place multiple times if the core
         count comes back good.
@@ -1841,7 +2276,8 @@ class TestMachineController(object):
 
         # First and second loads
         cn.flood_fill_aplx.assert_has_calls([
-            mock.call(targets, app_id=app_id, wait=True),
+            mock.call(targets, app_id=app_id, wait=True,
+                      optimise_regions=False),
         ])
 
         # Check that count cores was called and that read__vcpu_struct wasn't!
@@ -1894,8 +2330,10 @@ class TestMachineController(object):
 
         # First and second loads
         cn.flood_fill_aplx.assert_has_calls([
-            mock.call({"test.aplx": targets}, app_id=app_id, wait=True),
-            mock.call({"test.aplx": faileds}, app_id=app_id, wait=True),
+            mock.call({"test.aplx": targets}, app_id=app_id, wait=True,
+                      optimise_regions=False),
+            mock.call({"test.aplx": faileds}, app_id=app_id, wait=True,
+                      optimise_regions=False),
         ])
 
         # Reading struct values
@@ -1942,8 +2380,10 @@ class TestMachineController(object):
 
         # First and second loads
         cn.flood_fill_aplx.assert_has_calls([
-            mock.call({"test.aplx": targets}, app_id=app_id, wait=True),
-            mock.call({"test.aplx": faileds}, app_id=app_id, wait=True),
+            mock.call({"test.aplx": targets}, app_id=app_id, wait=True,
+                      optimise_regions=False),
+            mock.call({"test.aplx": faileds}, app_id=app_id, wait=True,
+                      optimise_regions=False),
         ])
 
         # Reading struct values
@@ -2293,6 +2733,181 @@ class TestMachineController(object):
         cn.read_struct_field.assert_called_once_with("sv", "rtr_copy", x, y)
         cn.read.assert_called_once_with(addr, 1024*16, x, y)
 
+    def test_get_many_routing_table_entries(self):
+        cn = MachineController("localhost")
+        rtr_copy_addr = cn.structs[b"sv"].base + \
+            cn.structs[b"sv"][b"rtr_copy"].offset
+
+        # {(x, y): (rtr_copy, data), ...}
+        entry = (b"\x00\x00\x42\x03\x01\x00\x00\x00"
+                 b"\x55\x55\xff\xff\xff\xff\xff\xff")
+        chips = {
+            (0, 0): (0x67090000, entry + b"\xff" * 1023 * 16),
+            (4, 8): (0x67091000, b"\xff" * 1023 * 16 + entry),
+        }
+
+        def read_many(reads):
+            data = []
+            for x, y, p, address, length in reads:
+                assert p == 0
+                rtr_addr, table_data = chips[(x, y)]
+                if address == rtr_copy_addr:
+                    assert length == 4
+                    data.append(struct.pack("<I", rtr_addr))
+                else:
+                    assert address == rtr_addr
+                    assert length == 1024 * 16
+                    data.append(table_data)
+            return data
+        cn.read_many = mock.Mock(side_effect=read_many)
+
+        rte = (RoutingTableEntry({Routes.east}, 0xffff5555, 0xffffffff), 66, 3)
+        assert cn.get_many_routing_table_entries([(0, 0), (4, 8)]) == {
+            (0, 0): [rte] + [None] * 1023,
+            (4, 8): [None] * 1023 + [rte],
+        }
+
+        # All chips should be read at once
+        assert cn.read_many.call_count == 2
+
+    def _mock_router(self, cn, alloc_fails=()):
+        """Mock the connections of a controller to simulate routing table
+        loading. Returns a list to which the (x, y, arg1, arg2, arg3) of
+        alloc_free and router packets are appended. Allocating entries on the
+        chips in alloc_fails fails."""
+        cn._scp_data_length = 256
+        cn._width = cn._height = 24
+        cn._root_chip = (0, 0)
+
+        # Give each chip a distinct sdram_sys address
+        sdram_sys_addr = cn.structs[b"sv"].base + \
+            cn.structs[b"sv"][b"sdram_sys"].offset
+        memory = {}
+        for x in range(24):
+            for y in range(24):
+                addr = struct.pack("<I", 0x60000000 + (x << 16) + (y << 8))
+                for i, byte in enumerate(bytearray(addr)):
+                    memory[(x, y, sdram_sys_addr + i)] = byte
+
+        commands = []
+
+        def other_command(call):
+            commands.append((call.cmd, call.x, call.y,
+                             call.arg1, call.arg2, call.arg3))
+            if (call.cmd == SCPCommands.alloc_free and
+                    call.arg1 & 0xff == consts.AllocOperations.alloc_rtr and
+                    (call.x, call.y) not in alloc_fails):
+                return 100 + call.x
+            else:
+                return 0
+
+        self._mock_burst_connections(cn, [(0, 0), (4, 8)], memory,
+                                     other_command)
+        return commands, memory
+
+    def test_update_routing_tables(self):
+        cn = MachineController("localhost")
+        commands, memory = self._mock_router(cn)
+
+        e1 = RoutingTableEntry({Routes.core_1}, 0x1, 0xf)
+        e2 = RoutingTableEntry({Routes.east}, 0x2, 0xf)
+        e3 = RoutingTableEntry({Routes.north}, 0x3, 0xf)
+        loaded = {(0, 0): [e1], (5, 9): [e1, e2], (1, 1): [e3]}
+        new = {
+            # Unchanged (sources are not loaded and so are ignored)
+            (0, 0): [RoutingTableEntry({Routes.core_1}, 0x1, 0xf,
+                                       {Routes.west})],
+            # Changed
+            (5, 9): [e2, e1],
+            # New chip
+            (2, 2): [e3],
+            # (1, 1) is removed
+        }
+
+        assert cn.update_routing_tables(new, app_id=66,
+                                        loaded_tables=loaded) == \
+            {(5, 9), (2, 2), (1, 1)}
+
+        # Entries should be freed on all changed chips
+        free_arg1 = (66 << 8) | consts.AllocOperations.free_rtr_by_app
+        assert sorted(c[1:] for c in commands
+                      if c[0] == SCPCommands.alloc_free and
+                      c[3] == free_arg1) == \
+            [(1, 1, free_arg1, 1, 0),
+             (2, 2, free_arg1, 1, 0),
+             (5, 9, free_arg1, 1, 0)]
+
+        # New entries allocated only for chips with entries
+        alloc_arg1 = (66 << 8) | consts.AllocOperations.alloc_rtr
+        assert sorted(c[1:3] + c[4:5] for c in commands
+                      if c[0] == SCPCommands.alloc_free and
+                      c[3] == alloc_arg1) == [(2, 2, 1), (5, 9, 2)]
+
+        # Tables written to sdram_sys and loaded
+        for (x, y), table in [((5, 9), [e2, e1]), ((2, 2), [e3])]:
+            buf = 0x60000000 + (x << 16) + (y << 8)
+            data = pack_routing_table_entries(table)
+            assert bytearray(memory[(x, y, buf + i)]
+                             for i in range(len(data))) == data
+            assert (SCPCommands.router, x, y,
+                    (len(table) << 16) | (66 << 8) |
+                    consts.RouterOperations.load,
+                    buf, 100 + x) in commands
+        assert len([c for c in commands
+                    if c[0] == SCPCommands.router]) == 2
+
+        # If nothing has changed, nothing is sent
+        del commands[:]
+        assert cn.update_routing_tables(new, app_id=66,
+                                        loaded_tables=new) == set()
+        assert commands == []
+
+    def test_update_routing_tables_readback(self):
+        cn = MachineController("localhost")
+        commands, memory = self._mock_router(cn)
+
+        e1 = RoutingTableEntry({Routes.core_1}, 0x1, 0xf)
+        e2 = RoutingTableEntry({Routes.east}, 0x2, 0xf)
+        cn.get_many_routing_table_entries = mock.Mock(return_value={
+            # Entries belonging to other applications are ignored
+            (0, 0): [(e1, 66, 1), (e2, 12, 1), None],
+            (5, 9): [(e1, 66, 1), None],
+        })
+
+        assert cn.update_routing_tables({(0, 0): [e1], (5, 9): [e2]},
+                                        app_id=66) == {(5, 9)}
+        cn.get_many_routing_table_entries.assert_called_once_with(
+            {(0, 0): [e1], (5, 9): [e2]})
+        assert len([c for c in commands
+                    if c[0] == SCPCommands.router]) == 1
+
+        # Entries read back in a different order are unchanged
+        cn.get_many_routing_table_entries = mock.Mock(return_value={
+            (0, 0): [(e2, 66, 1), None, (e1, 66, 1), (e1, 66, 1)],
+        })
+        assert cn.update_routing_tables({(0, 0): [e1, e2, e1]},
+                                        app_id=66) == set()
+        assert cn.update_routing_tables({(0, 0): [e1, e2]},
+                                        app_id=66) == {(0, 0)}
+
+    def test_update_routing_tables_fails(self):
+        cn = MachineController("localhost")
+        commands, memory = self._mock_router(cn, alloc_fails={(5, 9)})
+
+        e1 = RoutingTableEntry({Routes.core_1}, 0x1, 0xf)
+        with pytest.raises(SpiNNakerRouterError) as excinfo:
+            cn.update_routing_tables({(5, 9): [e1], (2, 2): [e1]}, app_id=66,
+                                     loaded_tables={})
+        assert "(5, 9)" in str(excinfo.value)
+
+        # The entries allocated on (2, 2) should be freed again and nothing
+        # loaded
+        free_arg1 = (66 << 8) | consts.AllocOperations.free_rtr_by_app
+        frees = [c[1:3] for c in commands
+                 if c[0] == SCPCommands.alloc_free and c[3] == free_arg1]
+        assert sorted(frees[:2]) == sorted(frees[2:]) == [(2, 2), (5, 9)]
+        assert not any(c[0] == SCPCommands.router for c in commands)
+
     @pytest.mark.parametrize("x, y, app_id", [(0, 1, 65), (3, 2, 55)])
     def test_clear_routing_table_entries(self, x, y, app_id):
         # Create the controller to ensure that appropriate packets are sent
@@ -2778,6 +3393,26 @@ class TestMemoryIO(object):
         mock_controller.read.assert_called_once_with(
             start_address + offset, length - offset, x, y, 0)
 
+    @pytest.mark.parametrize("x, y", [(1, 3), (3, 0)])
+    def test_location(self, mock_controller, x, y):
+        sdram_file = MemoryIO(mock_controller, x, y, 0x60000000, 0x60000100)
+        sdram_file.seek(10)
+        assert (sdram_file.x, sdram_file.y) == (x, y)
+        assert sdram_file.start_address == 0x60000000
+        assert sdram_file.address == 0x6000000a
+
+        # Slices refer to the same chip and their own start address
+        sliced = sdram_file[0x10:0x20]
+        sliced.seek(1)
+        assert (sliced.x, sliced.y) == (x, y)
+        assert sliced.start_address == 0x60000010
+        assert sliced.address == 0x60000011
+
+        # The location is still available once closed
+        sliced.close()
+        assert (sliced.x, sliced.y, sliced.start_address) == (
+            x, y, 0x60000010)
+
     def test_read_beyond(self, mock_controller):
         sdram_file = MemoryIO(mock_controller, 0, 0,
                               start_address=0, end_address=10)
@@ -3103,3 +3738,39 @@ class TestMemoryIO(object):
 )
 def test_unpack_routing_table_entry(entry, unpacked):
     assert unpack_routing_table_entry(entry) == unpacked
+
+
+def test_pack_routing_table_entries():
+    entries = [
+        RoutingTableEntry({Routes.north, Routes.core(3)}, 0x1234, 0xffff),
+        RoutingTableEntry(set(), 0xffffffff, 0xffffffff),
+        RoutingTableEntry({Routes.core_monitor}, 0x0, 0x0, {Routes.east}),
+    ]
+    data = pack_routing_table_entries(entries)
+    assert data == bytearray(b"".join(
+        struct.pack(consts.RTE_PACK_STRING, i, 0,
+                    sum(1 << r for r in entry.route), entry.key, entry.mask)
+        for i, entry in enumerate(entries)))
+
+    # RoutingTables are packed identically
+    assert pack_routing_table_entries(RoutingTable(entries)) == data
+    assert pack_routing_table_entries(RoutingTable()) == bytearray()
+
+
+def test_unpack_routing_table_entries():
+    # Should be equivalent to unpacking each entry in turn
+    entries = [
+        b"\x00\x00\x42\x03\x01\x00\x00\x00\x55\x55\xff\xff\xff\xff\xff\xff",
+        b"\x00\x00\x03\x02\x03\x00\x00\xff\x50\x55\xff\xff\xf0\xff\xff\xff",
+        b"\x00\x00\x02\x03\x03\x00\x00\x00\x50\x55\xff\xff\xf0\xff\xff\xff",
+        b"\x00\x00\x42\x03\x01\x00\x00\x00\x55\x55\xff\xff\xff\xff\xff\xff",
+        b"\x00\x00\x07\x0f\xff\xff\xff\x00\x00\x00\x00\x00\x00\x00\x00\x00",
+    ]
+    table = unpack_routing_table_entries(b"".join(entries))
+    assert table == [unpack_routing_table_entry(entry) for entry in entries]
+    assert unpack_routing_table_entries(b"") == []
+
+    # Routes are always frozensets, which may be shared between entries
+    assert type(table[0][0].route) is frozenset
+    assert type(unpack_routing_table_entry(entries[0])[0].route) is frozenset
+    assert table[0][0].route is table[3][0].route
@@ -0,0 +1,150 @@
+import threading
+
+import pytest
+
+from rig.machine_control import MachineController
+from rig.machine_control.machine_controller import SpiNNakerBootError
+from rig.machine_control.scp_connection import TimeoutError
+from rig.machine_control.multi_machine import boot_machines, MachineSession
+
+
+def test_boot_machines(monkeypatch):
+    # 127.0.0.1 needs booting, 127.0.0.2 is already booted, 127.0.0.3 times
+    # out and 127.0.0.4 fails to boot.
+    def boot(self, **kwargs):
+        assert kwargs == {"hw_ver": 5}
+        if self.initial_host == "127.0.0.1":
+            return True
+        elif self.initial_host == "127.0.0.2":
+            return False
+        elif self.initial_host == "127.0.0.3":
+            raise TimeoutError()
+        else:
+            raise SpiNNakerBootError()
+    monkeypatch.setattr(MachineController, "boot", boot)
+
+    mc = MachineController("127.0.0.1")
+    results = boot_machines(["127.0.0.2", mc, "127.0.0.3", "127.0.0.4"],
+                            hw_ver=5)
+
+    assert list(results) == ["127.0.0.2", mc, "127.0.0.3", "127.0.0.4"]
+    assert results["127.0.0.2"].booted is False
+    assert results["127.0.0.2"].error is None
+    assert results[mc].booted is True
+    assert results[mc].error is None
+    assert results["127.0.0.3"].booted is False
+    assert isinstance(results["127.0.0.3"].error, TimeoutError)
+    assert results["127.0.0.4"].booted is False
+    assert isinstance(results["127.0.0.4"].error, SpiNNakerBootError)
+    for result in results.values():
+        assert result.duration >= 0.0
+
+
+def test_boot_machines_closes_controllers(monkeypatch):
+    # Controllers created by boot_machines should be closed, even on failure,
+    # but those supplied should not.
+    def boot(self):
+        if self.initial_host == "127.0.0.2":
+            raise TimeoutError()
+        return True
+    monkeypatch.setattr(MachineController, "boot", boot)
+    closed = []
+    monkeypatch.setattr(MachineController, "close",
+                        lambda self: closed.append(self.initial_host))
+
+    mc = MachineController("127.0.0.3")
+    boot_machines(["127.0.0.1", "127.0.0.2", mc])
+    assert sorted(closed) == ["127.0.0.1", "127.0.0.2"]
+
+
+def test_boot_machines_concurrent(monkeypatch):
+    # All machines must be booting at once for any boot to complete
+    started = []
+    lock = threading.Lock()
+    all_started = threading.Event()
+
+    def boot(self):
+        with lock:
+            started.append(self.initial_host)
+            if len(started) == 3:
+                all_started.set()
+        return all_started.wait(5.0)
+    monkeypatch.setattr(MachineController, "boot", boot)
+
+    results = boot_machines(["127.0.0.1", "127.0.0.2", "127.0.0.3"])
+    assert all(result.booted for result in results.values())
+
+
+def test_machine_session(monkeypatch):
+    def read(self, address, length, x, y, p=0):
+        return (self.initial_host, address, length, x, y, p)
+    monkeypatch.setattr(MachineController, "read", read)
+
+    with MachineSession(max_workers=2) as session:
+        mc1 = session.add_machine("127.0.0.1")
+        mc2 = MachineController("127.0.0.2")
+        assert session.add_machine("job2", mc2) is mc2
+        assert list(session.machines) == ["127.0.0.1", "job2"]
+        assert session.machines["127.0.0.1"] is mc1
+        assert mc1.packet_limit is None
+
+        # Names must be unique
+        with pytest.raises(ValueError):
+            session.add_machine("job2")
+
+        # Methods may be called via the proxy, by name or as functions
+        f1 = session["127.0.0.1"].read(0x1000, 4, 1, 2)
+        f2 = session.submit("job2", "read", 0x2000, 8, 3, 4, p=1)
+        f3 = session.submit("job2", lambda mc, a: (mc, a), 123)
+        assert f1.result(1.0) == ("127.0.0.1", 0x1000, 4, 1, 2, 0)
+        assert f2.result(1.0) == ("127.0.0.2", 0x2000, 8, 3, 4, 1)
+        assert f3.result(1.0) == (mc2, 123)
+
+        with pytest.raises(KeyError):
+            session["nonexistent"]
+
+    # Connections are closed on shutdown
+    for mc in (mc1, mc2):
+        with pytest.raises(Exception):
+            mc.connections[None].sock.send(b"")
+
+
+def test_machine_session_shared_pool(monkeypatch):
+    # No more than max_workers operations should run at once
+    lock = threading.Lock()
+    running = [0]
+    max_running = [0]
+
+    def get_system_info(self):
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+        threading.Event().wait(0.02)
+        with lock:
+            running[0] -= 1
+        return self.initial_host
+    monkeypatch.setattr(MachineController, "get_system_info",
+                        get_system_info)
+
+    hostnames = ["127.0.0.{}".format(i) for i in range(1, 7)]
+    with MachineSession(max_workers=2) as session:
+        for hostname in hostnames:
+            session.add_machine(hostname)
+        futures = [session[hostname].get_system_info()
+                   for hostname in hostnames]
+        assert [f.result(5.0) for f in futures] == hostnames
+
+    assert max_running[0] == 2
+
+
+def test_machine_session_packet_limit():
+    with MachineSession(max_outstanding_packets=4) as session:
+        mc1 = session.add_machine("127.0.0.1")
+        mc2 = session.add_machine("127.0.0.2")
+
+        # A single limit should be shared by all connections
+        assert session.packet_limit.max_outstanding == 4
+        assert mc1.packet_limit is session.packet_limit
+        assert mc2.packet_limit is session.packet_limit
+        assert mc1.connections[None].packet_limit is session.packet_limit
+        assert mc2.connections[None].packet_limit is session.packet_limit
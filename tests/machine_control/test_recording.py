@@ -0,0 +1,140 @@
+import struct
+from collections import OrderedDict
+
+import mock
+import numpy as np
+import pytest
+
+from rig.machine_control import MachineController
+from rig.machine_control.machine_controller import MemoryIO
+from rig.machine_control.recording import \
+    RECORDING_HEADER_LENGTH, init_recording_buffers, stream_recordings
+
+
+class FakeMemory(object):
+    """A mock MachineController's read_many/write_many backed by a dictionary
+    of memory blocks."""
+
+    def __init__(self):
+        # {(x, y): (base_address, bytearray)}
+        self.blocks = {}
+
+    def add_block(self, x, y, address, size):
+        self.blocks[(x, y)] = (address, bytearray(size))
+        return self.blocks[(x, y)][1]
+
+    def read_many(self, reads):
+        out = []
+        for x, y, p, address, length in reads:
+            base, mem = self.blocks[(x, y)]
+            assert address >= base
+            assert address + length <= base + len(mem)
+            out.append(bytes(mem[address - base:address - base + length]))
+        return out
+
+    def write_many(self, writes):
+        for x, y, p, address, data in writes:
+            base, mem = self.blocks[(x, y)]
+            assert address >= base
+            assert address + len(data) <= base + len(mem)
+            mem[address - base:address - base + len(data)] = data
+
+
+@pytest.fixture
+def mock_controller():
+    memory = FakeMemory()
+    cn = mock.Mock(spec=MachineController)
+    cn.read_many.side_effect = memory.read_many
+    cn.write_many.side_effect = memory.write_many
+    cn.memory = memory
+    return cn
+
+
+def record(mem, data):
+    """Record some data into a (fake) buffer as an application would."""
+    ring_size = len(mem) - RECORDING_HEADER_LENGTH
+    head, tail = struct.unpack_from("<2I", mem)
+    for byte in bytearray(data):
+        assert (head + 1) % ring_size != tail, "Buffer full"
+        mem[RECORDING_HEADER_LENGTH + head] = byte
+        head = (head + 1) % ring_size
+    struct.pack_into("<I", mem, 0, head)
+
+
+def test_init_recording_buffers(mock_controller):
+    mem = mock_controller.memory.add_block(1, 2, 0x60000000, 32)
+    mem[:] = b"\xff" * 32
+    buffers = {"v": MemoryIO(mock_controller, 1, 2, 0x60000000, 0x60000020)}
+
+    init_recording_buffers(mock_controller, buffers)
+    assert mem[:8] == b"\x00" * 8
+    assert mem[8:] == b"\xff" * 24
+
+
+def test_buffer_too_small(mock_controller):
+    buffers = {"v": MemoryIO(mock_controller, 1, 2, 0x60000000, 0x60000008)}
+    with pytest.raises(ValueError):
+        list(stream_recordings(mock_controller, buffers, stop=lambda: True))
+
+
+def test_stream_recordings(mock_controller):
+    mem_a = mock_controller.memory.add_block(0, 0, 0x60000000, 16)
+    mem_b = mock_controller.memory.add_block(1, 0, 0x61000000, 64)
+    buffers = OrderedDict([
+        ("a", MemoryIO(mock_controller, 0, 0, 0x60000000, 0x60000010)),
+        ("b", MemoryIO(mock_controller, 1, 0, 0x61000000, 0x61000040)),
+    ])
+
+    # Record some data in "a" only, initially
+    record(mem_a, b"\x01\x02\x03")
+
+    # The application "records" more data each time we check the stop
+    # condition
+    polls = []
+
+    def stop():
+        polls.append(None)
+        if len(polls) == 2:
+            # Wraps around the end of the 8-byte ring
+            record(mem_a, b"\x04\x05\x06\x07\x08\x09")
+            record(mem_b, b"\x0a")
+        elif len(polls) == 3:
+            # Nothing new
+            pass
+        elif len(polls) == 4:
+            record(mem_b, b"\x0b\x0c")
+            return True
+        return False
+
+    chunks = list(stream_recordings(mock_controller, buffers, stop=stop,
+                                    poll_interval=0.0))
+
+    assert len(polls) == 4
+    assert [vertex for vertex, _ in chunks] == ["a", "a", "b", "b"]
+    for _, chunk in chunks:
+        assert isinstance(chunk, np.ndarray)
+        assert chunk.dtype == np.uint8
+    assert list(chunks[0][1]) == [1, 2, 3]
+    assert list(chunks[1][1]) == [4, 5, 6, 7, 8, 9]
+    assert list(chunks[2][1]) == [10]
+    assert list(chunks[3][1]) == [11, 12]
+
+    # Tail pointers should have been advanced to the head pointers
+    assert struct.unpack_from("<2I", mem_a) == (1, 1)
+    assert struct.unpack_from("<2I", mem_b) == (3, 3)
+
+
+def test_stream_recordings_partial_elements(mock_controller):
+    mem = mock_controller.memory.add_block(0, 0, 0x60000000, 32)
+    buffers = {"a": MemoryIO(mock_controller, 0, 0, 0x60000000, 0x60000020)}
+
+    # Only whole 16-bit values should be returned
+    record(mem, b"\x01\x00\x02")
+    chunks = list(stream_recordings(mock_controller, buffers,
+                                    stop=lambda: True, dtype=np.uint16))
+    assert len(chunks) == 1
+    assert chunks[0][1].dtype == np.uint16
+    assert list(chunks[0][1]) == [1]
+
+    # The remaining byte should remain in the buffer
+    assert struct.unpack_from("<2I", mem) == (3, 2)
@@ -1,8 +1,11 @@
 import collections
+import random
+
 import pytest
 
 from rig.machine_control.regions import (
-    get_region_for_chip, compress_flood_fill_regions, RegionCoreTree)
+    get_region_for_chip, compress_flood_fill_regions, RegionCoreTree,
+    minimise_coremasks)
 
 
 # NOTE: Test vectors taken from C implementation
@@ -29,7 +32,8 @@ def test_get_region_for_chip(x, y, level, region):
     assert get_region_for_chip(x, y, level) == region
 
 
-def test_get_regions_and_cores_for_floodfill():
+@pytest.mark.parametrize("optimise", [False, True])
+def test_get_regions_and_cores_for_floodfill(optimise):
     """This test looks at trying to minimise the number of flood-fills required
     to load an application.  The required chips are in two level-3 regions and
     have different core requirements for each chip.
@@ -44,7 +48,7 @@ def test_get_regions_and_cores_for_floodfill():
     # Test
     seen_fills = collections.defaultdict(set)
     last = (0, 0)
-    for (region, cores) in compress_flood_fill_regions(targets):
+    for (region, cores) in compress_flood_fill_regions(targets, optimise):
         assert (region, cores) >= last
         last = (region, cores)
 
@@ -68,7 +72,27 @@ def test_get_regions_and_cores_for_floodfill():
     assert seen_fills == targets
 
 
-def test_get_regions_and_cores_for_floodfill_ordering():
+def test_get_regions_and_cores_for_floodfill_optimise():
+    """Cores selected in overlapping sets of chips can be selected using fewer
+    regions than grouping them by the chips they're selected on.
+    """
+    targets = {
+        (0, 0): {1, 2},
+        (1, 0): {1, 3},
+        (0, 1): {1, 2, 3},
+    }
+
+    assert len(compress_flood_fill_regions(targets)) == 3
+    fills = compress_flood_fill_regions(targets, optimise=True)
+    assert fills == sorted(fills)
+    assert set(fills) == {
+        (get_region_for_chip(0, 0) | get_region_for_chip(0, 1), 0b0110),
+        (get_region_for_chip(1, 0) | get_region_for_chip(0, 1), 0b1010),
+    }
+
+
+@pytest.mark.parametrize("optimise", [False, True])
+def test_get_regions_and_cores_for_floodfill_ordering(optimise):
     """This test explicitly checks that ordering across subregions works
     correctly. Two level-3 regions are created in the level-2 region
     originating at (0, 0). Importantly these two lower-level regions are
@@ -83,11 +107,55 @@ def test_get_regions_and_cores_for_floodfill_ordering():
 
     # Test the ordering across the subregions
     last = (0, 0)
-    for (region, cores) in compress_flood_fill_regions(targets):
+    for (region, cores) in compress_flood_fill_regions(targets, optimise):
         assert (region, cores) >= last
         last = (region, cores)
 
 
+def covered(pairs):
+    """Get the subregions each core is selected in by a set of pairs."""
+    subregions_by_core = [0x0] * 18
+    for subregions, coremask in pairs:
+        for core in range(18):
+            if coremask & (1 << core):
+                subregions_by_core[core] |= subregions
+    return subregions_by_core
+
+
+class TestMinimiseCoremasks(object):
+    def test_empty(self):
+        assert minimise_coremasks([0x0] * 18) == []
+
+    @pytest.mark.parametrize("subregions_by_core, n_pairs", [
+        # All cores in the same subregions
+        ([0x00ff] * 18, 1),
+        # Every core in a different subregion: grouping by core is best
+        ([1 << (i % 16) for i in range(18)], 16),
+        # Overlapping sets of subregions
+        ([0b11, 0b01, 0b10] + [0x0] * 15, 2),
+        # Neither grouping by core or by subregion is minimal
+        ([0b1111, 0b0011, 0b1011, 0b1101] + [0x0] * 14, 3),
+    ])
+    def test_minimal(self, subregions_by_core, n_pairs):
+        pairs = minimise_coremasks(subregions_by_core)
+        assert len(pairs) == n_pairs
+        assert covered(pairs) == subregions_by_core
+
+    @pytest.mark.parametrize("exact_limit", [0, 32])
+    @pytest.mark.parametrize("density", [0.1, 0.5, 0.9])
+    def test_random(self, exact_limit, density):
+        # Results should always be valid and no worse than the unoptimised
+        # tree
+        rng = random.Random(density)
+        for _ in range(20):
+            subregions_by_core = [
+                sum(1 << s for s in range(16) if rng.random() < density)
+                for _ in range(18)]
+            pairs = minimise_coremasks(subregions_by_core, exact_limit)
+            assert covered(pairs) == subregions_by_core
+            assert len(pairs) <= len(set(s for s in subregions_by_core if s))
+
+
 class TestRegionCoreTree(object):
     @pytest.mark.parametrize("x, y, p", [(16, 0, 1), (0, 16, 1), (0, 0, 25)])
     def test_add_core_fails(self, x, y, p):
@@ -2,6 +2,7 @@ import collections
 import mock
 import pytest
 import struct
+import threading
 import time
 
 from rig.machine_control.consts import \
@@ -9,7 +10,7 @@ from rig.machine_control.consts import \
     FATAL_SCP_RETURN_CODES
 from rig.machine_control.packets import SCPPacket
 from rig.machine_control.scp_connection import \
-    SCPConnection, scpcall, FatalReturnCodeError
+    SCPConnection, scpcall, FatalReturnCodeError, PacketLimit
 from rig.machine_control import scp_connection
 
 
@@ -48,6 +49,12 @@ def test_close(mock_conn):
     assert mock_conn.sock.close.called
 
 
+def test_send_datagram(mock_conn):
+    mock_conn.send_datagram(b"\x00\x00hello")
+    mock_conn.sock.send.assert_called_once_with(b"\x00\x00hello")
+    assert not mock_conn.sock.recv.called
+
+
 def test_scpcall():
     """scpcall is a utility for specifying SCP packets and callbacks"""
     call = scpcall(0, 1, 2, 3)
@@ -445,6 +452,76 @@ class TestBursts(object):
         with mock.patch("select.select", new=mock_select):
             mock_conn.send_scp_burst(512, 8, packets)
 
+    @pytest.mark.parametrize("fail", [False, True])
+    def test_n_outstanding(self, mock_conn, fail):
+        """The number of packets in bursts in progress should be counted."""
+        assert mock_conn.n_outstanding == 0
+
+        def send_scp_burst(buffer_size, window_size, packets):
+            assert mock_conn.n_outstanding == 3
+            assert list(packets) == [scpcall(0, 0, 0, i) for i in range(3)]
+            if fail:
+                raise FatalReturnCodeError(0x81)
+        mock_conn._send_scp_burst = mock.Mock(side_effect=send_scp_burst)
+
+        if fail:
+            with pytest.raises(FatalReturnCodeError):
+                mock_conn.send_scp_burst(
+                    512, 8, (scpcall(0, 0, 0, i) for i in range(3)))
+        else:
+            mock_conn.send_scp_burst(
+                512, 8, (scpcall(0, 0, 0, i) for i in range(3)))
+        assert mock_conn._send_scp_burst.called
+
+        assert mock_conn.n_outstanding == 0
+
+    def test_packet_limit(self, mock_conn):
+        """The window size should be limited by a shared packet limit."""
+        limit = PacketLimit(3)
+        mock_conn.packet_limit = limit
+        window_sizes = []
+
+        def send_scp_burst(buffer_size, window_size, packets):
+            window_sizes.append(window_size)
+            assert limit._available == 3 - window_size
+        mock_conn._send_scp_burst = mock.Mock(side_effect=send_scp_burst)
+
+        mock_conn.send_scp_burst(512, 8, [scpcall(0, 0, 0, 0)])
+        mock_conn.send_scp_burst(512, 2, [scpcall(0, 0, 0, 0)])
+        assert window_sizes == [3, 2]
+
+        # The reservation should be returned
+        assert limit._available == 3
+
+        # ...even on failure
+        mock_conn._send_scp_burst.side_effect = FatalReturnCodeError(0x81)
+        with pytest.raises(FatalReturnCodeError):
+            mock_conn.send_scp_burst(512, 8, [scpcall(0, 0, 0, 0)])
+        assert limit._available == 3
+
+
+def test_packet_limit():
+    with pytest.raises(ValueError):
+        PacketLimit(0)
+
+    limit = PacketLimit(4)
+    assert limit.acquire(3) == 3
+    assert limit.acquire(3) == 1
+
+    # When exhausted, acquire should block until packets are released
+    acquired = []
+    thread = threading.Thread(target=lambda: acquired.append(limit.acquire(2)))
+    thread.start()
+    time.sleep(0.05)
+    assert acquired == []
+
+    limit.release(3)
+    thread.join(1.0)
+    assert acquired == [2]
+    limit.release(1)
+    limit.release(2)
+    assert limit.acquire(8) == 4
+
 
 @pytest.mark.parametrize(
     "buffer_size, window_size, x, y, p", [(128, 1, 0, 0, 1), (256, 5, 1, 2, 3)]
@@ -0,0 +1,196 @@
+import mock
+import pytest
+
+from rig.machine_control import MachineController
+from rig.machine_control.packets import SDPPacket
+from rig.machine_control import sdp_injector
+from rig.machine_control.sdp_injector import TokenBucket, SDPInjector
+
+
+class FakeTime(object):
+    """A replacement for the time module whose clock only advances when
+    sleep is called."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, duration):
+        self.sleeps.append(duration)
+        self.now += duration
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake_time = FakeTime()
+    monkeypatch.setattr(sdp_injector, "time", fake_time)
+    return fake_time
+
+
+def test_token_bucket(fake_time):
+    bucket = TokenBucket(rate=10.0, burst=2)
+
+    # The bucket starts full
+    bucket.consume()
+    bucket.consume()
+    assert fake_time.sleeps == []
+
+    # Further tokens must be waited for
+    bucket.consume()
+    assert fake_time.sleeps == [pytest.approx(0.1)]
+    bucket.consume()
+    assert fake_time.sleeps == [pytest.approx(0.1), pytest.approx(0.1)]
+
+    # After waiting, tokens are replenished, but only up to the burst size
+    fake_time.now += 10.0
+    bucket.consume()
+    bucket.consume()
+    assert len(fake_time.sleeps) == 2
+    bucket.consume()
+    assert len(fake_time.sleeps) == 3
+
+
+def mock_connection():
+    connection = mock.Mock()
+    connection.sent = []
+
+    # NB: The buffer sent is reused so must be copied
+    connection.send_datagram.side_effect = \
+        lambda data: connection.sent.append(bytes(data))
+    return connection
+
+
+@pytest.fixture
+def mock_controller():
+    cn = MachineController("localhost")
+    cn._width = cn._height = 24
+    cn._root_chip = (0, 0)
+    cn.connections = {
+        None: mock_connection(),
+        (4, 8): mock_connection(),
+    }
+    cn.connections[(0, 0)] = cn.connections[None]
+    return cn
+
+
+def sent_packets(connection):
+    return [SDPPacket.from_bytestring(data) for data in connection.sent]
+
+
+def test_send(mock_controller):
+    injector = SDPInjector(mock_controller, max_data_length=4)
+
+    injector.send(1, 2, 3, 4, b"\x01\x02")
+    injector.send_many([(5, 9, 6, 7, b"\x03"),
+                        (0, 0, 1, 1, b"")])
+
+    conn0 = mock_controller.connections[(0, 0)]
+    conn1 = mock_controller.connections[(4, 8)]
+    packets = sent_packets(conn0)
+    assert len(packets) == 2
+    assert packets[0].reply_expected is False
+    assert packets[0].tag == 0xff
+    assert (packets[0].dest_x, packets[0].dest_y) == (1, 2)
+    assert (packets[0].dest_cpu, packets[0].dest_port) == (3, 4)
+    assert packets[0].data == b"\x01\x02"
+    assert packets[1].data == b""
+
+    packets = sent_packets(conn1)
+    assert len(packets) == 1
+    assert (packets[0].dest_x, packets[0].dest_y) == (5, 9)
+    assert (packets[0].dest_cpu, packets[0].dest_port) == (6, 7)
+    assert packets[0].data == b"\x03"
+
+    # Overlong packets should be rejected
+    with pytest.raises(ValueError):
+        injector.send(0, 0, 1, 1, b"\x00" * 5)
+
+
+def test_send_spread(mock_controller):
+    injector = SDPInjector(mock_controller, spread=True)
+    injector.send_many((0, 0, 1, 1, b"") for _ in range(4))
+
+    # Packets should be shared between the two distinct connections
+    assert len(sent_packets(mock_controller.connections[(0, 0)])) == 2
+    assert len(sent_packets(mock_controller.connections[(4, 8)])) == 2
+
+
+def test_send_rate_limited(mock_controller, fake_time):
+    injector = SDPInjector(mock_controller, rate=100.0, burst=2)
+
+    # Rate limits apply per board: packets to different boards should not
+    # delay each other.
+    injector.send_many([(0, 0, 1, 1, b""), (1, 1, 1, 1, b""),
+                        (4, 8, 1, 1, b""), (5, 9, 1, 1, b"")])
+    assert fake_time.sleeps == []
+
+    injector.send(4, 8, 1, 1, b"")
+    assert fake_time.sleeps == [pytest.approx(0.01)]
+
+
+def test_send_many_rate_limited_boards_independent(mock_controller,
+                                                   fake_time):
+    injector = SDPInjector(mock_controller, rate=100.0, burst=1)
+    conn0 = mock_controller.connections[(0, 0)]
+    conn1 = mock_controller.connections[(4, 8)]
+
+    # Record how many packets had been sent to each board whenever the
+    # injector waits.
+    sleep = fake_time.sleep
+    sent_at_sleep = []
+
+    def record_sleep(duration):
+        sent_at_sleep.append((len(conn0.sent), len(conn1.sent)))
+        sleep(duration)
+    fake_time.sleep = record_sleep
+
+    injector.send_many([(0, 0, 1, 1, b"\x00"), (0, 0, 1, 1, b"\x01"),
+                        (1, 1, 1, 1, b"\x02"), (4, 8, 1, 1, b"\x03"),
+                        (5, 9, 1, 1, b"\x04")])
+
+    # Packets to the second board should not wait for the first board's rate
+    # limit: only one wait is needed for each board.
+    assert sent_at_sleep[0] == (1, 1)
+    assert len(fake_time.sleeps) == 2
+    assert sum(fake_time.sleeps) == pytest.approx(0.02)
+
+    # Packets to each board should be sent in order
+    assert [p.data for p in sent_packets(conn0)] == [b"\x00", b"\x01",
+                                                     b"\x02"]
+    assert [p.data for p in sent_packets(conn1)] == [b"\x03", b"\x04"]
+
+
+def test_send_many_max_pending(mock_controller, fake_time):
+    injector = SDPInjector(mock_controller, rate=100.0, burst=1)
+    injector.max_pending = 2
+
+    def packets():
+        for i in range(10):
+            # Never more than max_pending packets should be held back
+            assert i - len(mock_controller.connections[None].sent) <= 2
+            yield (0, 0, 1, 1, bytes(bytearray([i])))
+
+    injector.send_many(packets())
+    assert [p.data for p in sent_packets(mock_controller.connections[None])] \
+        == [bytes(bytearray([i])) for i in range(10)]
+
+    # Overlong packets should be rejected
+    with pytest.raises(ValueError):
+        injector.send_many([(0, 0, 1, 1, b"\x00" * 1000)])
+
+
+def test_send_spread_connections_change(mock_controller):
+    injector = SDPInjector(mock_controller, spread=True)
+    injector.send_many((0, 0, 1, 1, b"") for _ in range(2))
+
+    # Newly added connections should be used
+    mock_controller.connections[(8, 4)] = mock_connection()
+    mock_controller._connections_changed()
+    injector.send_many((0, 0, 1, 1, b"") for _ in range(3))
+
+    assert len(sent_packets(mock_controller.connections[(0, 0)])) == 2
+    assert len(sent_packets(mock_controller.connections[(4, 8)])) == 2
+    assert len(sent_packets(mock_controller.connections[(8, 4)])) == 1
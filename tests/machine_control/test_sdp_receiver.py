@@ -0,0 +1,137 @@
+import socket
+import threading
+
+import pytest
+
+from rig.machine_control.packets import SDPPacket
+from rig.machine_control.sdp_receiver import SDPReceiver
+
+
+@pytest.yield_fixture
+def receiver():
+    receiver = SDPReceiver(hostname="127.0.0.1", block_size=4,
+                           max_data_length=16)
+    yield receiver
+    receiver.close()
+
+
+@pytest.yield_fixture
+def send(receiver):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(*datagrams):
+        for datagram in datagrams:
+            sock.sendto(datagram, ("127.0.0.1", receiver.port))
+
+    yield send
+    sock.close()
+
+
+def make_packet(i, data=b"", reply_expected=False):
+    return SDPPacket(reply_expected=reply_expected, tag=i + 1,
+                     dest_port=(i + 2) % 8, dest_cpu=i + 3,
+                     src_port=(i + 4) % 8, src_cpu=i + 5,
+                     dest_x=i + 6, dest_y=i + 7, src_x=i + 8, src_y=i + 9,
+                     data=data)
+
+
+def test_port():
+    with SDPReceiver(hostname="127.0.0.1") as receiver:
+        assert receiver.port != 0
+
+
+def test_receive_block_timeout(receiver):
+    assert receiver.receive_block(timeout=0.01) is None
+    assert receiver.n_received == 0
+
+
+def test_receive_block(receiver, send):
+    packets = [make_packet(0, b"\x01\x02", reply_expected=True),
+               make_packet(1, b""),
+               make_packet(2, b"\xff" * 16)]
+    send(*(p.bytestring for p in packets))
+
+    block = receiver.receive_block(timeout=1.0)
+    assert block.n_packets == 3
+    assert receiver.n_received == 3
+    assert list(block.length) == [2, 0, 16]
+    assert block.payloads() == [b"\x01\x02", b"", b"\xff" * 16]
+    assert list(block.reply_expected) == [True, False, False]
+    assert list(block.tag) == [1, 2, 3]
+    assert list(block.dest_port) == [2, 3, 4]
+    assert list(block.dest_cpu) == [3, 4, 5]
+    assert list(block.src_port) == [4, 5, 6]
+    assert list(block.src_cpu) == [5, 6, 7]
+    assert list(block.dest_x) == [6, 7, 8]
+    assert list(block.dest_y) == [7, 8, 9]
+    assert list(block.src_x) == [8, 9, 10]
+    assert list(block.src_y) == [9, 10, 11]
+    assert block.data.shape == (3, 16)
+
+    # Conversion back into packet objects
+    assert [p.bytestring for p in block.packets()] == \
+        [p.bytestring for p in packets]
+
+    # Blocks must not be modified by subsequent receives
+    send(make_packet(3, b"\x00\x00").bytestring)
+    assert receiver.receive_block(timeout=1.0).n_packets == 1
+    assert block.payloads() == [b"\x01\x02", b"", b"\xff" * 16]
+
+
+def test_receive_block_size_limit(receiver, send):
+    send(*(make_packet(i, b"\x00").bytestring for i in range(6)))
+
+    assert list(receiver.receive_block(timeout=1.0).tag) == [1, 2, 3, 4]
+    assert list(receiver.receive_block(timeout=1.0).tag) == [5, 6]
+    assert receiver.receive_block(timeout=0.01) is None
+    assert receiver.n_received == 6
+
+
+def test_receive_bad_packets(receiver, send):
+    send(b"\x00" * 9,
+         make_packet(0, b"\x01" * 20).bytestring,
+         make_packet(1, b"\x02").bytestring)
+
+    block = receiver.receive_block(timeout=1.0)
+    assert receiver.n_malformed == 1
+    assert receiver.n_truncated == 1
+    assert block.payloads() == [b"\x01" * 16, b"\x02"]
+
+
+def test_background_queue(receiver, send):
+    with pytest.raises(RuntimeError):
+        receiver.get_block()
+
+    receiver.start(queue_length=1)
+    with pytest.raises(RuntimeError):
+        receiver.start()
+
+    send(make_packet(0).bytestring)
+    block = receiver.get_block(timeout=1.0)
+    assert list(block.tag) == [1]
+    assert receiver.get_block(timeout=0.01) is None
+
+    receiver.stop()
+    receiver.stop()  # Should be a no-op
+
+    # When the queue is full, blocks are dropped
+    receiver._enqueue_block(block)
+    receiver._enqueue_block(block)
+    assert receiver.n_dropped == 1
+
+
+def test_background_callback(receiver, send):
+    blocks = []
+    received = threading.Event()
+
+    def callback(block):
+        blocks.append(block)
+        received.set()
+
+    receiver.start(callback=callback)
+    send(make_packet(0).bytestring)
+    assert received.wait(1.0)
+    receiver.stop()
+
+    assert len(blocks) == 1
+    assert list(blocks[0].tag) == [1]
@@ -0,0 +1,115 @@
+from collections import OrderedDict
+
+import mock
+import pytest
+
+from rig.machine_control import MachineController
+from rig.machine_control.consts import SCPCommands, SDP_HEADER_LENGTH
+from rig.machine_control.machine_controller import MemoryIO
+from rig.machine_control.sdram_snapshot import \
+    SnapshotRegion, snapshot_sdram, restore_sdram, _chunks
+
+
+@pytest.fixture
+def mock_controller():
+    # {(x, y, address): byte, ...}
+    memory = {}
+    cn = mock.Mock(spec=MachineController)
+    cn.scp_data_length = 16
+    cn.memory = memory
+    cn.bursts = []
+
+    def send_scp_bursts(calls):
+        calls = list(calls)
+        cn.bursts.append(calls)
+        for call in calls:
+            assert call.cmd == SCPCommands.read
+            call.callback(b"\x00" * (6 + SDP_HEADER_LENGTH) + bytes(bytearray(
+                memory.get((call.x, call.y, call.arg1 + i), 0)
+                for i in range(call.arg2))))
+    cn._send_scp_bursts.side_effect = send_scp_bursts
+
+    def write_many(writes):
+        for x, y, p, address, data in writes:
+            for i, byte in enumerate(bytearray(data)):
+                memory[(x, y, address + i)] = byte
+    cn.write_many.side_effect = write_many
+
+    return cn
+
+
+def fill(memory, x, y, address, data):
+    for i, byte in enumerate(bytearray(data)):
+        memory[(x, y, address + i)] = byte
+
+
+@pytest.mark.parametrize("chunk_size", [1000, 7])
+def test_snapshot_and_restore(mock_controller, tmpdir, chunk_size):
+    memory = mock_controller.memory
+    fill(memory, 0, 0, 0x1000, b"Hello, world!")
+    fill(memory, 1, 2, 0x2000, b"\x01\x02\x03")
+    fill(memory, 1, 2, 0x3000, bytes(bytearray(range(100))))
+
+    regions = OrderedDict([
+        ("a", MemoryIO(mock_controller, 0, 0, 0x1000, 0x1000 + 13)),
+        ("b", (1, 2, 0x2000, 3)),
+        ("c", MemoryIO(mock_controller, 1, 2, 0x3000, 0x3000 + 100)),
+        ("empty", (3, 3, 0x4000, 0)),
+    ])
+    # The position of a file-like is ignored
+    regions["a"].seek(5)
+
+    filename = str(tmpdir.join("snapshot.bin"))
+    index = snapshot_sdram(mock_controller, regions, filename,
+                           chunk_size=chunk_size)
+    assert index == OrderedDict([
+        ("a", SnapshotRegion(0, 0, 0x1000, 13, 0)),
+        ("b", SnapshotRegion(1, 2, 0x2000, 3, 13)),
+        ("c", SnapshotRegion(1, 2, 0x3000, 100, 16)),
+        ("empty", SnapshotRegion(3, 3, 0x4000, 0, 116)),
+    ])
+
+    with open(filename, "rb") as f:
+        assert f.read() == (b"Hello, world!" + b"\x01\x02\x03" +
+                            bytes(bytearray(range(100))))
+
+    # With a large chunk size, everything is read in one set of bursts
+    if chunk_size == 1000:
+        assert len(mock_controller.bursts) == 1
+
+    # Restoring should write everything back
+    snapshot = dict(memory)
+    memory.clear()
+    restore_sdram(mock_controller, index, filename, chunk_size=chunk_size)
+    assert memory == snapshot
+
+
+def test_snapshot_empty(mock_controller, tmpdir):
+    filename = str(tmpdir.join("snapshot.bin"))
+    assert snapshot_sdram(mock_controller, {}, filename) == {}
+    assert tmpdir.join("snapshot.bin").read_binary() == b""
+
+    restore_sdram(mock_controller, {}, filename)
+    assert not mock_controller.write_many.called
+
+
+def test_restore_short_file(mock_controller, tmpdir):
+    filename = str(tmpdir.join("snapshot.bin"))
+    tmpdir.join("snapshot.bin").write_binary(b"\x00" * 10)
+    with pytest.raises(ValueError):
+        restore_sdram(mock_controller,
+                      {"a": SnapshotRegion(0, 0, 0x1000, 11, 0)}, filename)
+
+
+def test_chunks():
+    regions = [SnapshotRegion(0, 0, 100, 5, 0),
+               SnapshotRegion(1, 1, 200, 12, 5),
+               SnapshotRegion(2, 2, 300, 0, 17),
+               SnapshotRegion(3, 3, 400, 1, 17)]
+    assert list(_chunks(regions, 8)) == [
+        [SnapshotRegion(0, 0, 100, 5, 0),
+         SnapshotRegion(1, 1, 200, 3, 5)],
+        [SnapshotRegion(1, 1, 203, 8, 8)],
+        [SnapshotRegion(1, 1, 211, 1, 16),
+         SnapshotRegion(3, 3, 400, 1, 17)],
+    ]
@@ -0,0 +1,74 @@
+import functools
+import random
+
+import pytest
+
+from rig.routing_table import RoutingTableEntry, Routes, intersect
+
+
+def make_random_table(rng, n_entries, n_routes=4, key_space=0x3ff,
+                      masks=(0xffffffff, ), orthogonal=False, sources=None):
+    """Generate a random routing table.
+
+    Parameters
+    ----------
+    rng : :py:class:`random.Random`
+    n_entries : int
+        The number of entries in the table.
+    n_routes : int
+        The number of distinct routes (sets of 1-3 random Routes) used.
+    key_space : int
+        The bits which may be set in keys.
+    masks : [int, ...] or None
+        The masks to choose from. If None, masks with random Xs within
+        `key_space` are used.
+    orthogonal : bool
+        If True, no two entries match the same key.
+    sources : None or "random" or "straight"
+        If None, the sources of every entry are unknown. If "random", each
+        entry has a random source. If "straight", each route is a single link
+        and each entry's source is the opposite link, i.e. every entry routes
+        packets straight through the router.
+    """
+    if sources == "straight":
+        links = [r for r in Routes if r.is_link]
+        routes = [{rng.choice(links)} for _ in range(n_routes)]
+    else:
+        routes = [set(rng.sample(list(Routes), rng.randint(1, 3)))
+                  for _ in range(n_routes)]
+
+    table = []
+    while len(table) < n_entries:
+        if masks is None:
+            mask = (rng.getrandbits(32) | ~key_space) & 0xffffffff
+        else:
+            mask = rng.choice(masks)
+        key = rng.getrandbits(32) & key_space & mask
+        if orthogonal and any(intersect(key, mask, e.key, e.mask)
+                              for e in table):
+            continue
+
+        route = rng.choice(routes)
+        if sources == "straight":
+            source = {next(iter(route)).opposite}
+        elif sources == "random":
+            source = {rng.choice(list(Routes))}
+        else:
+            source = {None}
+        table.append(RoutingTableEntry(route, key, mask, source))
+    return table
+
+
+@pytest.fixture(params=range(5))
+def rng(request):
+    """A random number generator, seeded with each of several seeds in
+    turn."""
+    return random.Random(request.param)
+
+
+@pytest.fixture
+def random_table(rng):
+    """A function ``random_table(n_entries, ...)`` which generates random
+    routing tables (see :py:func:`make_random_table`) using :py:func:`rng`.
+    """
+    return functools.partial(make_random_table, rng)
@@ -0,0 +1,193 @@
+import os
+import time
+from functools import partial
+
+import pytest
+
+from rig.routing_table import (
+    RoutingTableEntry as RTE, Routes, MinimisationCache, minimise_tables,
+    minimise_table)
+from rig.utils.parallel import ThreadPool
+
+
+@pytest.fixture
+def cache(tmpdir):
+    return MinimisationCache(str(tmpdir.join("cache")))
+
+
+def minimiser_a(table, target_length):
+    return table[:1]
+
+
+def minimiser_b(table, target_length):
+    return table[:1]
+
+
+TABLE = [RTE({Routes.east}, i, 0xf, {Routes.west}) for i in range(4)]
+
+
+def test_key():
+    key = MinimisationCache.key(TABLE, None, [minimiser_a])
+    assert key == MinimisationCache.key(list(TABLE), None, [minimiser_a])
+
+    # Any change in the inputs should change the key
+    assert key != MinimisationCache.key(TABLE[1:], None, [minimiser_a])
+    assert key != MinimisationCache.key(TABLE[::-1], None, [minimiser_a])
+    assert key != MinimisationCache.key(TABLE, 10, [minimiser_a])
+    assert key != MinimisationCache.key(TABLE, None, [minimiser_b])
+    assert key != MinimisationCache.key(TABLE, None,
+                                        [minimiser_a, minimiser_b])
+    assert key != MinimisationCache.key(
+        [RTE({Routes.east}, i, 0xf, {Routes.south}) for i in range(4)],
+        None, [minimiser_a])
+
+
+def test_key_partial():
+    # Partially applied methods are identified by their arguments
+    key = MinimisationCache.key(TABLE, None, [partial(minimiser_a, 1)])
+    assert key == MinimisationCache.key(TABLE, None, [partial(minimiser_a, 1)])
+    assert key != MinimisationCache.key(TABLE, None, [partial(minimiser_a, 2)])
+    assert key != MinimisationCache.key(TABLE, None, [partial(minimiser_b, 1)])
+    assert key != MinimisationCache.key(
+        TABLE, None, [partial(minimiser_a, timeout=1)])
+
+    # Arguments which are only used to return information are ignored
+    key = MinimisationCache.key(TABLE, None, [partial(minimiser_a, 1)])
+    assert key == MinimisationCache.key(
+        TABLE, None, [partial(minimiser_a, 1, stats={"time": 1.0})])
+
+
+def test_get_and_put(cache):
+    assert cache.get("abc") is None
+
+    cache.put("abc", TABLE)
+    assert cache.get("abc") == TABLE
+
+    # Empty tables may be cached too
+    cache.put("empty", [])
+    assert cache.get("empty") == []
+
+    # No temporary files are left behind
+    assert sorted(os.listdir(cache.directory)) == ["abc.table",
+                                                   "empty.table"]
+
+    # A new cache object using the same directory sees the same tables
+    assert MinimisationCache(cache.directory).get("abc") == TABLE
+
+    cache.clear()
+    assert cache.get("abc") is None
+
+
+def test_eviction(tmpdir):
+    # Room for two copies of the table, but not three. (When full, tables are
+    # removed until the cache is 3/4 full.)
+    cache = MinimisationCache(str(tmpdir), max_size=(16 * 4 * 3) - 12)
+    cache.put("a", TABLE)
+    cache.put("b", TABLE)
+
+    # Make "a" the most recently used
+    past = time.time() - 100
+    os.utime(os.path.join(str(tmpdir), "b.table"), (past, past))
+    assert cache.get("a") == TABLE
+
+    # Adding a third table should remove the least recently used, "b"
+    cache.put("c", TABLE)
+    assert cache.get("a") == TABLE
+    assert cache.get("b") is None
+    assert cache.get("c") == TABLE
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_minimise_tables_with_cache(cache, parallel):
+    calls = []
+
+    def minimiser(table, target_length):
+        calls.append(table)
+        return table[:1]
+
+    tables = {(0, 0): TABLE, (1, 0): TABLE[1:], (2, 0): TABLE[:1]}
+    expected = {xy: table[:1] for xy, table in tables.items()}
+
+    with ThreadPool(2) as pool:
+        executor = pool if parallel else None
+        assert minimise_tables(tables, None, [minimiser], cache=cache,
+                               executor=executor) == expected
+        n_calls = len(calls)
+        assert n_calls > 0
+
+        # The second time no minimisation should be performed
+        assert minimise_tables(tables, None, [minimiser], cache=cache,
+                               executor=executor) == expected
+        assert len(calls) == n_calls
+
+        # Changing a table results in only that table being minimised
+        tables[(1, 0)] = TABLE[2:]
+        expected[(1, 0)] = TABLE[2:3]
+        assert minimise_tables(tables, None, [minimiser], cache=cache,
+                               executor=executor) == expected
+        assert calls[n_calls:] == [TABLE[2:]]
+
+
+def test_minimise_table_with_cache(cache):
+    assert minimise_table(TABLE, 1, cache=cache) == []
+    assert minimise_table(TABLE, 1, [minimiser_a], cache=cache) == TABLE[:1]
+    assert len(os.listdir(cache.directory)) == 2
+
+
+def timed_minimiser(table, target_length, timeout=None, stats=None):
+    # Pretends to run out of time unless given plenty
+    stats["stop_reason"] = "timeout" if timeout < 10.0 else "no_merges"
+    return table[:1]
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_minimise_tables_with_cache_timeout(cache, parallel):
+    # Results which depend on how much time was available shouldn't be cached
+    tables = {(0, 0): TABLE}
+    with ThreadPool(2) as pool:
+        executor = pool if parallel else None
+        assert minimise_tables(
+            tables, None, [partial(timed_minimiser, timeout=1.0)],
+            cache=cache, executor=executor) == {(0, 0): TABLE[:1]}
+        assert os.listdir(cache.directory) == []
+
+        # Results from methods which finish in time are cached
+        stats = {}
+        assert minimise_tables(
+            tables, None, [partial(timed_minimiser, timeout=20.0,
+                                   stats=stats)],
+            cache=cache, executor=executor) == {(0, 0): TABLE[:1]}
+        assert stats["stop_reason"] == "no_merges"
+        assert len(os.listdir(cache.directory)) == 1
+
+
+def test_minimise_table_with_cache_stats(cache):
+    # A method given a stats dict (which is modified by each run) should still
+    # hit the cache on the second run
+    stats = {}
+    method = partial(timed_minimiser, timeout=20.0, stats=stats)
+    assert minimise_table(TABLE, None, [method], cache=cache) == TABLE[:1]
+    assert stats == {"stop_reason": "no_merges"}
+    assert len(os.listdir(cache.directory)) == 1
+
+    stats.clear()
+    assert minimise_table(TABLE, None, [method], cache=cache) == TABLE[:1]
+    assert stats == {}
+    assert len(os.listdir(cache.directory)) == 1
+
+
+def test_minimise_table_with_cache_stale_stats(cache):
+    # A stale stop reason left in the caller's stats dict by an earlier run
+    # should not prevent a result being cached when the time-budgeted method
+    # isn't needed.
+    stats = {"stop_reason": "timeout"}
+    method = partial(timed_minimiser, timeout=1.0, stats=stats)
+    assert minimise_table(TABLE, 10, [method], cache=cache) == TABLE
+    assert stats == {"stop_reason": "timeout"}
+    assert len(os.listdir(cache.directory)) == 1
+
+    # When the method does run, its statistics are still reported
+    stats["stop_reason"] = "no_merges"
+    assert minimise_table(TABLE, 2, [method], cache=cache) == TABLE[:1]
+    assert stats == {"stop_reason": "timeout"}
+    assert len(os.listdir(cache.directory)) == 1
@@ -2,7 +2,7 @@ import pytest
 
 from rig.links import Links
 
-from rig.routing_table import Routes, RoutingTableEntry
+from rig.routing_table import Routes, RoutingTableEntry, RoutingTable
 
 
 class TestRoutingTableEntry(object):
@@ -125,3 +125,70 @@ def test_routes():
     for i in range(18):
         with pytest.raises(ValueError):
             Routes.core(i).opposite
+
+
+class TestRoutingTable(object):
+    entries = [
+        RoutingTableEntry({Routes.north, Routes.core(17)}, 0xffffffff,
+                          0xffff0000),
+        RoutingTableEntry(set(), 0x0, 0x0, {Routes.south, None}),
+        RoutingTableEntry({Routes.core_monitor}, 0x1, 0xf, set()),
+        RoutingTableEntry({Routes.east}, 0x2, 0xf),
+    ]
+
+    def test_entries(self):
+        table = RoutingTable(self.entries)
+        assert len(table) == 4
+        assert list(table) == self.entries
+        assert table.to_entries() == self.entries
+        assert table[0] == self.entries[0]
+        assert table[-1] == self.entries[-1]
+
+        assert list(table.keys) == [0xffffffff, 0x0, 0x1, 0x2]
+        assert list(table.masks) == [0xffff0000, 0x0, 0xf, 0xf]
+        assert list(table.routes) == [(1 << 2) | (1 << 23), 0, 1 << 6, 1]
+        assert list(table.sources) == [1 << 31, (1 << 31) | (1 << 5), 0,
+                                       1 << 31]
+
+        # Copies share their arrays
+        assert RoutingTable(table).keys is table.keys
+
+    def test_empty(self):
+        table = RoutingTable()
+        assert len(table) == 0
+        assert not table
+        assert list(table) == []
+        assert table.to_bytes() == b""
+        assert RoutingTable.from_bytes(b"") == table
+
+    def test_slice(self):
+        table = RoutingTable(self.entries)
+        assert isinstance(table[1:3], RoutingTable)
+        assert table[1:3] == self.entries[1:3]
+
+    def test_eq(self):
+        table = RoutingTable(self.entries)
+        assert table == RoutingTable(self.entries)
+        assert table == self.entries
+        assert self.entries == table
+        assert table != RoutingTable(self.entries[:-1])
+        assert table != RoutingTable(self.entries[::-1])
+        assert table != self.entries[::-1]
+        assert table != "foo"
+
+    def test_bytes(self):
+        table = RoutingTable(self.entries)
+        data = table.to_bytes()
+        assert len(data) == 16 * len(table)
+        assert data[:16] == (b"\xff\xff\xff\xff" b"\x00\x00\xff\xff"
+                             b"\x04\x00\x80\x00" b"\x00\x00\x00\x80")
+        assert RoutingTable.from_bytes(data) == table
+
+    def test_from_arrays(self):
+        table = RoutingTable.from_arrays([0x1, 0x2], [0xf, 0xf],
+                                         [1 << Routes.east, 0])
+        assert table == [RoutingTableEntry({Routes.east}, 0x1, 0xf),
+                         RoutingTableEntry(set(), 0x2, 0xf)]
+
+        with pytest.raises(ValueError):
+            RoutingTable.from_arrays([0x1, 0x2], [0xf], [0, 0])
@@ -0,0 +1,156 @@
+import numpy as np
+
+import pytest
+
+from rig.routing_table import (
+    RoutingTableEntry, Routes, table_is_subset_of, MinimisationFailedError,
+    minimise_table
+)
+from rig.routing_table.espresso import (
+    minimise, espresso, _expand, _expand_one, _irredundant
+)
+
+
+def test__expand():
+    # Expanding 0000 away from 0011 and 01XX
+    off_keys = np.array([0b0011, 0b0100], dtype=np.uint32)
+    off_masks = np.array([0b1111, 0b1100], dtype=np.uint32)
+    keys = np.array([0b0000], dtype=np.uint32)
+    masks = np.array([0b1111], dtype=np.uint32)
+
+    # LSB first: bit 0 can be expanded (000X) but then bit 1 cannot (since
+    # 00XX would match 0011) nor can bit 2 (since 0X0X would match 0100). All
+    # other bits can be.
+    assert list(_expand(keys, masks, off_keys, off_masks, True)) == [
+        (0b0000, 0b0110),
+    ]
+
+    # MSB first: all higher bits and bit 3 may be expanded (X000), then bit 2
+    # cannot be (since XX00 would match 0100), bit 1 can be (X0X0) but bit 0
+    # cannot be (since X0XX would match 0011).
+    assert list(_expand(keys, masks, off_keys, off_masks, False)) == [
+        (0b0000, 0b0101),
+    ]
+
+
+def test__expand_no_off_set():
+    # With an empty OFF-set everything can be expanded
+    keys = np.array([0b0101, 0b0000], dtype=np.uint32)
+    masks = np.array([0b1111, 0xffffffff], dtype=np.uint32)
+    off = np.array([], dtype=np.uint32)
+    assert list(_expand(keys, masks, off, off)) == [(0, 0), (0, 0)]
+
+
+def test__expand_in_chunks():
+    rng = np.random.RandomState(0)
+    keys = rng.randint(0, 1 << 8, 100).astype(np.uint32)
+    masks = np.full(100, 0xff, dtype=np.uint32)
+    off_keys = rng.randint(0, 1 << 8, 50).astype(np.uint32)
+    off_masks = np.full(50, 0xff, dtype=np.uint32)
+    off_keys = off_keys[~np.in1d(off_keys, keys)]
+    off_masks = off_masks[:len(off_keys)]
+
+    assert (list(_expand(keys, masks, off_keys, off_masks)) ==
+            list(_expand(keys, masks, off_keys, off_masks,
+                         chunk_size=len(off_keys) * 7)))
+
+
+@pytest.mark.parametrize("lsb_first", [True, False])
+def test__expand_one(lsb_first):
+    # Expanding small numbers of key-mask pairs without arrays should give
+    # the same result as using arrays.
+    rng = np.random.RandomState(1)
+    keys = rng.randint(0, 1 << 8, 100).astype(np.uint32)
+    masks = np.full(100, 0xff, dtype=np.uint32)
+    off_keys = np.setdiff1d(rng.randint(0, 1 << 8, 50).astype(np.uint32),
+                            keys)
+    off_masks = rng.choice([0xff, 0xfe, 0xfc], len(off_keys)).astype(np.uint32)
+    off_masks[np.any(((keys[:, np.newaxis] ^ off_keys) & off_masks) == 0,
+                     axis=0)] = 0xff
+
+    expected = list(_expand(keys, masks, off_keys, off_masks, lsb_first))
+    assert len(keys) * len(off_keys) > 1024
+    assert expected == [
+        _expand_one(k, m, off_keys.tolist(), off_masks.tolist(), lsb_first)
+        for k, m in zip(keys.tolist(), masks.tolist())]
+
+
+def test__irredundant():
+    keys = np.array([0b0000, 0b0001, 0b0011], dtype=np.uint32)
+    masks = np.array([0b1111, 0b1111, 0b1111], dtype=np.uint32)
+    expanded = {(0b0000, 0b1110), (0b0000, 0b1100), (0b0001, 0b1101)}
+
+    # 00XX covers everything so the other expanded pairs are not required
+    assert list(_irredundant(expanded, keys, masks)) == [
+        (0b0000, 0b1100, [0, 1, 2]),
+    ]
+
+
+def test_espresso_uses_unmatched_keys():
+    # 0000 and 0011 can be merged into 00XX since 0001 and 0010 are not
+    # matched by any entry, the remaining entry can only be merged into 01XX
+    # since this avoids the keys of the other route.
+    table = [
+        RoutingTableEntry({Routes.north}, 0b0000, 0xf, {Routes.south}),
+        RoutingTableEntry({Routes.north}, 0b0011, 0xf, {Routes.south}),
+        RoutingTableEntry({Routes.east}, 0b0100, 0xf, {Routes.west}),
+    ]
+    assert espresso(table, None) == [
+        RoutingTableEntry({Routes.north}, 0b0000, 0b0100, {Routes.south}),
+        RoutingTableEntry({Routes.east}, 0b0100, 0b0100, {Routes.west}),
+    ]
+
+
+def test_espresso_fails_if_too_large():
+    table = [
+        RoutingTableEntry({Routes.north}, 0b00, 0b11),
+        RoutingTableEntry({Routes.east}, 0b01, 0b11),
+        RoutingTableEntry({Routes.north}, 0b10, 0b11),
+    ]
+
+    with pytest.raises(MinimisationFailedError) as exc:
+        espresso(table, 1)
+    assert "1" in str(exc.value)
+    assert "2" in str(exc.value)
+
+    # No error with no_raise
+    assert len(espresso(table, 1, no_raise=True)) == 2
+
+
+def test_minimise_removes_default_routes():
+    # Expanding the entries would leave a single default-routable entry
+    table = [
+        RoutingTableEntry({Routes.north}, 0b00, 0b11, {Routes.south}),
+        RoutingTableEntry({Routes.north}, 0b01, 0b11, {Routes.south}),
+    ]
+    assert minimise(table, None) == []
+
+    with pytest.raises(MinimisationFailedError):
+        minimise([
+            RoutingTableEntry({Routes.north}, 0b00, 0b11),
+            RoutingTableEntry({Routes.east}, 0b01, 0b11),
+        ], 1)
+
+
+def test_minimise_random_tables(rng, random_table):
+    # Keys spread over a small part of the key space
+    table = random_table(200, n_routes=5, key_space=0xffc0,
+                         masks=[0xffffffc0], orthogonal=True, sources="random")
+
+    new_table = espresso(table, None)
+    assert len(new_table) < len(table)
+    assert table_is_subset_of(table, new_table)
+
+    # The order of the result is unimportant
+    rng.shuffle(new_table)
+    assert table_is_subset_of(table, new_table)
+
+    # With default routes removed
+    assert table_is_subset_of(table, minimise(table, None))
+
+
+def test_minimise_table_methods(random_table):
+    table = random_table(100, n_routes=5, key_space=0xffc0,
+                         masks=[0xffffffc0], orthogonal=True, sources="random")
+    new_table = minimise_table(table, len(table) - 1, methods=(minimise, ))
+    assert table_is_subset_of(table, new_table)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from rig.routing_table import (
+    RoutingTableEntry, RoutingTable, Routes, RoutingTableLookup)
+
+
+def first_match(table, key):
+    for i, entry in enumerate(table):
+        if key & entry.mask == entry.key:
+            return i
+    return None
+
+
+@pytest.mark.parametrize("table_type", [list, RoutingTable])
+def test_lookup(random_table, table_type):
+    # A random (possibly non-orthogonal) table over the low bits of the key
+    table = random_table(20, key_space=0xff, masks=None)
+    lookup = RoutingTableLookup(table_type(table))
+
+    # Every key should match the first matching entry
+    keys = list(range(256)) + [0x100, 0xffffffff]
+    expected = [first_match(table, key) for key in keys]
+    assert [lookup.lookup(key) for key in keys] == expected
+    assert list(lookup.lookup_many(keys)) == [
+        -1 if i is None else i for i in expected]
+
+    # The regions should cover every key exactly once, each matched by the
+    # same entry
+    n_keys = 0
+    for key, mask, i in lookup.lookup_region(0x0, 0xffffff00):
+        xs = ~mask & 0xffffffff
+        assert key & xs == 0
+        n_keys += 1 << bin(xs).count("1")
+        for k in (key, key | xs):
+            assert first_match(table, k) == (None if i < 0 else i)
+    assert n_keys == 256
+    assert sum(1 << bin(~mask & 0xffffffff).count("1")
+               for _, mask, _ in lookup.regions()) == 1 << 32
+
+    # Regions within a given region
+    for key, mask, i in lookup.lookup_region(0x10, 0xfffffff0):
+        assert key & 0xfffffff0 == 0x10
+        assert first_match(table, key) == (None if i < 0 else i)
+
+
+def test_empty():
+    lookup = RoutingTableLookup([])
+    assert len(lookup) == 1
+    assert lookup.lookup(0x1234) is None
+    assert list(lookup.lookup_many(np.array([1, 2]))) == [-1, -1]
+    assert list(lookup.regions()) == [(0x0, 0x0, -1)]
+
+
+def test_does_not_expand_xs():
+    # A table whose entries contain many Xs results in a small tree
+    table = [RoutingTableEntry({Routes.north}, 0x0, 0x80000001),
+             RoutingTableEntry({Routes.south}, 0x1, 0x00000001)]
+    lookup = RoutingTableLookup(table)
+    assert len(lookup) == 7
+    assert lookup.lookup(0x7ffffffe) == 0
+    assert lookup.lookup(0x80000000) is None
+    assert lookup.lookup(0xffffffff) == 1
@@ -1,6 +1,9 @@
 from rig.routing_table import (
-    minimise_tables, minimise_table, Routes, MinimisationFailedError)
+    minimise_tables, minimise_table, Routes, MinimisationFailedError,
+    RoutingTable)
 from rig.routing_table import RoutingTableEntry as RTE
+from rig.routing_table.minimise import pack_table, unpack_table
+from rig.utils.parallel import ThreadPool
 import pytest
 
 
@@ -107,3 +110,101 @@ def test_minimise_tables():
         minimise_tables(tables, lengths)
 
     assert exc.value.chip == (0, 1)
+
+
+def test_pack_table():
+    table = [
+        RTE({Routes.north, Routes.core(17)}, 0xffffffff, 0xffff0000),
+        RTE(set(), 0x0, 0x0, {Routes.south, Routes.core_monitor}),
+        RTE({Routes.east}, 0x1, 0xf, {None, Routes.west}),
+    ]
+    data = pack_table(table)
+    assert len(data) == 16 * len(table)
+    assert unpack_table(data) == table
+    assert unpack_table(pack_table([])) == []
+
+
+def make_tables():
+    """Tables of different sizes which may be minimised."""
+    return {
+        (x, 0): [RTE({Routes.east}, i, 0xff, {Routes.west})
+                 for i in range(x * 4)] +
+                [RTE({Routes.north}, 0x100, 0xfff, {Routes.north})]
+        for x in range(6)
+    }
+
+
+@pytest.mark.parametrize("processes", [None, 1, 2])
+def test_minimise_tables_parallel(processes):
+    tables = make_tables()
+    assert (minimise_tables(tables, None, processes=processes) ==
+            minimise_tables(tables, None))
+
+
+def test_minimise_tables_executor():
+    tables = make_tables()
+
+    # Tables should be submitted largest-first
+    class RecordingThreadPool(ThreadPool):
+        def submit(self, f, *args):
+            submitted.append(args[0])
+            return super(RecordingThreadPool, self).submit(f, *args)
+
+    submitted = []
+    with RecordingThreadPool(2) as pool:
+        assert (minimise_tables(tables, 2, executor=pool) ==
+                minimise_tables(tables, 2))
+    assert submitted == [(x, 0) for x in reversed(range(6))]
+
+
+@pytest.mark.parametrize("processes", [2, None])
+def test_minimise_tables_parallel_fails(processes):
+    tables = make_tables()
+    tables[(2, 0)].append(RTE({Routes.south}, 0x200, 0xfff, {Routes.west}))
+
+    with ThreadPool(2) as pool:
+        with pytest.raises(MinimisationFailedError) as exc:
+            minimise_tables(tables, {xy: 1 for xy in tables},
+                            processes=processes,
+                            executor=None if processes else pool)
+    assert exc.value.chip == (2, 0)
+
+
+@pytest.mark.parametrize("processes", [None, 2])
+def test_minimise_routing_tables(processes):
+    """RoutingTables should be minimised into RoutingTables."""
+    tables = make_tables()
+    expected = minimise_tables(tables, None)
+    new_tables = minimise_tables(
+        {xy: RoutingTable(table) for xy, table in tables.items()}, None,
+        processes=processes)
+    assert set(new_tables) == set(expected)
+    for xy, table in new_tables.items():
+        assert isinstance(table, RoutingTable)
+        assert table == expected[xy]
+
+
+def test_minimise_routing_table_without_conversion(monkeypatch):
+    """RoutingTables should only be converted into lists of entries for
+    methods which require it."""
+    table = RoutingTable(make_tables()[(3, 0)])
+    converted = []
+    original_to_entries = RoutingTable.to_entries
+
+    def to_entries(self):
+        converted.append(self)
+        return original_to_entries(self)
+    monkeypatch.setattr(RoutingTable, "to_entries", to_entries)
+
+    # Already small enough
+    assert minimise_table(table, len(table) + 1) == table
+    # Small enough once default routes are removed
+    new_table = minimise_table(table, len(table))
+    assert isinstance(new_table, RoutingTable)
+    assert len(new_table) < len(table)
+    assert converted == []
+
+    # Ordered covering requires conversion (only once)
+    new_table = minimise_table(table, None)
+    assert isinstance(new_table, RoutingTable)
+    assert len(converted) == 1
@@ -1,9 +1,11 @@
 import pytest
 from mock import Mock
 
-from rig.routing_table import (Routes, RoutingTableEntry,
+from rig.routing_table import (Routes, RoutingTableEntry, RoutingTable,
                                MinimisationFailedError)
-from rig.routing_table.remove_default_routes import minimise, _is_defaultable
+from rig.routing_table.remove_default_routes import (
+    minimise, _is_defaultable, _AliasIndex, _prefix_length)
+from rig.routing_table.utils import intersect
 from rig.routing_table import remove_default_routes
 
 
@@ -120,3 +122,59 @@ def test_minimise_same_mask(monkeypatch):
     for call in is_defaultable.mock_calls:
         assert call[1][3] is True
     is_defaultable.reset_mock()
+
+
+@pytest.mark.parametrize("mask, length", [
+    (0x00000000, 0),
+    (0x7fffffff, 0),
+    (0x80000000, 1),
+    (0xfffff800, 21),
+    (0xff00ff00, 8),
+    (0xffffffff, 32),
+])
+def test__prefix_length(mask, length):
+    assert _prefix_length(mask) == length
+
+
+def test__alias_index(random_table):
+    # Straight-through entries with a mix of masks, including some with Xs in
+    # the middle and the most significant bits.
+    table = random_table(100, n_routes=1, key_space=0x800003ff,
+                         masks=[0xffffffff, 0xfffffff0, 0xffffff00,
+                                0xfffff0f0, 0xff00ff00, 0x7fffffff,
+                                0x00000000],
+                         sources="straight")
+    index = _AliasIndex(table)
+    for i, entry in enumerate(table):
+        assert index.intersects_after(i, entry.key, entry.mask) == any(
+            intersect(entry.key, entry.mask, e.key, e.mask)
+            for e in table[i + 1:])
+
+    # The index should give the same results as checking every entry
+    assert (minimise(table, None) ==
+            [e for i, e in enumerate(table)
+             if not _is_defaultable(i, e, table)])
+
+
+@pytest.mark.parametrize("masks", [
+    # Same mask, unique keys: no alias check required
+    [0xffffffff],
+    # Overlapping entries
+    [0xffffffff, 0xfffffff0, 0xff00ff00, 0x00000000],
+])
+@pytest.mark.parametrize("sources", ["straight", "random"])
+def test_minimise_routing_table(random_table, masks, sources):
+    """RoutingTables should be minimised without conversion to the same
+    entries as lists of entries."""
+    table = random_table(100, n_routes=6, key_space=0x800000ff, masks=masks,
+                         sources=sources)
+    new_table = minimise(RoutingTable(table), None)
+    assert isinstance(new_table, RoutingTable)
+    assert new_table == minimise(table, None)
+
+    with pytest.raises(MinimisationFailedError):
+        minimise(RoutingTable(table), len(new_table) - 1)
+
+
+def test_minimise_empty_routing_table():
+    assert minimise(RoutingTable(), 0) == RoutingTable()
@@ -1,3 +1,6 @@
+import random
+import time
+
 import pytest
 
 from rig.routing_table import (
@@ -5,7 +8,7 @@ from rig.routing_table import (
 )
 from rig.routing_table.ordered_covering import (
     _get_generality, _get_all_merges, _get_insertion_index, _Merge,
-    _refine_merge, minimise, ordered_covering
+    _refine_merge, minimise, ordered_covering, _get_best_merge, _TableArrays
 )
 
 
@@ -484,3 +487,150 @@ def test_ordered_covering_simple_fails_if_too_large():
 
     with pytest.raises(MinimisationFailedError):
         ordered_covering(table, target_length=1)
+
+
+# Orthogonal tables of entries matching either single keys or aligned blocks
+# of four keys.
+MASKS = [0xffffffff, 0xffffffff, 0xffffffff, 0xfffffffc]
+
+
+def test_ordered_covering_matches_exhaustive_search(random_table):
+    """The incrementally maintained index of merges should lead to exactly
+    the same merges as refining every possible merge after each merge is
+    applied.
+    """
+    table = random_table(200, masks=MASKS, orthogonal=True)
+
+    # Minimise by refining all merges every time
+    expected_table = sorted(table, key=lambda e: _get_generality(e.key,
+                                                                 e.mask))
+    expected_aliases = {}
+    while True:
+        merge = _get_best_merge(expected_table, expected_aliases)
+        if merge.goodness <= 0:
+            break
+        expected_table, expected_aliases = merge.apply(expected_aliases)
+
+    new_table, new_aliases = ordered_covering(table, None)
+    assert new_table == expected_table
+    assert new_aliases == expected_aliases
+    assert table_is_subset_of(table, new_table)
+
+
+def test__refine_merge_with_arrays(random_table):
+    """Refining merges using the array-backed table should give exactly the
+    same result as refining them entry by entry.
+    """
+    table = sorted(random_table(120, n_routes=3, masks=MASKS,
+                                orthogonal=True),
+                   key=lambda e: _get_generality(e.key, e.mask))
+
+    # Apply a few merges to introduce some aliases
+    aliases = {}
+    for _ in range(5):
+        merge = _get_best_merge(table, aliases)
+        if merge.goodness <= 0:
+            break
+        table, aliases = merge.apply(aliases)
+
+    arrays = _TableArrays(table, aliases)
+    for merge in _get_all_merges(table):
+        for min_goodness in (0, len(merge.entries) // 2):
+            expected = _refine_merge(merge, aliases, min_goodness)
+            actual = _refine_merge(merge, aliases, min_goodness, arrays)
+            assert actual.entries == expected.entries
+            assert actual.key == expected.key
+            assert actual.mask == expected.mask
+
+
+class TestBudget(object):
+    """Test limiting the time or number of merges spent minimising."""
+
+    @pytest.fixture
+    def rng(self):
+        return random.Random(0)
+
+    @pytest.fixture
+    def table(self, random_table):
+        return random_table(200, masks=MASKS, orthogonal=True)
+
+    def test_stats(self, table):
+        stats = {}
+        new_table, _ = ordered_covering(table, None, stats=stats)
+        assert stats["iterations"] > 1
+        assert stats["time"] >= 0.0
+        assert stats["length"] == len(new_table)
+        assert stats["remaining"] is None
+        assert stats["stop_reason"] == "no_merges"
+
+        # Stop once the target is reached
+        target_length = len(new_table) + 10
+        new_table, _ = ordered_covering(table, target_length, stats=stats)
+        assert len(new_table) <= target_length
+        assert stats["remaining"] == 0
+        assert stats["stop_reason"] == "target_length"
+
+    def test_max_iterations(self, table):
+        stats = {}
+        new_table, new_aliases = ordered_covering(table, None,
+                                                  max_iterations=3,
+                                                  stats=stats)
+        assert stats["iterations"] == 3
+        assert stats["stop_reason"] == "max_iterations"
+        assert table_is_subset_of(table, new_table)
+
+        # The same as the first three merges without a limit
+        expected_table = sorted(table, key=lambda e: _get_generality(e.key,
+                                                                     e.mask))
+        expected_aliases = {}
+        for _ in range(3):
+            merge = _get_best_merge(expected_table, expected_aliases)
+            expected_table, expected_aliases = merge.apply(expected_aliases)
+        assert new_table == expected_table
+        assert new_aliases == expected_aliases
+
+    def test_max_iterations_too_small(self, table):
+        stats = {}
+        with pytest.raises(MinimisationFailedError):
+            ordered_covering(table, 1, max_iterations=3)
+
+        new_table, _ = ordered_covering(table, 10, no_raise=True,
+                                        max_iterations=3, stats=stats)
+        assert stats["remaining"] == len(new_table) - 10
+
+        # The minimise function also supports a budget
+        with pytest.raises(MinimisationFailedError):
+            minimise(table, 1, max_iterations=3)
+
+    def test_timeout(self, table):
+        # With no time, no merges can be made
+        stats = {}
+        new_table, _ = ordered_covering(table, None, timeout=0.0, stats=stats)
+        assert stats["iterations"] == 0
+        assert stats["stop_reason"] == "timeout"
+        assert new_table == sorted(table, key=lambda e: _get_generality(
+            e.key, e.mask))
+
+        with pytest.raises(MinimisationFailedError):
+            ordered_covering(table, 1, timeout=0.0)
+
+        # With ample time the result is the same as without a limit
+        new_table, _ = ordered_covering(table, None, timeout=60.0,
+                                        stats=stats)
+        assert stats["stop_reason"] == "no_merges"
+        assert new_table == ordered_covering(table, None)[0]
+
+    def test_timeout_after_merge(self, table, monkeypatch):
+        # Time passes quickly...
+        now = [0.0]
+
+        def fake_time():
+            now[0] += 1.0
+            return now[0]
+        monkeypatch.setattr(time, "time", fake_time)
+
+        stats = {}
+        new_table = minimise(table, None, timeout=20.0, stats=stats)
+        assert stats["stop_reason"] == "timeout"
+        assert 0 < stats["iterations"]
+        assert table_is_subset_of(table, new_table)
@@ -2,7 +2,8 @@ import pytest
 from rig.netlist import Net
 from rig.place_and_route.routing_tree import RoutingTree
 from rig.machine_control.machine_controller import SystemInfo, ChipInfo
-from rig.routing_table import RoutingTableEntry, Routes, MultisourceRouteError
+from rig.routing_table import (
+    RoutingTableEntry, RoutingTable, Routes, MultisourceRouteError)
 from rig.routing_table.utils import (
     routing_tree_to_tables, get_common_xs, expand_entry, expand_entries,
     table_is_subset_of, build_routing_table_target_lengths
@@ -388,57 +389,88 @@ def test_expand_entries_guarantess_orthogonality():
     ]
 
 
-def test_table_is_subset_of_different_routes():
+@pytest.mark.parametrize("table_type", [list, RoutingTable])
+def test_table_is_subset_of_different_routes(table_type):
     # Test that if a different route is the result of the same key that tables
     # are not reported as subsets.
     entries_a = [RoutingTableEntry({Routes.north}, 0x0, 0xffffffff),
                  RoutingTableEntry({Routes.west}, 0x1, 0xffffffff)]
     entries_b = [RoutingTableEntry({Routes.north}, 0x0, 0x0)]
-    assert not table_is_subset_of(entries_a, entries_b)
+    assert not table_is_subset_of(entries_a, table_type(entries_b))
 
 
-def test_table_is_subset_of_no_match():
+@pytest.mark.parametrize("table_type", [list, RoutingTable])
+def test_table_is_subset_of_no_match(table_type):
     # Test that if one table doesn't match an entry from the first they are not
     # reported as subsets.
     entries_a = [RoutingTableEntry({Routes.north}, 0x0, 0xffffffff),
                  RoutingTableEntry({Routes.west}, 0x1, 0xffffffff)]
     entries_b = [RoutingTableEntry({Routes.north}, 0x8, 0x8)]
-    assert not table_is_subset_of(entries_a, entries_b)
+    assert not table_is_subset_of(entries_a, table_type(entries_b))
 
 
-def test_table_is_subset_of_default_route():
+@pytest.mark.parametrize("table_type", [list, RoutingTable])
+def test_table_is_subset_of_default_route(table_type):
     # Test that subsets are identified if the second table relies on default
     # routes to work
     entries_a = [RoutingTableEntry({Routes.north}, 0x0, 0xffffffff,
                                    {Routes.south}),  # Can be default routed
                  RoutingTableEntry({Routes.west}, 0x1, 0xffffffff)]
     entries_b = [entries_a[-1]]
-    assert table_is_subset_of(entries_a, entries_b)
+    assert table_is_subset_of(entries_a, table_type(entries_b))
 
     entries_a = [RoutingTableEntry({Routes.north}, 0x0, 0xffffffff,
                                    {Routes.south, Routes.west}),
                  RoutingTableEntry({Routes.west}, 0x1, 0xffffffff)]
     entries_b = [entries_a[-1]]
-    assert not table_is_subset_of(entries_a, entries_b)
+    assert not table_is_subset_of(entries_a, table_type(entries_b))
 
     entries_a = [RoutingTableEntry({Routes.north}, 0x0, 0xffffffff,
                                    {Routes.core(3)}),
                  RoutingTableEntry({Routes.west}, 0x1, 0xffffffff)]
     entries_b = [entries_a[-1]]
-    assert not table_is_subset_of(entries_a, entries_b)
+    assert not table_is_subset_of(entries_a, table_type(entries_b))
 
 
-def test_table_is_subset_of_uses_common_xs_of_other_table():
+@pytest.mark.parametrize("table_type", [list, RoutingTable])
+def test_table_is_subset_of_uses_common_xs_of_other_table(table_type):
     entries_a = [RoutingTableEntry({Routes.west}, 0x0, 0xfffffffe),
                  RoutingTableEntry({Routes.west}, 0x0, 0xfffffffc)]
     entries_b = [RoutingTableEntry({Routes.west}, 0x0, 0xffffffff),
                  RoutingTableEntry({Routes.west}, 0x2, 0xfffffffe)]
-    assert not table_is_subset_of(entries_a, entries_b)
+    assert not table_is_subset_of(entries_a, table_type(entries_b))
 
 
-def test_table_is_subset_of_success():
+@pytest.mark.parametrize("table_type", [list, RoutingTable])
+def test_table_is_subset_of_success(table_type):
     entries_a = [RoutingTableEntry({Routes.north}, 0x0, 0xffffffff),
                  RoutingTableEntry({Routes.west}, 0x1, 0xffffffff)]
     entries_b = [RoutingTableEntry({Routes.west}, 0x1, 0x00000001),
                  RoutingTableEntry({Routes.north}, 0x0, 0x00000000)]
+    assert table_is_subset_of(entries_a, table_type(entries_b))
+
+
+def test_table_is_subset_of_many_xs():
+    # Entries with many Xs should be compared without being expanded
+    entries_a = [RoutingTableEntry({Routes.north}, 0x0, 0x80000000),
+                 RoutingTableEntry({Routes.south}, 0x80000000, 0x80000000)]
+    entries_b = [RoutingTableEntry({Routes.north}, 0x1, 0x80000001),
+                 RoutingTableEntry({Routes.south}, 0x80000000, 0x80000000),
+                 RoutingTableEntry({Routes.north}, 0x0, 0x00000000)]
     assert table_is_subset_of(entries_a, entries_b)
+    assert table_is_subset_of(entries_b, entries_a)
+
+    entries_b[0] = RoutingTableEntry({Routes.east}, 0x1, 0x80000001)
+    assert not table_is_subset_of(entries_a, entries_b)
+
+
+def test_table_is_subset_of_non_orthogonal():
+    # The first matching entry determines the route of a key
+    entries_a = [RoutingTableEntry({Routes.north}, 0x1, 0xf),
+                 RoutingTableEntry({Routes.east}, 0x0, 0xe)]
+    entries_b = [RoutingTableEntry({Routes.north}, 0x1, 0xf),
+                 RoutingTableEntry({Routes.east}, 0x0, 0xf)]
+    with pytest.warns(UserWarning):
+        assert table_is_subset_of(entries_a, entries_b)
+    assert table_is_subset_of(entries_b, entries_a)
+    assert not table_is_subset_of(entries_b, entries_a[::-1])
@@ -58,3 +58,34 @@ def test_boot_options(monkeypatch, args, options):
     # Check the boot occurred
     assert rig_boot.main(args) == 0
     rig_boot.MachineController.boot.assert_called_once_with(**options)
+
+
+def test_bad_hostname_list():
+    with pytest.raises(SystemExit):
+        rig_boot.main(["localhost,,127.0.0.1"])
+
+
+def test_boot_many(monkeypatch, capsys):
+    # Three machines: one is booted, one was already booted and one fails
+    def boot(self, **kwargs):
+        assert kwargs == spin3_boot_options
+        if self.initial_host == "127.0.0.1":
+            return True
+        elif self.initial_host == "127.0.0.2":
+            return False
+        else:
+            raise SpiNNakerBootError("Oh no")
+    monkeypatch.setattr(rig_boot.MachineController, "boot", boot)
+
+    assert rig_boot.main(["127.0.0.1,127.0.0.2", "--spin3"]) == 1
+    out, err = capsys.readouterr()
+    assert "127.0.0.1: booted in" in out
+    assert "127.0.0.2: machine already booted" in err
+
+    assert rig_boot.main(["127.0.0.1, 127.0.0.2,127.0.0.3", "--spin3"]) == 2
+    out, err = capsys.readouterr()
+    assert "127.0.0.1: booted in" in out
+    assert "127.0.0.2: machine already booted" in err
+    assert "127.0.0.3: Oh no" in err
+
+    assert rig_boot.main(["127.0.0.1,127.0.0.1", "--spin3"]) == 0
@@ -105,3 +105,60 @@ def test_power_options(monkeypatch, args, options):
     assert rig_power.main(args) == 0
     BC.assert_called_once_with(args[0])
     bc.set_power.assert_called_once_with(**options)
+
+
+def test_bad_hostname_list():
+    with pytest.raises(SystemExit):
+        rig_power.main(["localhost,"])
+
+
+def test_power_many(monkeypatch, capsys):
+    # Of three BMPs, one succeeds, one isn't a BMP and one times out
+    bcs = []
+
+    def BC(hosts):
+        bc = mock.Mock()
+
+        def get_software_version(cabinet, frame, board):
+            hostname = hosts[(cabinet, frame)]
+            if hostname == "c":
+                raise TimeoutError()
+            info = mock.Mock()
+            info.version_string = \
+                "Mock/BMP" if hostname != "b" else "SpiNNaker"
+            return info
+        bc.get_software_version.side_effect = get_software_version
+        bc.set_power_many.side_effect = \
+            lambda state, boards, **kwargs: {b[:2]: 1.0 for b in boards}
+        bcs.append(bc)
+        return bc
+    monkeypatch.setattr(rig_power, "BMPController", BC)
+
+    assert rig_power.main(["a,b,c", "off", "-b", "1,3"]) == 2
+    out, err = capsys.readouterr()
+    assert "a: powered off in 1.0 s" in out
+    assert "b: device is not a BMP" in err
+    assert "c: bmp did not respond" in err
+
+    # All BMPs should be controlled by a single power command
+    bcs[0].set_power_many.assert_called_once_with(
+        False, [(0, 0, 1), (0, 0, 3)])
+    assert not bcs[0].set_power.called
+
+    assert rig_power.main(["a,a", "-b", "0", "-d", "2.5"]) == 0
+    out, err = capsys.readouterr()
+    assert out.count("a: powered on in") == 2
+    bcs[1].set_power_many.assert_called_once_with(
+        True, [(0, 0, 0), (1, 0, 0)], post_power_on_delay=2.5)
+
+    # If the power command times out, the BMPs involved are reported
+    def failing_BC(hosts):
+        bc = BC(hosts)
+        bc.set_power_many.side_effect = TimeoutError()
+        return bc
+    monkeypatch.setattr(rig_power, "BMPController", failing_BC)
+    assert rig_power.main(["a,b"]) == 2
+    out, err = capsys.readouterr()
+    assert out == ""
+    assert "a: bmp did not respond" in err
+    assert "b: device is not a BMP" in err
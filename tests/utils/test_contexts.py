@@ -211,3 +211,78 @@ def test_before_close_with_exception(object_to_test):
     with pytest.raises(TypeError) as excinfo:
         obj.method_a(4)
     assert "arg1" in str(excinfo.value)
+
+
+def test_context_cache_invalidation(object_to_test):
+    obj = object_to_test()
+
+    outer = obj.get_new_context(arg1=1)
+    inner = obj.get_new_context(arg2=2)
+    with outer:
+        with inner:
+            assert obj.method_a(0) == (0, 1, 2)
+
+            # Updating a context which is not at the top of the stack should
+            # still take effect
+            outer.update({"arg1": 10})
+            assert obj.method_a(0) == (0, 10, 2)
+            inner.update({"arg2": 20})
+            assert obj.method_a(0) == (0, 10, 20)
+
+        assert obj.method_a(0) == (0, 10, 30)
+        assert obj.get_context_arguments() == {"arg1": 10}
+
+    # The returned dictionary is a copy which may be safely modified
+    cargs = obj.get_context_arguments()
+    assert cargs == {}
+    cargs["arg1"] = 123
+    with pytest.raises(TypeError):
+        obj.method_a(0)
+
+
+def test_context_arguments_read_only(object_to_test):
+    obj = object_to_test()
+    context = obj.get_new_context(arg1=1)
+    with context:
+        assert obj.method_a(0) == (0, 1, 30)
+
+        # Arguments may only be changed via update (which keeps the cached
+        # context arguments up to date)
+        context.context_arguments["arg1"] = 2
+        assert context.context_arguments == {"arg1": 1}
+        with pytest.raises(AttributeError):
+            context.context_arguments = {"arg1": 2}
+        assert obj.method_a(0) == (0, 1, 30)
+
+
+def test_context_stack():
+    stack = contexts.ContextStack()
+    a = contexts.Context({"arg1": 1, "arg2": 2}, stack)
+    b = contexts.Context({"arg2": 3}, stack)
+    stack.append(a)
+    stack.append(b)
+    assert len(stack) == 2
+    assert list(stack) == [a, b]
+    assert stack[-1] is b
+    assert stack.flatten() == {"arg1": 1, "arg2": 3}
+
+    # Only the documented methods may change the stack
+    for method in ("extend", "insert", "remove", "clear", "appendleft"):
+        assert not hasattr(stack, method)
+    with pytest.raises(TypeError):
+        stack[0] = b
+
+    assert stack.pop() is b
+    assert stack.flatten() == {"arg1": 1, "arg2": 2}
+
+
+def test_varying_positional_arguments(object_to_test):
+    # Calls with differing numbers of positional arguments should not
+    # interfere with each other
+    obj = object_to_test()
+    with obj.get_new_context(arg0=0, arg1=1, arg2=2):
+        assert obj.method_a() == (0, 1, 2)
+        assert obj.method_a(10, 11, 12) == (10, 11, 12)
+        assert obj.method_a(10) == (10, 1, 2)
+        assert obj.method_a(10, 11) == (10, 11, 2)
+        assert obj.method_a() == (0, 1, 2)
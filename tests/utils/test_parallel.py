@@ -0,0 +1,155 @@
+"""Tests for the concurrent execution utilities."""
+import threading
+import time
+
+import pytest
+
+from rig.utils.parallel import \
+    run_concurrently, ThreadPool, Future, TimeoutError
+
+
+def test_run_concurrently_empty():
+    assert run_concurrently([]) == []
+
+
+def test_run_concurrently_single():
+    # A single function should be run in the calling thread
+    assert run_concurrently([threading.current_thread]) == \
+        [threading.current_thread()]
+
+
+def test_run_concurrently():
+    # All functions must be running at the same time for any of them to
+    # complete.
+    n = 5
+    barrier = threading.Semaphore(0)
+    lock = threading.Lock()
+    started = [0]
+
+    def f(i):
+        def f_():
+            with lock:
+                started[0] += 1
+                if started[0] == n:
+                    for _ in range(n):
+                        barrier.release()
+            barrier.acquire()
+            return i
+        return f_
+
+    assert run_concurrently(f(i) for i in range(n)) == list(range(n))
+
+
+def test_run_concurrently_exception():
+    called = []
+
+    def ok():
+        called.append(True)
+
+    def fail(msg):
+        def f():
+            raise ValueError(msg)
+        return f
+
+    with pytest.raises(ValueError) as excinfo:
+        run_concurrently([ok, fail("first"), fail("second"), ok])
+    assert str(excinfo.value) == "first"
+
+    # Every function should still have run to completion
+    assert called == [True, True]
+
+
+def test_run_concurrently_timeout():
+    finish = threading.Event()
+
+    def slow():
+        finish.wait()
+        return "slow"
+
+    def slow_fail():
+        finish.wait()
+        raise ValueError()
+
+    before = time.time()
+    assert run_concurrently([lambda: 1, slow, slow_fail, lambda: 2],
+                            timeout=0.05) == [1, None, None, 2]
+    assert time.time() - before < 1.0
+    finish.set()
+
+    # Abandoned functions which complete later must not modify the results
+    # already returned
+    finish.clear()
+    results = run_concurrently([slow], timeout=0.01)
+    finish.set()
+    time.sleep(0.05)
+    assert results == [None]
+
+    # A single function should still be timed out
+    finish.clear()
+    assert run_concurrently([slow], timeout=0.01) == [None]
+    finish.set()
+
+    # Exceptions should still be raised if the function completes in time
+    with pytest.raises(ValueError):
+        run_concurrently([slow_fail], timeout=1.0)
+
+
+def test_thread_pool():
+    with ThreadPool(max_workers=2) as pool:
+        futures = [pool.submit(lambda a, b=0: a + b, i, b=10)
+                   for i in range(10)]
+        assert [f.result(timeout=1.0) for f in futures] == list(range(10, 20))
+        assert all(f.done() for f in futures)
+        assert all(f.exception() is None for f in futures)
+
+        # No more than max_workers threads should be used
+        assert len(pool._threads) == 2
+
+    # Can't submit after shutdown
+    with pytest.raises(RuntimeError):
+        pool.submit(lambda: None)
+
+
+def test_thread_pool_bounded():
+    # Functions beyond the number of workers should wait for a free thread
+    release = threading.Event()
+    with ThreadPool(max_workers=1) as pool:
+        blocked = pool.submit(release.wait)
+        waiting = pool.submit(lambda: "done")
+        with pytest.raises(TimeoutError):
+            waiting.result(timeout=0.05)
+        assert not waiting.done()
+        release.set()
+        assert waiting.result(timeout=1.0) == "done"
+        assert blocked.result(timeout=1.0) is True
+
+
+def test_thread_pool_exception():
+    with ThreadPool(max_workers=1) as pool:
+        def fail():
+            raise ValueError("Oh no")
+        future = pool.submit(fail)
+        with pytest.raises(ValueError):
+            future.result(timeout=1.0)
+        assert isinstance(future.exception(), ValueError)
+
+        # The worker should survive the exception
+        assert pool.submit(lambda: 123).result(timeout=1.0) == 123
+
+    with pytest.raises(ValueError):
+        ThreadPool(max_workers=0)
+
+
+def test_future_callbacks():
+    called = []
+    future = Future()
+    future.add_done_callback(called.append)
+    assert called == []
+
+    future._finish(123, None)
+    assert called == [future]
+    assert future.result() == 123
+
+    # Callbacks added after completion are called immediately
+    future.add_done_callback(called.append)
+    assert called == [future, future]
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+"""Measure the per-call overhead added by
+:py:meth:`rig.utils.contexts.ContextMixin.use_contextual_arguments`.
+
+Usage::
+
+    python utils/benchmark_contexts.py [n_calls]
+"""
+
+import sys
+import timeit
+
+from rig.utils.contexts import ContextMixin, Required
+
+
+class Benchmark(ContextMixin):
+
+    def __init__(self):
+        ContextMixin.__init__(self)
+
+    def plain(self, field, x, y, p=0):
+        return (field, x, y, p)
+
+    # A signature typical of fine-grained MachineController methods (e.g.
+    # read_struct_field)
+    @ContextMixin.use_contextual_arguments()
+    def contextual(self, field, x=Required, y=Required, p=0):
+        return (field, x, y, p)
+
+
+def benchmark(n_calls):
+    obj = Benchmark()
+
+    def time_calls(f, *args, **kwargs):
+        seconds = min(timeit.repeat(lambda: f(*args, **kwargs),
+                                    number=n_calls, repeat=5))
+        return seconds / n_calls * 1e9
+
+    baseline = time_calls(obj.plain, "p2p_up", 1, 2)
+    print("{:45s} {:8.0f} ns".format("undecorated call", baseline))
+
+    def report(name, ns):
+        print("{:45s} {:8.0f} ns (+{:.0f} ns)".format(name, ns, ns - baseline))
+
+    report("all arguments given", time_calls(obj.contextual, "p2p_up", 1, 2))
+    with obj.get_new_context(x=1, y=2):
+        report("x, y from context",
+               time_calls(obj.contextual, "p2p_up"))
+        with obj.get_new_context(app_id=30):
+            with obj.get_new_context(p=3):
+                report("x, y, p from 3-deep context stack",
+                       time_calls(obj.contextual, "p2p_up"))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+"""Compare the number of flood-fill core select (FFCS) packets required to
+load applications using :py:func:`rig.machine_control.regions.\
+compress_flood_fill_regions` with and without optimisation.
+
+Application maps are produced by placing and allocating synthetic
+applications onto a 48-board (144x144) machine with a few dead chips and
+cores, in the same way as a real application would be loaded.
+
+Usage::
+
+    python utils/benchmark_flood_fill_regions.py [seed]
+"""
+
+import random
+import sys
+import time
+
+from rig.netlist import Net
+
+from rig.place_and_route import Machine, Cores
+from rig.place_and_route.allocate.greedy import allocate
+from rig.place_and_route.constraints import ReserveResourceConstraint
+from rig.place_and_route.place import hilbert, rand
+from rig.place_and_route.utils import build_application_map
+
+from rig.machine_control.regions import compress_flood_fill_regions
+
+
+def build_machine(rng, width=144, height=144):
+    """A machine with a few dead chips and chips with fewer working cores."""
+    chips = [(x, y) for x in range(width) for y in range(height)]
+    dead_chips = set(rng.sample(chips, 20))
+    chip_resource_exceptions = {
+        xy: {Cores: rng.choice([16, 17])}
+        for xy in rng.sample(chips, 100) if xy not in dead_chips}
+    return Machine(width, height,
+                   chip_resource_exceptions=chip_resource_exceptions,
+                   dead_chips=dead_chips)
+
+
+def build_application_maps(rng, machine, n_vertices, applications,
+                           cores_per_vertex, placer):
+    vertices = [object() for _ in range(n_vertices)]
+    vertices_resources = {v: {Cores: rng.choice(cores_per_vertex)}
+                          for v in vertices}
+    vertices_applications = {v: rng.choice(applications) for v in vertices}
+    # A locally-connected netlist
+    nets = [Net(vertices[i], [vertices[(i + j) % n_vertices]
+                              for j in range(1, 4)])
+            for i in range(n_vertices)]
+    # The monitor processor
+    constraints = [ReserveResourceConstraint(Cores, slice(0, 1))]
+
+    placements = placer(vertices_resources, nets, machine, constraints)
+    allocations = allocate(vertices_resources, nets, machine, constraints,
+                           placements)
+    return build_application_map(vertices_applications, placements,
+                                 allocations)
+
+
+def benchmark(seed):
+    rng = random.Random(seed)
+    machine = build_machine(rng)
+    n_cores = sum(machine[xy][Cores] - 1 for xy in machine)
+
+    scenarios = [
+        ("one application, full machine",
+         n_cores, ["a"], [1], hilbert.place),
+        ("one application, half machine",
+         n_cores // 2, ["a"], [1], hilbert.place),
+        ("3 applications, interleaved",
+         n_cores // 2, ["a", "b", "c"], [1], hilbert.place),
+        ("3 applications, multi-core vertices",
+         n_cores // 4, ["a", "b", "c"], [1, 2, 3], hilbert.place),
+        ("8 applications, random placement",
+         n_cores // 4, list("abcdefgh"), [1, 2], rand.place),
+    ]
+
+    print("{:40s} {:>8s} {:>8s} {:>8s} {:>8s}".format(
+        "scenario", "tree", "optimal", "tree/s", "optim/s"))
+    for name, n_vertices, applications, cores_per_vertex, placer in \
+            scenarios:
+        application_map = build_application_maps(
+            rng, machine, n_vertices, applications, cores_per_vertex, placer)
+
+        results = []
+        for optimise in (False, True):
+            before = time.time()
+            n_packets = sum(
+                len(compress_flood_fill_regions(targets, optimise=optimise))
+                for targets in application_map.values())
+            results.append((n_packets, time.time() - before))
+
+        print("{:40s} {:8d} {:8d} {:8.3f} {:8.3f}".format(
+            name, results[0][0], results[1][0], results[0][1],
+            results[1][1]))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
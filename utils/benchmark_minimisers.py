@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+
+"""Measure the run time, peak memory use and compression achieved by the
+routing table minimisers in :py:mod:`rig.routing_table`.
+
+The benchmark corpus is built by placing and routing synthetic netlists onto
+standard SpiNN-5 machines, allocating each net a key from a
+:py:class:`~rig.bitfield.BitField` and generating per-chip routing tables
+with :py:func:`~rig.routing_table.routing_tree_to_tables`, in the same way as
+a real application would be loaded. The following netlists are generated:
+
+random
+    Each vertex sources a net to a few randomly chosen vertices.
+local
+    Each vertex sources a net to the next few vertices.
+all_to_all
+    A subset of the vertices each source a net to every vertex in the subset.
+convolutional
+    Vertices are arranged in layers of square feature maps and each vertex
+    sources a net to its 3x3 neighbourhood in the next layer.
+
+Tables captured from real applications may also be benchmarked. Captured
+tables must be stored one per file in the format produced by
+:py:func:`rig.routing_table.minimise.pack_table`, for example::
+
+    for (x, y), table in routing_tables.items():
+        with open("table_{}_{}.bin".format(x, y), "wb") as f:
+            f.write(pack_table(table))
+
+.. note::
+
+    Some routing decisions depend on the order in which objects are stored
+    in sets and so the synthetic tables may differ very slightly between
+    runs.
+
+For each corpus and each set of methods given to
+:py:func:`~rig.routing_table.minimise_table`, the total and largest table
+lengths, the number of tables which could not be minimised to fit the target
+length (if given), the total time spent and the peak memory allocated while
+minimising any single table are reported.
+
+Usage::
+
+    python utils/benchmark_minimisers.py [--boards N] [--seed S]
+        [--target-length L] [captured_table_file_or_directory ...]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import warnings
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    # Python 2
+    tracemalloc = None
+
+from rig.bitfield import BitField
+
+from rig.geometry import standard_system_dimensions, spinn5_chip_coord
+
+from rig.links import Links
+
+from rig.netlist import Net
+
+from rig.place_and_route import Machine, Cores
+from rig.place_and_route.allocate.greedy import allocate
+from rig.place_and_route.constraints import ReserveResourceConstraint
+from rig.place_and_route.place.hilbert import place
+from rig.place_and_route.route.ner import route
+
+from rig.routing_table import (
+    minimise_table, routing_tree_to_tables, table_is_subset_of,
+    MinimisationFailedError, remove_default_routes, ordered_covering,
+    espresso)
+from rig.routing_table.minimise import unpack_table
+
+
+METHODS = [
+    ("remove_default_routes", (remove_default_routes.minimise, )),
+    ("ordered_covering", (remove_default_routes.minimise,
+                          ordered_covering.minimise)),
+    ("espresso", (remove_default_routes.minimise, espresso.minimise)),
+]
+"""The sets of methods passed to :py:func:`~rig.routing_table.minimise_table`
+which are benchmarked."""
+
+
+def spinn5_machine(num_boards):
+    """A machine built from `num_boards` working SpiNN-5 boards arranged in
+    the standard way.
+
+    A single board does not have wrap-around links.
+    """
+    width, height = standard_system_dimensions(num_boards)
+    if num_boards != 1:
+        return Machine(width, height)
+
+    # Only the chips on the board at (0, 0) exist
+    chips = set((x, y) for x in range(width) for y in range(height)
+                if spinn5_chip_coord(x, y) == (x, y))
+    dead_chips = set((x, y) for x in range(width) for y in range(height)
+                     if (x, y) not in chips)
+    dead_links = set()
+    for x, y in chips:
+        for link in Links:
+            dx, dy = link.to_vector()
+            if (x + dx, y + dy) not in chips:
+                dead_links.add((x, y, link))
+    return Machine(width, height, dead_chips=dead_chips,
+                   dead_links=dead_links)
+
+
+def random_nets(rng, vertices, fan_out=4):
+    return [Net(v, rng.sample(vertices, fan_out)) for v in vertices]
+
+
+def local_nets(rng, vertices, fan_out=4):
+    n = len(vertices)
+    return [Net(vertices[i], [vertices[(i + j) % n]
+                              for j in range(1, fan_out + 1)])
+            for i in range(n)]
+
+
+def all_to_all_nets(rng, vertices, n_connected=256):
+    connected = vertices[:n_connected]
+    return [Net(v, connected) for v in connected]
+
+
+def convolutional_nets(rng, vertices, n_layers=4):
+    size = int((len(vertices) // n_layers) ** 0.5)
+    layers = [vertices[i * size * size:(i + 1) * size * size]
+              for i in range(n_layers)]
+    nets = []
+    for layer, next_layer in zip(layers, layers[1:]):
+        for y in range(size):
+            for x in range(size):
+                sinks = [next_layer[ny * size + nx]
+                         for ny in range(max(0, y - 1), min(size, y + 2))
+                         for nx in range(max(0, x - 1), min(size, x + 2))]
+                nets.append(Net(layer[y * size + x], sinks))
+    return nets
+
+
+NETLISTS = [
+    ("random", random_nets),
+    ("local", local_nets),
+    ("all_to_all", all_to_all_nets),
+    ("convolutional", convolutional_nets),
+]
+"""The synthetic netlist generators, functions (rng, vertices) -> nets."""
+
+
+def build_keyspace():
+    """The key space used to allocate keys to nets.
+
+    Keys are of the form ``x:8 y:8 p:5 neuron:11`` where the core which
+    sources the net is given by `x`, `y` and `p`. The `neuron` field is not
+    routed upon.
+    """
+    keyspace = BitField(32)
+    keyspace.add_field("x", length=8, start_at=24, tags="routing")
+    keyspace.add_field("y", length=8, start_at=16, tags="routing")
+    keyspace.add_field("p", length=5, start_at=11, tags="routing")
+    keyspace.add_field("neuron", length=11, start_at=0)
+    return keyspace
+
+
+def netlist_tables(rng, machine, make_nets):
+    """Place and route a netlist with one single-core vertex on every
+    application core of a machine and generate its routing tables.
+
+    Returns
+    -------
+    {(x, y): [:py:class:`~rig.routing_table.RoutingTableEntry`, ...], ...}
+    """
+    n_vertices = sum(machine[xy][Cores] - 1 for xy in machine)
+    vertices = list(range(n_vertices))
+    vertices_resources = {v: {Cores: 1} for v in vertices}
+    nets = make_nets(rng, vertices)
+
+    # The monitor processor
+    constraints = [ReserveResourceConstraint(Cores, slice(0, 1))]
+
+    placements = place(vertices_resources, nets, machine, constraints)
+    allocations = allocate(vertices_resources, nets, machine, constraints,
+                           placements)
+    routes = route(vertices_resources, nets, machine, constraints,
+                   placements, allocations)
+
+    keyspace = build_keyspace()
+    net_keys = {}
+    for net in nets:
+        x, y = placements[net.source]
+        key = keyspace(x=x, y=y, p=allocations[net.source][Cores].start)
+        net_keys[net] = (key.get_value(tag="routing"),
+                         key.get_mask(tag="routing"))
+
+    return routing_tree_to_tables(routes, net_keys)
+
+
+def synthetic_corpora(seed, num_boards):
+    """Generate the routing tables for every synthetic netlist.
+
+    Yields
+    ------
+    (name, [table, ...])
+    """
+    machine = spinn5_machine(num_boards)
+    for name, make_nets in NETLISTS:
+        rng = random.Random(seed)
+        tables = netlist_tables(rng, machine, make_nets)
+        yield name, [tables[xy] for xy in sorted(tables)]
+
+
+def captured_corpus(paths):
+    """Load captured routing tables from files and directories of files.
+
+    Yields
+    ------
+    ("captured", [table, ...])
+    """
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            filenames.extend(sorted(os.path.join(path, f)
+                                    for f in os.listdir(path)))
+        else:
+            filenames.append(path)
+
+    tables = []
+    for filename in filenames:
+        with open(filename, "rb") as f:
+            tables.append(unpack_table(f.read()))
+    yield "captured", tables
+
+
+def measure(table, target_length, methods):
+    """Minimise a single table, measuring the time and peak memory used.
+
+    Since tracing memory allocations slows down minimisation, the table is
+    minimised twice: once to measure the time taken and once to measure the
+    memory used.
+
+    Returns
+    -------
+    (length, failed, seconds, peak_bytes or None)
+        Where failed is True if the table could not be minimised to fit
+        `target_length`, in which case length is the best length achieved.
+    """
+    before = time.time()
+    try:
+        minimised = minimise_table(table, target_length, methods)
+        length = len(minimised)
+        failed = False
+    except MinimisationFailedError as e:
+        minimised = None
+        length = e.final_length if e.final_length is not None else len(table)
+        failed = True
+    duration = time.time() - before
+
+    if minimised is not None:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            assert table_is_subset_of(table, minimised)
+
+    if tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            minimise_table(table, target_length, methods)
+        except MinimisationFailedError:
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    else:  # pragma: no cover
+        peak = None
+
+    return length, failed, duration, peak
+
+
+def benchmark(corpora, target_length=None):
+    print("{:14s} {:>6s} {:>8s} {:>6s}  {:22s} {:>8s} {:>6s} {:>6s} {:>9s} "
+          "{:>9s}".format("corpus", "tables", "entries", "max",
+                          "method", "entries", "max", "failed", "time/s",
+                          "peak/KiB"))
+    for name, tables in corpora:
+        n_entries = sum(len(t) for t in tables)
+        max_length = max(len(t) for t in tables) if tables else 0
+        for method_name, methods in METHODS:
+            lengths = []
+            n_failed = 0
+            total_duration = 0.0
+            max_peak = None
+            for table in tables:
+                length, failed, duration, peak = measure(
+                    table, target_length, methods)
+                lengths.append(length)
+                n_failed += failed
+                total_duration += duration
+                if peak is not None:
+                    max_peak = max(max_peak or 0, peak)
+
+            print("{:14s} {:6d} {:8d} {:6d}  {:22s} {:8d} {:6d} {:6d} {:9.3f} "
+                  "{:>9s}".format(
+                      name, len(tables), n_entries, max_length, method_name,
+                      sum(lengths), max(lengths) if lengths else 0, n_failed,
+                      total_duration,
+                      "{:.0f}".format(max_peak / 1024.0)
+                      if max_peak is not None else "n/a"))
+            sys.stdout.flush()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the routing table minimisers.")
+    parser.add_argument("captured", nargs="*",
+                        help="files (or directories of files) containing "
+                             "captured routing tables; if given, no "
+                             "synthetic tables are generated")
+    parser.add_argument("--boards", "-b", type=int, default=1,
+                        help="the number of SpiNN-5 boards in the machine "
+                             "(default: %(default)s)")
+    parser.add_argument("--seed", "-s", type=int, default=1,
+                        help="the random seed (default: %(default)s)")
+    parser.add_argument("--target-length", "-t", type=int, default=None,
+                        help="the target length of minimised tables "
+                             "(default: minimise as far as possible)")
+    args = parser.parse_args(args)
+
+    if args.captured:
+        corpora = captured_corpus(args.captured)
+    else:
+        corpora = synthetic_corpora(args.seed, args.boards)
+    benchmark(corpora, args.target_length)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()